@@ -19,6 +19,19 @@ const HomePage = () => {
 
   const chatBodyRef = useRef(null); // scroll only inside chat container
 
+  // the server issues one session id per conversation; it is sent with every request as X-Session-Id
+  const sessionIdRef = useRef(null);
+  const getSessionId = async () => {
+    if (!sessionIdRef.current) {
+      const resSession = await fetch(`http://localhost:5000/api/session`, { method: "POST" });
+      if (!resSession.ok) {
+        throw new Error("HTTP Error! Status: " + resSession.status);
+      }
+      sessionIdRef.current = (await resSession.json()).session_id;
+    }
+    return sessionIdRef.current;
+  };
+
   // Auto scroll inside chat-body when new messages arrive
   useEffect(() => {
     if (chatBodyRef.current) {
@@ -30,9 +43,10 @@ const HomePage = () => {
     const sendMessageBackend = async (input) => {
       try {
         setIsTyping(true); // start typing indicator
+        const sessionId = await getSessionId();
       const resStage = await fetch(`http://localhost:5000/api/stage`, {
       method: "GET",
-      headers: { "Authorization": "" }, 
+      headers: { "Authorization": "", "X-Session-Id": sessionId }, 
     });
     if (!resStage.ok) {
       console.log("HTTP Error! Status: " + resStage.status);
@@ -45,7 +59,7 @@ const HomePage = () => {
         try{
         const resA = await fetch(`http://localhost:5000/api/chat/a`, {
         method: "POST",
-      headers: {"Content-Type": "application/json"},
+      headers: {"Content-Type": "application/json", "X-Session-Id": sessionId},
       body: JSON.stringify({ text : input }),
         });
         if (!resA.ok) {
@@ -62,7 +76,7 @@ const HomePage = () => {
         try {
             const resStage2 = await fetch(`http://localhost:5000/api/stage`, {
       method: "GET",
-      headers: { "Authorization": "" }, 
+      headers: { "Authorization": "", "X-Session-Id": sessionId }, 
     });
     if (!resStage2.ok) {
       console.log("HTTP Error! Status: " + resStage2.status);
@@ -87,7 +101,7 @@ const HomePage = () => {
         try{
         const resB = await fetch('http://localhost:5000/api/chat/b', {
         method: "POST",
-        headers: {"Content-Type": "application/json"},
+        headers: {"Content-Type": "application/json", "X-Session-Id": sessionId},
        body: JSON.stringify({ text : input }),
         });
         if (!resB.ok) {
@@ -0,0 +1,10 @@
+"""Microbenchmarks for the ranking, optimizer and catalog services.
+
+Run from the `server/` directory:
+
+    python -m benchmarks.run                      # all benchmarks, default sizes
+    python -m benchmarks.run --sizes real,10000 -k rank
+    python -m benchmarks.run --compare            # diff against the previous commit
+
+Results are appended to `benchmarks/results/history.jsonl`.
+"""
@@ -0,0 +1,59 @@
+"""Catalog fixtures for the benchmark suite.
+
+`load_catalog('real')` returns the shipped `All_Programs_Data.csv`;
+`load_catalog(n)` returns an n-row synthetic catalog with the same schema
+from `services.synthetic_data`. Catalogs are cached per process since
+building the 1M-row one is not free.
+"""
+
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = SERVER_DIR / 'src'
+REAL_CSV = SRC_DIR / 'data' / 'All_Programs_Data.csv'
+
+# services/ and models/ are imported from the src root, like app.py does
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+Size = Union[str, int]
+
+
+def parse_size(token: str) -> Size:
+    token = token.strip().lower()
+    if token == 'real':
+        return 'real'
+    if token.endswith('m'):
+        return int(float(token[:-1]) * 1_000_000)
+    if token.endswith('k'):
+        return int(float(token[:-1]) * 1_000)
+    return int(token)
+
+
+def size_label(size: Size) -> str:
+    return 'real' if size == 'real' else str(size)
+
+
+@lru_cache(maxsize=None)
+def load_catalog(size: Size, seed: int = 0) -> pd.DataFrame:
+    from services.synthetic_data import SyntheticDataGenerator
+
+    real = pd.read_csv(REAL_CSV)
+    if size == 'real':
+        return real
+    return SyntheticDataGenerator(real, seed=seed).catalog(int(size))
+
+
+def candidate_names(df: pd.DataFrame, k: int = 50, seed: int = 0) -> list[str]:
+    """A stage-A sized whitelist of program names drawn from `df`."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(df))
+    return df['program'].iloc[rng.choice(len(df), size=k, replace=False)].tolist()
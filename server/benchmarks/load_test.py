@@ -0,0 +1,279 @@
+"""End-to-end load generator that drives the chat protocol of the React client.
+
+Each virtual user replays what `client/src/HomePage.jsx` does per message:
+GET /api/stage, then POST /api/chat/a followed by another GET /api/stage
+while in stage A, or POST /api/chat/b in stage B. A conversation ends when a
+stage-B response carries programs (or after --max-turns messages).
+
+Start the server against the local fake model backend first, so results
+reflect server capacity rather than provider latency:
+
+    cd server/src && MODEL_BACKEND=fake python app.py
+    cd server && python -m benchmarks.load_test --users 2000 --concurrency 500
+
+Every virtual user first gets its session id from POST /api/session and
+sends it as the `X-Session-Id` header, like the client.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+STAGE_A_ANSWERS = [
+    "Hi, I lost my job last month and I'm struggling to pay rent.",
+    "I live with my two kids, they're 4 and 9.",
+    "I have some savings left but they'll run out soon.",
+    "We've been skipping meals to make ends meet.",
+    "My youngest needs to see a doctor and we have no insurance.",
+    "I'm looking for any help with food, housing or health care.",
+    "That's everything, thank you.",
+]
+STAGE_B_ANSWERS = [
+    "I'm 34.",
+    "Yes, I'm a U.S. citizen.",
+    "Yes, we rent an apartment.",
+    "Yes, with my two children.",
+    "No, I'm not working right now.",
+    "No.",
+    "No, never.",
+    "Yes, two kids.",
+]
+
+
+class HttpError(Exception):
+    pass
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client over asyncio streams (stdlib only)."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+            self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        return await asyncio.wait_for(self._request(method, path, body, headers or {}), self.timeout)
+
+    async def _request(self, method, path, body, headers) -> Tuple[int, bytes]:
+        if self.writer is None:
+            await self._connect()
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{k}: {v}' for k, v in headers.items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('connection closed by server')
+        status = int(status_line.split()[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+
+        if 'content-length' in response_headers:
+            data = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            data = b''.join(chunks)
+        else:
+            data = await self.reader.read()
+            await self.close()
+            return status, data
+
+        if response_headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            await self.close()
+        return status, data
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.error_samples: Dict[str, str] = {}
+        self.conversations_completed = 0
+        self.conversations_failed = 0
+
+    def record(self, endpoint: str, ms: float, ok: bool, detail: str = '') -> None:
+        self.latencies[endpoint].append(ms)
+        if not ok:
+            self.errors[endpoint] += 1
+            self.error_samples.setdefault(endpoint, detail)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            total += len(values)
+            q = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors.get(endpoint, 0),
+                'error_rate': self.errors.get(endpoint, 0) / len(values),
+                'p50_ms': q[49], 'p95_ms': q[94], 'p99_ms': q[98],
+                'max_ms': values[-1],
+                'throughput_rps': len(values) / elapsed,
+            }
+        return {
+            'elapsed_s': elapsed,
+            'requests': total,
+            'throughput_rps': total / elapsed if elapsed else 0.0,
+            'error_rate': sum(self.errors.values()) / total if total else 0.0,
+            'conversations_completed': self.conversations_completed,
+            'conversations_failed': self.conversations_failed,
+            'endpoints': endpoints,
+            'error_samples': dict(self.error_samples),
+        }
+
+
+async def virtual_user(vu_id: int, args, stats: Stats, host: str, port: int) -> None:
+    rng = random.Random(args.seed * 100003 + vu_id)
+    conn = Connection(host, port, args.timeout)
+    headers: Dict[str, str] = {}
+    a_turn = b_turn = 0
+
+    async def call(method: str, path: str, body=None) -> Optional[Dict[str, Any]]:
+        endpoint = f'{method} {path}'
+        t0 = time.perf_counter()
+        try:
+            status, data = await conn.request(method, path, body, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError, ValueError) as e:
+            stats.record(endpoint, (time.perf_counter() - t0) * 1000, False, repr(e))
+            await conn.close()
+            return None
+        ms = (time.perf_counter() - t0) * 1000
+        if not 200 <= status < 300:
+            stats.record(endpoint, ms, False, f'HTTP {status}: {data[:200]!r}')
+            return None
+        stats.record(endpoint, ms, True)
+        try:
+            return json.loads(data)
+        except ValueError:
+            return {}
+
+    try:
+        session = await call('POST', '/api/session')
+        if session is None:
+            stats.conversations_failed += 1
+            return
+        headers['X-Session-Id'] = session['session_id']
+        for _ in range(args.max_turns):
+            stage = await call('GET', '/api/stage')
+            if stage is None:
+                stats.conversations_failed += 1
+                return
+            if stage.get('stage') == 'a':
+                text = STAGE_A_ANSWERS[min(a_turn, len(STAGE_A_ANSWERS) - 1)]
+                a_turn += 1
+                if await call('POST', '/api/chat/a', {'text': text}) is None:
+                    stats.conversations_failed += 1
+                    return
+                await call('GET', '/api/stage')
+            else:
+                text = STAGE_B_ANSWERS[min(b_turn, len(STAGE_B_ANSWERS) - 1)]
+                b_turn += 1
+                reply = await call('POST', '/api/chat/b', {'text': text})
+                if reply is None:
+                    stats.conversations_failed += 1
+                    return
+                if reply.get('programs'):
+                    stats.conversations_completed += 1
+                    return
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000.0)
+        stats.conversations_failed += 1
+    finally:
+        await conn.close()
+
+
+async def run(args) -> Dict[str, Any]:
+    url = urlsplit(args.url)
+    host, port = url.hostname or 'localhost', url.port or 80
+    stats = Stats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def gated(vu_id: int) -> None:
+        if args.ramp:
+            await asyncio.sleep(args.ramp * vu_id / args.users)
+        async with semaphore:
+            await virtual_user(vu_id, args, stats, host, port)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(gated(i) for i in range(args.users)))
+    return stats.report(time.perf_counter() - t0)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<22} {'reqs':>8} {'err%':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'rps':>9}")
+    for endpoint, r in report['endpoints'].items():
+        print(f"{endpoint:<22} {r['requests']:>8} {r['error_rate'] * 100:>6.2f}% {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f} {r['throughput_rps']:>9.1f}")
+    print(f"total: {report['requests']} requests in {report['elapsed_s']:.1f}s = {report['throughput_rps']:.1f} req/s, "
+          f"error rate {report['error_rate'] * 100:.2f}%, conversations {report['conversations_completed']} completed / "
+          f"{report['conversations_failed']} failed")
+    for endpoint, sample in report['error_samples'].items():
+        print(f'  first error on {endpoint}: {sample}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=int, default=1000, help='total virtual users (one conversation each)')
+    parser.add_argument('--concurrency', type=int, default=200, help='maximum simultaneous conversations')
+    parser.add_argument('--ramp', type=float, default=0.0, help='seconds over which to spread virtual user starts')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean pause between a user\'s messages')
+    parser.add_argument('--max-turns', type=int, default=20, help='give up on a conversation after this many messages')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_out', help='also write the report as JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['error_rate'] > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
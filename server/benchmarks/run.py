@@ -0,0 +1,141 @@
+"""Benchmark runner: times every registered benchmark at each catalog size
+and appends the results to a JSONL history keyed by git commit.
+
+Usage (from `server/`):
+    python -m benchmarks.run [--sizes real,10k,100k,1m] [-k substring]
+                             [--repeat 5] [--compare] [--no-save]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.catalogs import SERVER_DIR, parse_size, size_label
+from benchmarks.suites import BENCHMARKS, SIZE_INDEPENDENT
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent / 'results' / 'history.jsonl'
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(['git', *args], cwd=SERVER_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', '--short', 'HEAD') or None,
+                'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
+
+
+def time_benchmark(run, *, repeat: int, min_time: float) -> Dict[str, Any]:
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s per batch; scale to the requested minimum
+    if min_time > 0.2:
+        number = max(1, int(number * min_time / 0.2))
+    per_call = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_s': min(per_call),
+        'median_s': statistics.median(per_call),
+        'mean_s': statistics.fmean(per_call),
+        'stdev_s': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+    }
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_result(history: List[Dict[str, Any]], name: str, size: str, commit: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Most recent result for (name, size) recorded at a different commit."""
+    for record in reversed(history):
+        if record['benchmark'] == name and record['size'] == size and record.get('commit') != commit:
+            return record
+    return None
+
+
+def format_seconds(s: float) -> str:
+    if s < 1e-3:
+        return f'{s * 1e6:8.1f} us'
+    if s < 1:
+        return f'{s * 1e3:8.2f} ms'
+    return f'{s:8.3f} s '
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='real,10k,100k,1m', help='comma separated catalog sizes ("real" = shipped CSV)')
+    parser.add_argument('-k', dest='pattern', default='', help='only run benchmarks whose name contains this substring')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timing batch')
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument('--no-save', action='store_true', help='do not append results to the history file')
+    parser.add_argument('--compare', action='store_true', help='compare medians against the previous commit in the history')
+    parser.add_argument('--threshold', type=float, default=1.10, help='median ratio above which a result is flagged as a regression')
+    args = parser.parse_args(argv)
+
+    # service code logs on expected failures (e.g. parquet cache without pyarrow)
+    logging.basicConfig(level=logging.CRITICAL)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    revision = git_revision()
+    history = load_history(args.history) if args.compare else []
+    meta = {
+        **revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'node': platform.node(),
+    }
+
+    records = []
+    regressions = 0
+    for name, setup in BENCHMARKS:
+        if args.pattern and args.pattern not in name:
+            continue
+        for size in (sizes[:1] if name in SIZE_INDEPENDENT else sizes):
+            label = size_label(size)
+            # models and services still print on construction; keep the report readable
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                run = setup(size)
+                stats = time_benchmark(run, repeat=args.repeat, min_time=args.min_time)
+            record = {'benchmark': name, 'size': label, **stats, **meta}
+            records.append(record)
+
+            line = f'{name:<40} {label:>8} {format_seconds(stats["median_s"])}  (min {format_seconds(stats["min_s"]).strip()}, n={stats["number"]}x{stats["repeat"]})'
+            if args.compare:
+                prev = previous_result(history, name, label, revision['commit'])
+                if prev is not None:
+                    ratio = stats['median_s'] / prev['median_s']
+                    flag = 'REGRESSION' if ratio > args.threshold else 'improved' if ratio < 1 / args.threshold else ''
+                    regressions += flag == 'REGRESSION'
+                    line += f'  x{ratio:.2f} vs {prev.get("commit")} {flag}'
+            print(line, flush=True)
+
+    if not args.no_save and records:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
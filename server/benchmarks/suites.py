@@ -0,0 +1,171 @@
+"""Benchmark definitions.
+
+Each benchmark is a setup function taking a catalog size and returning a
+zero-argument callable; only the callable is timed.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from benchmarks.catalogs import REAL_CSV, Size, candidate_names, load_catalog
+
+from models.user import User
+from services.batch_scoring import BatchScorer, users_frame
+from services.data_loader import DataFrameDB
+from services.eligibility_bot import WelfareProgramEligibilityBot
+from services.eligibility_optimizer import WelfareProgramEligibilityOptimizer
+from services.program_matcher import get_matcher
+from services.rank_programs_bot import RankProgramsBot
+from services.ranking_memo import RankingMemo
+from services.welfare_service import WelfareService
+
+BENCHMARKS: List[Tuple[str, Callable[[Size], Callable[[], object]]]] = []
+
+# What the stage-B extraction call typically returns
+USER_FIELDS = {
+    'age': '34',
+    'citizen_or_lawful_resident': 'True',
+    'has_permanent_address': 'False',
+    'lives_with_people': 'True',
+    'monthly_income': '1800',
+    'employed': 'False',
+    'disabled': 'False',
+    'is_veteran': 'False',
+    'has_criminal_record': 'False',
+    'has_children': 'True',
+    'is_refugee': 'False',
+}
+
+
+def benchmark(name: str):
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+def _sample_user() -> User:
+    # validate through the constructor so string values are coerced to the annotated types
+    return User(**USER_FIELDS)
+
+
+@benchmark('rank_programs.init_and_rank')
+def bench_rank_programs(size: Size):
+    df = load_catalog(size)
+    names = candidate_names(df)
+    user = _sample_user()
+    return lambda: RankProgramsBot(df, names, user).rank_programs()
+
+
+@benchmark('rank_programs.top_k')
+def bench_rank_programs_top_k(size: Size):
+    df = load_catalog(size)
+    bot = RankProgramsBot(df, df.iloc[:, 0].astype(str).tolist(), _sample_user())
+    return lambda: bot.top_k(20)
+
+
+@benchmark('rank_programs.full_sort')
+def bench_rank_programs_full_sort(size: Size):
+    df = load_catalog(size)
+    bot = RankProgramsBot(df, df.iloc[:, 0].astype(str).tolist(), _sample_user())
+    return lambda: bot.ranked_entries()[:20]
+
+
+@benchmark('rank_programs.memo_hit')
+def bench_rank_programs_memo_hit(size: Size):
+    memo = RankingMemo(load_catalog(size))
+    names = candidate_names(load_catalog(size))
+    user = _sample_user()
+    memo.rank(names, user)
+    return lambda: memo.rank(names, user)
+
+
+@benchmark('batch_scoring.rank_200_users')
+def bench_batch_rank(size: Size):
+    scorer = BatchScorer(load_catalog(size))
+    users = users_frame([_sample_user()] * 200)
+    return lambda: scorer.rank(users, top_k=20)
+
+
+@benchmark('optimizer.get_next_fields')
+def bench_optimizer_next_fields(size: Size):
+    optimizer = WelfareProgramEligibilityOptimizer(df=load_catalog(size))
+    return lambda: optimizer.get_next_fields([], [], top_n=3)
+
+
+@benchmark('optimizer.programs_outside_ranges')
+def bench_optimizer_range_narrowing(size: Size):
+    optimizer = WelfareProgramEligibilityOptimizer(df=load_catalog(size))
+    optimizer.programs_outside_ranges(age=34, monthly_income=1800)  # build the indexes outside the timing
+    return lambda: optimizer.programs_outside_ranges(age=34, monthly_income=1800)
+
+
+@benchmark('eligibility_bot.get_next_field')
+def bench_bot_next_field(size: Size):
+    bot = WelfareProgramEligibilityBot(df=load_catalog(size))
+    field_blacklist = ['max_monthly_income']
+    return lambda: bot.get_next_field(field_blacklist, [])
+
+
+@benchmark('welfare_service.get_programs_by_name')
+def bench_programs_by_name(size: Size):
+    df = load_catalog(size)
+    service = WelfareService(df=df.rename(columns={'program': 'name'}))
+    names = candidate_names(df)
+    return lambda: service.get_programs_by_name(names)
+
+
+def _catalog_csv(size: Size) -> Path:
+    if size == 'real':
+        return REAL_CSV
+    tmp = Path(tempfile.mkdtemp(prefix='bench-catalog-'))
+    path = tmp / f'programs_{size}.csv'
+    load_catalog(size).to_csv(path, index=False)
+    return path
+
+
+@benchmark('data_loader.get_df.cold')
+def bench_get_df_cold(size: Size):
+    csv_path = _catalog_csv(size)
+    cache_dir = tempfile.mkdtemp(prefix='bench-cache-')
+    return lambda: DataFrameDB(csv_path, cache_dir=cache_dir).get_df(prefer_cache=False)
+
+
+@benchmark('data_loader.get_df.cached_copy')
+def bench_get_df_cached_copy(size: Size):
+    db = DataFrameDB(_catalog_csv(size), cache_dir=tempfile.mkdtemp(prefix='bench-cache-'))
+    db.get_df(prefer_cache=False)
+    return lambda: db.get_df(copy=True)
+
+
+@benchmark('data_loader.get_df.cached_no_copy')
+def bench_get_df_cached_no_copy(size: Size):
+    db = DataFrameDB(_catalog_csv(size), cache_dir=tempfile.mkdtemp(prefix='bench-cache-'))
+    db.get_df(prefer_cache=False)
+    return lambda: db.get_df(copy=False)
+
+
+@benchmark('user.set_fields')
+def bench_user_set_fields(size: Size):
+    # independent of catalog size; only run once per invocation
+    user = User()
+    return lambda: user.set_fields(USER_FIELDS)
+
+
+@benchmark('user.from_fields')
+def bench_user_from_fields(size: Size):
+    return lambda: User.from_fields(USER_FIELDS)
+
+
+@benchmark('program_matcher.update')
+def bench_program_matcher_update(size: Size):
+    # one stage-A message against the described programs (social_welfare_programs.json)
+    matcher = get_matcher()
+    return lambda: matcher.update({}, 'I lost my job, I have two kids and we need help with food and rent')
+
+
+# Benchmarks whose cost does not depend on the catalog
+SIZE_INDEPENDENT = {'user.set_fields', 'user.from_fields', 'program_matcher.update'}
@@ -0,0 +1,93 @@
+"""Production entry point.
+
+Runs the Flask app under gunicorn (`pip install gunicorn`) with the app,
+the program catalog and its derived lookups loaded in the master process
+before workers are forked, so that read-only data is shared between workers
+copy-on-write. Garbage collection is disabled while preloading and the
+resulting heap is frozen (`gc.freeze`) so collections in the workers never
+touch, and thereby copy, the shared pages.
+
+Usage (from `server/`):
+    python server.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+Every option can also be set through the environment: WEB_CONCURRENCY,
+THREADS, BIND (or PORT), TIMEOUT.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / 'src'
+
+
+def preload():
+    """Import the app (catalog, derived lookups, session store) and freeze the heap."""
+    # The app resolves `services`/`models` and its data files from src/
+    sys.path.insert(0, str(SRC_DIR))
+    os.chdir(SRC_DIR)
+
+    gc.disable()
+    from app import app
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def post_fork(server, worker):
+    # objects allocated from here on belong to this worker alone
+    gc.enable()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run the backend under gunicorn with a preloaded catalog.')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('THREADS', '4')))
+    parser.add_argument('--bind', default=os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}"))
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('TIMEOUT', '120')),
+                        help='seconds before a silent worker is restarted (model calls can be slow)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit('gunicorn is required for the production server: pip install gunicorn') from None
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    # the app sizes per-worker state (each worker's share of the model quota) from these while preloading
+    os.environ['WEB_CONCURRENCY'] = str(args.workers)
+    os.environ['THREADS'] = str(args.threads)
+    application = preload()
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'timeout': args.timeout,
+        'preload_app': True,
+        'post_fork': post_fork,
+    }
+    ProductionServer(application, options).run()
+
+
+if __name__ == '__main__':
+    main()
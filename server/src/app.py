@@ -1,23 +1,42 @@
 import os
-import json
+import re
+import hmac
+import uuid
+import logging
+from contextlib import ExitStack
+from functools import partial
 import pandas as pd
 
 
 from google import genai
 from google.genai import types
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from dotenv import load_dotenv
 from services import stochastic_query
-from services import rank_programs_bot
+from services import ranking_memo
+from services import tracing
+from services import model_client
+from services import session_store
+from services import catalog as catalog_service
+from services import log_config
+from services import program_cards
+from services import candidate_prefetch
+from services import circuit_breaker
+from services import degraded
+from services import program_matcher
+from services import rate_limiter
+from services import structured_output
 from models import user
 
 # APIs
 load_dotenv()
+log_config.setup_logging()
+logger = logging.getLogger("app")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-client = genai.Client(api_key=GOOGLE_API_KEY)
-if "GOOGLE_API_KEY" not in os.environ:
+client = model_client.make_client(api_key=GOOGLE_API_KEY)
+if "GOOGLE_API_KEY" not in os.environ and not model_client.is_fake():
     raise ValueError("FATAL: GOOGLE_API_KEY environment variable not set. Please create a .env file and add your key.")
 
 # Create an instance of the Flask class
@@ -25,32 +44,134 @@ app = Flask(__name__)
 CORS(app)
 
 
-# globla varaible to track STAGE A chats
-with open("data/social_welfare_programs.json", "r") as f:
-    data = json.load(f)
+# Read-only catalog, loaded once per process (before forking under server.py)
+catalog = catalog_service.get_catalog()
+program_cards.get_cards(catalog)  # pre-render the program cards before any request
+ranking_memo.get_memo(catalog)  # loads data/ranking_rules.json; fails fast if malformed
+program_matcher.get_matcher(catalog)  # keyword/phrase index for progressive stage-A results and the degraded mode
+
+## Model calls go through a circuit breaker. While it is open, or when a call fails,
+## the local degraded pipeline answers instead (services/degraded.py)
+model_breaker = circuit_breaker.CircuitBreaker(
+    "model",
+    failure_threshold=float(os.getenv("MODEL_BREAKER_FAILURE_RATE", "0.5")),
+    slow_call_seconds=float(os.getenv("MODEL_BREAKER_SLOW_SECONDS", "10")),
+    open_seconds=float(os.getenv("MODEL_BREAKER_OPEN_SECONDS", "30")),
+)
+
+## Per-model request quota, opt-in via MODEL_RPM (split over the server's worker processes);
+## waiting calls are served COMPLETING > INTERACTIVE > BACKGROUND
+model_quota = rate_limiter.ModelLimiter.from_env()
 
-with open("data/social_links.json", "r") as f:
-    data_link = json.load(f)
+def generate(model, contents, priority=rate_limiter.INTERACTIVE, config=None):
+    """`client.models.generate_content` within the model's quota and through the breaker.
 
-chat_a_history = []
-chat_a_sessions = {}
-chat_a_questions_asked = 0
+    Raises CircuitOpen while the circuit is open (or its half-open probe slots are
+    taken), and QueueFull/QueueTimeout when no quota is available in time.
+    """
+    # reserve the breaker slot first, so a call it would reject never waits for (and spends) quota
+    if not model_breaker.allow():
+        raise circuit_breaker.CircuitOpen("circuit model is open")
+    try:
+        with tracing.span("model.quota_wait", model=model, priority=rate_limiter.priority_name(priority)):
+            model_quota.acquire(model, priority)
+    except BaseException:
+        model_breaker.release()
+        raise
+    return model_breaker.run(client.models.generate_content, model=model, contents=contents, config=config)
+
+def use_fallback(step, exc, span=None, **extra):
+    """Log a failed or skipped model call and mark its span as served by the degraded pipeline."""
+    if span is not None:
+        span["degraded"] = type(exc).__name__
+    logger.warning("%s: no usable model response (%s); using local fallback", step, type(exc).__name__,
+                   exc_info=not isinstance(exc, circuit_breaker.CircuitOpen),
+                   extra={"circuit": model_breaker.state, **extra})
+
+# globla varaible to track STAGE A chats
 chat_a_system = f"""System prompt: You are a social welfare expert who's task is to help users figure out their needs and connect them to as many social welfare programs through natural conversations. 
 Keep answers short and concise. Only ask one question per response. These questions should be broad."""
-chat_a_reference = """Only reference and reconmend wellfare programs from this JSON: """ + json.dumps(data)
+chat_a_reference = """Only reference and reconmend wellfare programs from this JSON: """ + program_cards.get_cards(catalog).reference_json
 chat_a_switch = """Based on your answers, we found the following programs to match your need the most: """
 
-stage_var = "a" ## must be a or b
+## Programs shown with every stage-A reply, from the running keyword match of the user's messages
+PROGRESSIVE_CANDIDATES = int(os.getenv("PROGRESSIVE_CANDIDATES", "5"))
 
 ## Global variables for Stage B
-stage_b_history = ""
-stage_b_potentials = []
-query_user = stochastic_query.query_user()
-stage_b_questions_asked = 0
-programs_df = pd.read_csv("data/All_Programs_Data.csv")
-my_user = user.User()
-emergency = []
+programs_df = catalog.programs_df
 
+## Ranked programs are sent a page at a time; the rest via /api/chat/b/programs
+RANKING_PAGE_SIZE = int(os.getenv("RANKING_PAGE_SIZE", "20"))
+
+## Per-conversation state (stage, histories, partially filled user) lives in
+## the session store so any worker can serve any turn
+sessions = session_store.SessionStore(os.getenv("SESSION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sessions.db")))
+
+## Session ids are issued by POST /api/session and sent back with every turn (X-Session-Id)
+SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+class MissingSessionId(Exception):
+    """The request did not carry a usable session id."""
+
+def get_session_id():
+    """Session key sent by the client.
+
+    Raises MissingSessionId (400) when the request has none, so conversations are never shared.
+    """
+    session_id = request.headers.get("X-Session-Id")
+    if not session_id:
+        session_id = (request.get_json(silent=True) or {}).get("session_id") or request.args.get("session_id")
+    if not session_id or not SESSION_ID.fullmatch(session_id):
+        raise MissingSessionId(session_id)
+    return session_id
+
+def card_response(text, names, **extra):
+    """Chat response with pre-rendered program cards.
+
+    Clients that cache `/api/programs` can send `"cards": "ids"` (or the
+    `X-Card-Mode: ids` header) to receive catalog ids instead of full cards.
+    """
+    mode = request.headers.get("X-Card-Mode") or (request.get_json(silent=True) or {}).get("cards") or request.args.get("cards")
+    body = program_cards.get_cards().render_response(text, names, ids_only=mode == "ids", **extra)
+    return Response(body, mimetype="application/json")
+
+
+
+###################
+## TRACING HOOKS ##
+###################
+
+@app.before_request
+def start_request_trace():
+    stack = ExitStack()
+    g.request_span = stack.enter_context(tracing.span(f"{request.method} {request.path}"))
+    if request.endpoint != "admin_profile":
+        stack.enter_context(tracing.profiler.maybe_profile(label=request.endpoint or "request"))
+    g.request_trace = stack
+
+@app.after_request
+def tag_request_trace(response):
+    if g.get("request_span") is not None:
+        g.request_span["status"] = response.status_code
+    return response
+
+@app.teardown_request
+def end_request_trace(exc):
+    if exc is not None and g.get("request_span") is not None:
+        g.request_span["error"] = type(exc).__name__
+    stack = g.pop("request_trace", None)
+    if stack is not None:
+        stack.close()
+
+@app.errorhandler(session_store.SessionConflict)
+def session_conflict(e):
+    # another request of the same conversation saved first (e.g. a double submit); this turn was not recorded
+    logger.warning("session save conflict", extra={"error": str(e)})
+    return jsonify({"error": "This conversation was updated by another request; please resend your message."}), 409
+
+@app.errorhandler(MissingSessionId)
+def missing_session_id(e):
+    return jsonify({"error": "Session id required: get one from POST /api/session and send it as X-Session-Id."}), 400
 
 
 ###################
@@ -75,127 +196,272 @@ def chat():
     if not input_data or 'text' not in input_data:
         return jsonify({"error": "Invalid request: 'text' key is required"}), 400
     
-    print(f"Received text: {input_data.get('text')}")
+    logger.debug("Received text: %s", input_data.get('text'))
     
     return jsonify({"response": input_data.get('text')})
 
 
+def list_candidates(history, priority=rate_limiter.COMPLETING, fallback=True):
+    """Ask the model for every catalog program that matches a stage-A history.
+
+    With `fallback` False (background prefetches), a failed or skipped model call
+    raises instead of returning the keyword matches, so the transition turn
+    retries inline at its own priority.
+    """
+    # the keyword matches shown during stage A, best first: a hint for the model and the fallback
+    matcher = program_matcher.get_matcher(catalog)
+    pre_ranked = matcher.top(matcher.history_scores(history), degraded.DEFAULT_CANDIDATES)
+    cards = program_cards.get_cards(catalog)
+    with tracing.span("stage_a.candidate_listing", model="gemini-2.5-flash-lite") as listing_span:
+        try:
+            response = generate(
+            priority=priority,
+            model="gemini-2.5-flash-lite", 
+            config=structured_output.schema_config("gemini-2.5-flash-lite", structured_output.CandidatePrograms),
+            contents = """System prompt: You are a social welfare expert who's task is to output a list of social welfare programs that could aid a potential user.
+            You are given 1. the chat history of a users personal situation and 2. a JSON of all possible social welfare programs.
+            Output: the "id" of every social welfare program that would assist the user based on the chat history.\n""" + f"Chat history: {",".join(history)} \n" + f"Keyword matching suggests these ids, best first; start from them and add or drop programs as the chat history warrants: {[cards.ids[name] for name in pre_ranked]} \n" + f"JSON of sources: {chat_a_reference}" 
+            )
+            # ids are checked against the catalog and resolved to exact catalog names
+            return structured_output.parse_candidates(response, cards) or pre_ranked
+        except Exception as e:
+            if not fallback:
+                raise
+            use_fallback("stage_a.candidate_listing", e, listing_span)
+            return pre_ranked
+
+## Candidate lists are prefetched in the background once the stage-A history is final
+## (CANDIDATE_PREFETCH=0 disables this; the transition turn then calls the model inline)
+## A prefetch still waiting for quota is raised to COMPLETING when its transition turn arrives
+CANDIDATE_PREFETCH_WAIT = float(os.getenv("CANDIDATE_PREFETCH_WAIT", "30"))
+candidates = candidate_prefetch.CandidatePrefetcher(list_candidates, background_fetch=partial(list_candidates, fallback=False),
+                                                    enabled=os.getenv("CANDIDATE_PREFETCH", "1") != "0")
+
+
 # Stage a logic
 @app.route('/api/chat/a', methods=['POST'])
 def stage_a_chat():
-    global chat_a_history, chat_a_questions_asked, stage_var, stage_b_potentials, stage_b_history, chat_a_switch, emergency
-
     input_data = request.json
     prompt = input_data.get("text", "")
 
     if not prompt:
         return jsonify({"error": "Prompt is required"}), 400
-    
-    print(chat_a_questions_asked)
-    if chat_a_questions_asked > 5:
-        # 1. prompt chat to get list of programs that would match user needs
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-lite", 
-            contents = """System prompt: You are a social welfare expert who's task is to output a list of social welfare programs that could aid a potential user.
-            You are given 1. the chat history of a users personal situation and 2. a JSON of all possible social welfare programs.
-            Output: Generate only a comma separated python list of all social welfare programs that would assist the user based on the chat history and nothing else.
-            Example Output: ['Supplemental Nutrition Assistance Program (SNAP)', 'Medicaid', 'Supportive Housing for the Elderly (Section 202)', ...] \n""" + f"Chat history: {",".join(chat_a_history)} \n" + f"JSON of sources: {chat_a_reference}" 
-        )
 
-        # 2 convert output into a list
-        output = response.text[1:-1]
-        output = output.split(", ") ## makes a list 
+    with tracing.span("session.load"):
+        conv = sessions.load(get_session_id())
+    
+    logger.debug("stage A turn", extra={"session_id": conv.session_id, "turn": conv.chat_a_questions_asked})
+    if conv.chat_a_questions_asked > 5:
+        # 1-2. list of programs that would match user needs (usually prefetched after the last answer)
+        with tracing.span("stage_a.candidates") as candidates_span:
+            output, prefetched = candidates.get(conv.session_id, conv.chat_a_history, timeout=CANDIDATE_PREFETCH_WAIT)
+            if candidates_span is not None:
+                candidates_span["prefetched"] = prefetched
 
         # 3. change stage flag
-        stage_var = 'b'
-        stage_b_history = ",".join(chat_a_history)
-        stage_b_potentials = output
+        conv.stage = 'b'
+        conv.stage_b_history = ",".join(conv.chat_a_history)
+        conv.stage_b_potentials = output
+        conv.emergency = [program_cards.normalize_name(prog) for prog in output]
+
+        switch_text = chat_a_switch + "\n\n\n Click buttons to view programs in more detail and check elgibility!"
+        logger.info("stage A candidates", extra={"session_id": conv.session_id, "candidates": len(output), "payload": conv.emergency})
+        with tracing.span("session.save"):
+            sessions.save(conv)
 
         # 4. Parse response for frontend
-        pot_progs = []
-        for prog in output:
-            pot_progs.append({"name" : prog.strip("'"),
-                             "description" : data.get(prog.strip("'"), ""),
-                             "link" : data_link.get(prog.strip("'"),"")})
-            
-        chat_a_switch += "\n\n\n Click buttons to view programs in more detail and check elgibility!"
-        print(pot_progs)
-        emergency = pot_progs
-        return jsonify({"text": chat_a_switch, "programs" : pot_progs})
+        with tracing.span("stage_a.render_cards", programs=len(output)):
+            return card_response(switch_text, output)
     
 
-    response = client.models.generate_content(
-        model="gemma-3-27b-it", 
-        contents= "chat history: " + ",".join(chat_a_history) + "\n" + "new prompt: " + prompt + chat_a_system
-    )
+    with tracing.span("stage_a.chat_turn", model="gemma-3-27b-it", turn=conv.chat_a_questions_asked) as turn_span:
+        try:
+            response_text = generate(
+                model="gemma-3-27b-it", 
+                contents= "chat history: " + ",".join(conv.chat_a_history) + "\n" + "new prompt: " + prompt + chat_a_system
+            ).text
+        except Exception as e:
+            use_fallback("stage_a.chat_turn", e, turn_span, session_id=conv.session_id)
+            response_text = degraded.stage_a_question(conv.chat_a_questions_asked)
+
+    # running keyword match over the user's messages so far (no model call)
+    with tracing.span("stage_a.progressive_match"):
+        matcher = program_matcher.get_matcher(catalog)
+        matcher.update(conv.candidate_scores, prompt)
+        top_programs = matcher.top(conv.candidate_scores, PROGRESSIVE_CANDIDATES)
 
     # update chat history
-    chat_a_history.append("user: " + prompt)
-    chat_a_history.append("model: " + response.text)
-    chat_a_questions_asked += 1
+    conv.chat_a_history.append("user: " + prompt)
+    conv.chat_a_history.append("model: " + response_text)
+    conv.chat_a_questions_asked += 1
+    with tracing.span("session.save"):
+        sessions.save(conv)
+
+    # the history is now final: the next turn switches to stage B using it
+    if conv.chat_a_questions_asked > 5:
+        candidates.start(conv.session_id, conv.chat_a_history)
 
-    # return text response
-    return jsonify({"text": response.text.strip(), "programs" : []})
+    # return text response with the current best matches
+    with tracing.span("stage_a.render_cards", programs=len(top_programs)):
+        return card_response(response_text.strip(), top_programs)
 
 
 # Stage B logic
 @app.route('/api/chat/b', methods=['POST'])
 def stage_b_chat():
-    global query_user, stage_b_questions_asked, programs_df, stage_b_potentials, my_user, emergency
-
     input_data = request.json
     answer = input_data.get("text", "")
 
+    with tracing.span("session.load"):
+        conv = sessions.load(get_session_id())
+    query_user = stochastic_query.query_user(conv.remaining_question_groups, conv.stage_b_responses)
+
     # add answer to query user's string context
     query_user.update_responses(f"User: {answer}; ")
 
 
-    if stage_b_questions_asked > 5:
+    if conv.stage_b_questions_asked > 5:
         ## update my user
-        user_fields = ["age", "citizen_or_lawful_resident", "has_permanent_address", "lives_with_people", "monthly_income", "employed", "disabled", "is_veteran", "has_criminal_record", "has_children", "is_refugee"]
         all_user_responses = query_user.get_all_responses()
-        user_fill_response = client.models.generate_content(
-        model="gemini-2.5-flash-lite",
-        contents= f"chat history: {all_user_responses}" + "\n" + f"Fields: {", ".join(user_fields)}" + "\n" + f'Task: create a JSON where every field is a string key that matches to a string value extracted from the chat history. monthly income should be an int (represented with a string), and every other field should be a boolean (represented with a string). Only return this output json and nothing else (example, no ``` or ```json). Do not include an extra headers or symbols that are not the JSON itself. Example output: {{"employed" : "False", "monthly_income" : "100"}}'
-        )
-
-        print(user_fill_response.text)
-        my_user.set_fields(json.loads(user_fill_response.text))
-
-        rank_bot = rank_programs_bot.RankProgramsBot(programs_df, stage_b_potentials, my_user)
-        ranked_programs = rank_bot.rank_programs()
+        with tracing.span("stage_b.extract_fields", model="gemini-2.5-flash-lite") as extract_span:
+            try:
+                user_fill_response = generate(
+            priority=rate_limiter.COMPLETING,
+            model="gemini-2.5-flash-lite",
+            config=structured_output.schema_config("gemini-2.5-flash-lite", user.User),
+            contents= f"chat history: {all_user_responses}" + "\n" + "Task: fill in the user's fields from the chat history. monthly_income is the user's monthly income in dollars and age is in years; every other field is a yes/no answer. Leave a field null if the chat history does not answer it."
+                )
+                logger.debug("stage B extraction", extra={"session_id": conv.session_id, "payload": user_fill_response.text})
+                extracted = structured_output.parse_user_fields(user_fill_response)
+            except Exception as e:
+                use_fallback("stage_b.extract_fields", e, extract_span, session_id=conv.session_id)
+                extracted = degraded.extract_fields(all_user_responses)
+
+        with tracing.span("stage_b.set_fields"):
+            conv.user.set_fields(extracted)
+
+        with tracing.span("stage_b.rank_programs", candidates=len(conv.stage_b_potentials)) as rank_span:
+            # memoized per (candidate set, quantized user); misses show up as a ranking_memo.miss child span
+            page = ranking_memo.get_memo(catalog).rank_page(conv.stage_b_potentials, conv.user, limit=RANKING_PAGE_SIZE)
+            ranked_programs = page.names
+            if rank_span is not None:
+                rank_span["ranked"] = len(ranked_programs)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("stage B user", extra={"session_id": conv.session_id, "payload": conv.user.model_dump()})
+        logger.info("stage B ranking", extra={"session_id": conv.session_id, "ranked": len(ranked_programs), "payload": ranked_programs})
+        f_programs = ranked_programs
+        next_cursor = page.next_cursor
+        if len(f_programs) == 0:
+            f_programs = conv.emergency[:len(conv.emergency)//2]
+            logger.warning("no eligible programs ranked; falling back to stage A candidates",
+                           extra={"session_id": conv.session_id, "payload": conv.stage_b_potentials})
+        conv.stage_b_responses = query_user.get_all_responses()
+        with tracing.span("session.save"):
+            sessions.save(conv)
 
         # 4. Parse response for frontend
-        f_programs = []
-        for prog in ranked_programs:
-            f_programs.append({"name" : prog.strip("'"),
-                             "description" : data.get(prog.strip("'"), ""),
-                             "link" : data_link.get(prog.strip("'"), "")})
-            
-        my_user.print_all_fields()
-        print(f_programs)
-        if len(f_programs) == 0:
-            f_programs = emergency[:len(emergency)//2]
-            print(stage_b_potentials)
-        return jsonify({"text": "Programs are listed in order of elgibility:", "programs": f_programs})
+        with tracing.span("stage_b.render_cards", programs=len(f_programs)):
+            return card_response("Programs are listed in order of elgibility:", f_programs, next_cursor=next_cursor)
 
     # ask next question
-    question = query_user.next_question()
-    print("question", question)
+    with tracing.span("stage_b.next_question", turn=conv.stage_b_questions_asked):
+        question = query_user.next_question()
+    logger.debug("stage B question", extra={"session_id": conv.session_id, "question": question})
 
     # add question to string context
     query_user.update_responses(f"model: {question}; ")
 
-    stage_b_questions_asked += 1
+    conv.stage_b_questions_asked += 1
+    conv.stage_b_responses = query_user.get_all_responses()
+    conv.remaining_question_groups = query_user.remaining
+    with tracing.span("session.save"):
+        sessions.save(conv)
 
     return jsonify({"text": question, "programs": []})
 
     
 
+# further pages of the session's ranked programs (cursor from the previous page)
+@app.route("/api/chat/b/programs", methods=["GET"])
+def stage_b_programs():
+    with tracing.span("session.load"):
+        conv = sessions.load(get_session_id())
+    if conv.stage != "b" or conv.stage_b_questions_asked <= 5:
+        return jsonify({"error": "No ranking yet for this session"}), 409
+    try:
+        limit = int(request.args.get("limit", RANKING_PAGE_SIZE))
+        with tracing.span("stage_b.rank_page"):
+            page = ranking_memo.get_memo(catalog).rank_page(conv.stage_b_potentials, conv.user, limit=limit,
+                                                            cursor=request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with tracing.span("stage_b.render_cards", programs=len(page.names)):
+        return card_response("", page.names, next_cursor=page.next_cursor)
+
+
+# full program catalog for clients that cache cards and request ids only
+@app.route("/api/programs", methods=["GET"])
+def get_programs():
+    cards = program_cards.get_cards()
+    use_gzip = "gzip" in request.accept_encodings
+    # bytes() copies the payload out of the snapshot's shared mapping for this response only
+    response = Response(bytes(cards.catalog_gzip if use_gzip else cards.catalog_body), mimetype="application/json")
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.set_etag(cards.version + ("-gz" if use_gzip else ""))
+    response.last_modified = cards.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+
+def is_admin():
+    admin_token = os.getenv("ADMIN_TOKEN")
+    return bool(admin_token) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), admin_token)
+
+# admin-only profiling toggle: profile the next N requests and dump the stats
+@app.route("/api/admin/profile", methods=["GET", "POST"])
+def admin_profile():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+
+    if request.method == "POST":
+        input_data = request.get_json(silent=True) or {}
+        try:
+            tracing.profiler.arm(int(input_data.get("requests", 1)),
+                                 mode=input_data.get("mode", "cprofile"),
+                                 out_dir=os.getenv("PROFILE_DIR", "profiles"))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+    return jsonify(tracing.profiler.status())
+
+
+# admin-only model quota queue (wait times per priority), circuit and cache counters for this worker
+@app.route("/api/admin/metrics", methods=["GET"])
+def admin_metrics():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "model_quota": model_quota.stats(),
+        "model_circuit": model_breaker.stats(),
+        "candidate_prefetch": candidates.stats(),
+        "ranking_memo": ranking_memo.get_memo(catalog).stats(),
+    })
+
+
+# start a conversation: the client sends the returned id as X-Session-Id with every later request
+@app.route("/api/session", methods=["POST"])
+def new_session():
+    return jsonify({"session_id": uuid.uuid4().hex})
+
+
 # send stage route
 @app.route("/api/stage", methods=["GET"])
 def get_stage():
-    return jsonify({"stage": stage_var})
+    return jsonify({"stage": sessions.load(get_session_id()).stage})
 
 
 
@@ -1,3 +1,4 @@
 from .user import User
 from .chat_session import ChatSession
-from .welfare_program import WelfareProgram
\ No newline at end of file
+from .welfare_program import WelfareProgram
+from .conversation import Conversation
\ No newline at end of file
@@ -1,13 +1,70 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, PlainSerializer
+from typing import Annotated, Iterator, List, Optional
 from .user import User
 
+DEFAULT_MESSAGE_CAPACITY = 50
+
 class ChatMessage(BaseModel):
     sender: str  # 'user' or 'bot'
     message: str
 
+class MessageRing:
+    """Fixed-capacity message history; once full, the oldest message is overwritten.
+
+    Senders are stored one byte per message instead of as per-message objects,
+    so a session's history costs `capacity` string slots plus a bytearray.
+    """
+    __slots__ = ('capacity', '_senders', '_texts', '_start', '_len')
+
+    _SENDER_CODES = {'user': 0, 'bot': 1}
+    _SENDER_NAMES = ('user', 'bot')
+
+    def __init__(self, capacity: int = DEFAULT_MESSAGE_CAPACITY):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self._senders = bytearray(capacity)
+        self._texts: List[Optional[str]] = [None] * capacity
+        self._start = 0
+        self._len = 0
+
+    def append(self, sender: str, message: str) -> None:
+        if sender not in self._SENDER_CODES:
+            raise ValueError(f"sender must be 'user' or 'bot', got {sender!r}")
+        pos = (self._start + self._len) % self.capacity
+        self._senders[pos] = self._SENDER_CODES[sender]
+        self._texts[pos] = message
+        if self._len < self.capacity:
+            self._len += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        for i in range(self._len):
+            pos = (self._start + i) % self.capacity
+            yield ChatMessage.model_construct(sender=self._SENDER_NAMES[self._senders[pos]], message=self._texts[pos])
+
+    def to_list(self) -> List[dict]:
+        return [{"sender": m.sender, "message": m.message} for m in self]
+
+def _to_ring(value):
+    if isinstance(value, MessageRing):
+        return value
+    ring = MessageRing()
+    for m in value or []:
+        m = m if isinstance(m, ChatMessage) else ChatMessage.model_validate(m)
+        ring.append(m.sender, m.message)
+    return ring
+
+MessageHistory = Annotated[MessageRing, BeforeValidator(_to_ring), PlainSerializer(lambda ring: ring.to_list(), return_type=list)]
+
 class ChatSession(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     session_id: str
     user: User
-    messages: List[ChatMessage] = []
-    current_stage: str  # 'intake', 'recommendation', 'eligibility'
\ No newline at end of file
+    messages: MessageHistory = Field(default_factory=MessageRing)
+    current_stage: str  # 'intake', 'recommendation', 'eligibility'
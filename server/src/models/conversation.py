@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from .user import User
+
+class Conversation(BaseModel):
+    """Everything the chat endpoints need to resume a session on any worker."""
+    session_id: str
+    store_version: int = Field(default=0, exclude=True)  # SessionStore row version this state was loaded at
+    stage: str = "a"  # 'a' (needs discovery) or 'b' (eligibility questions)
+
+    # Stage A
+    chat_a_history: List[str] = []
+    chat_a_questions_asked: int = 0
+    candidate_scores: Dict[str, float] = {}  # running lexical match score per program name
+
+    # Stage B
+    stage_b_history: str = ""
+    stage_b_potentials: List[str] = []
+    stage_b_questions_asked: int = 0
+    stage_b_responses: Optional[str] = None  # query_user transcript; None = not started
+    remaining_question_groups: Optional[int] = None  # bitmask over stochastic_query.QUESTION_GROUPS
+    user: User = Field(default_factory=User)
+    emergency: List[str] = []  # stage A candidate names, fallback when ranking finds nothing
@@ -1,3 +1,5 @@
+import math
+import typing
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
@@ -14,39 +16,33 @@ class User(BaseModel):
     has_children: Optional[bool] = None
     is_refugee: Optional[bool] = None
 
-   # Corrected __init__
-    def __init__(self, **kwargs):
-        # This line is crucial! It runs Pydantic's setup.
-        super().__init__(**kwargs) 
-        print("User object initialized!")
-
-    def set_fields(self, json_data: dict):
-        for field_name, value in json_data.items():
-            if field_name in self.__fields__:
-                field_type = type(self.__fields__[field_name])
-                
-                # Handle boolean fields
-                if field_type == bool and isinstance(value, str):
-                    value_lower = value.lower()
-                    if value_lower in {"true", "1", "yes"}:
-                        value = True
-                    elif value_lower in {"false", "0", "no"}:
-                        value = False
-                    else:
-                        # Invalid boolean string, skip or set None
-                        value = None
-
-                # Optionally handle int fields coming as strings
-                if field_type == int and isinstance(value, str):
-                    try:
-                        value = int(value)
-                    except ValueError:
-                        value = None  # invalid int, skip or set None
+    @classmethod
+    def from_fields(cls, json_data: dict) -> "User":
+        """
+        Build a User from loosely typed values (e.g. model-extracted JSON strings),
+        coerced like `set_fields` instead of validated.
 
-                setattr(self, field_name, value)
+        Args:
+            json_data (dict): Field names to values; unknown names are ignored.
+        """
+        user = cls()
+        user.set_fields(json_data)
+        return user
 
+    def set_fields(self, json_data: dict):
+        """
+        Coerce and assign several fields at once.
 
+        Values are converted with the per-field coercers in `FIELD_COERCERS`
+        ("True"/"no" to bool, "1,800" to int, ...); values that cannot be
+        converted become None. Unknown field names are ignored.
 
+        Args:
+            json_data (dict): Field names to values.
+        """
+        values = coerce_fields(json_data)
+        self.__dict__.update(values)
+        self.__pydantic_fields_set__.update(values)
 
     def set_field(self, field_name: str, value) -> None:
         """
@@ -56,8 +52,8 @@ class User(BaseModel):
             field_name (str): The name of the field to set.
             value: The value to assign to the field.
         """
-        if field_name in self.__dict__:
-            setattr(self, field_name, value)
+        if field_name in FIELD_COERCERS:
+            self.set_fields({field_name: value})
 
 
     def print_all_fields(self):
@@ -66,8 +62,63 @@ class User(BaseModel):
         """
         print("User Fields:")
         print("-" * 40)
-        for field_name, field_info in self.__fields__.items():
+        for field_name, field_info in type(self).model_fields.items():
             value = getattr(self, field_name, None)
             field_type = field_info.annotation if hasattr(field_info, 'annotation') else field_info.type_
             print(f"{field_name}: {value} (Type: {field_type})")
-        print("-" * 40)
\ No newline at end of file
+        print("-" * 40)
+
+
+_TRUE_STRINGS = {"true", "1", "yes"}
+_FALSE_STRINGS = {"false", "0", "no"}
+
+
+def _coerce_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value_lower = value.strip().lower()
+        if value_lower in _TRUE_STRINGS:
+            return True
+        if value_lower in _FALSE_STRINGS:
+            return False
+        return None  # invalid boolean string
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    return None
+
+
+def _coerce_int(value):
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    if isinstance(value, str):
+        value = value.strip().lstrip("$").replace(",", "")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None  # invalid int
+    return int(number) if math.isfinite(number) else None
+
+
+def _identity(value):
+    return value
+
+
+def _compile_coercer(annotation):
+    # Optional[X] -> X
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    base = args[0] if len(args) == 1 else annotation
+    if base is bool:
+        return _coerce_bool
+    if base is int:
+        return _coerce_int
+    return _identity
+
+
+# Field name -> coercion function, compiled once from the annotations
+FIELD_COERCERS = {name: _compile_coercer(field.annotation) for name, field in User.model_fields.items()}
+
+
+def coerce_fields(json_data: dict) -> dict:
+    """Coerce known User fields in `json_data`, dropping unknown names."""
+    return {name: FIELD_COERCERS[name](value) for name, value in json_data.items() if name in FIELD_COERCERS}
@@ -0,0 +1,122 @@
+"""Batch eligibility scoring: many users against the whole catalog at once.
+
+`RankProgramsBot` ranks one `User` per instance and copies the catalog each
+time. To re-screen a caseload (e.g. every saved session after a catalog
+update), `BatchScorer` takes a columnar users table and scores the
+users x programs matrix with broadcast NumPy operations
+(`CompiledRules.score_matrix`). Users are processed in chunks so that no
+more than `max_cells` scores are held at once.
+
+Usage:
+    scorer = BatchScorer(catalog.programs_df)
+    users = users_frame(conv.user for conv in conversations)
+    ranked = scorer.rank(users, candidates=[conv.stage_b_potentials for conv in conversations])
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.user import User
+from services import tracing
+from services.ranking_rules import RuleSet, get_rules
+
+USER_FIELDS = list(User.model_fields)
+DEFAULT_MAX_CELLS = 4_000_000  # ~16 MB of int32 scores per chunk
+
+
+def users_frame(users: Iterable[User]) -> pd.DataFrame:
+    """Columnar users table (one column per `User` field) from `User` objects."""
+    return pd.DataFrame([user.model_dump() for user in users], columns=USER_FIELDS)
+
+
+class BatchScorer:
+    """Scores and ranks many users against one catalog."""
+
+    def __init__(self, df: pd.DataFrame, rules: Optional[RuleSet] = None, *, max_cells: int = DEFAULT_MAX_CELLS):
+        """
+        Args:
+            df: The program catalog (program names in the first column).
+            rules: Scoring rules; defaults to data/ranking_rules.json.
+            max_cells: Upper bound on users x programs scores computed per chunk.
+        """
+        self.rules = get_rules() if rules is None else rules
+        self.compiled = self.rules.compile(df)
+        self.names = df.iloc[:, 0].astype(str).to_numpy()
+        self.chunk_users = max(1, max_cells // max(1, len(df)))
+        self._rows: Dict[str, List[int]] = {}
+        for row, name in enumerate(self.names.tolist()):
+            self._rows.setdefault(name, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def score_chunks(self, users: pd.DataFrame) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield `(first user position, users x programs scores)` chunk by chunk."""
+        for start in range(0, len(users), self.chunk_users):
+            chunk = users.iloc[start:start + self.chunk_users]
+            with tracing.span('batch_scoring.chunk', users=len(chunk), programs=len(self.names)):
+                yield start, self.compiled.score_matrix(chunk)
+
+    def _candidate_mask(self, names: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(len(self.names), dtype=bool)
+        for name in {str(x).strip() for x in names}:
+            mask[self._rows.get(name, [])] = True
+        return mask
+
+    def _order(self, scores: np.ndarray, rows: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        # score desc, catalog row asc; the key is unique so partial selection is deterministic
+        keys = -scores[rows].astype(np.int64) * len(scores) + rows
+        if top_k is not None and len(rows) > top_k:
+            part = np.argpartition(keys, top_k - 1)[:top_k]
+            rows, keys = rows[part], keys[part]
+        return rows[np.argsort(keys)]
+
+    @tracing.traced('batch_scoring.rank')
+    def rank(self, users: pd.DataFrame, *, top_k: Optional[int] = None,
+             candidates: Optional[Sequence[Optional[Iterable[str]]]] = None) -> List[List[str]]:
+        """
+        Ranked program names for every user, as `RankProgramsBot.rank_programs` would return them.
+
+        Args:
+            users: Columnar users table (see `users_frame`).
+            top_k: Keep only each user's best `top_k` programs.
+            candidates: Optional per-user program whitelists (None entries = whole catalog).
+
+        Returns:
+            list[list[str]]: One ranked list per user, in input order.
+        """
+        if candidates is not None and len(candidates) != len(users):
+            raise ValueError('candidates must have one entry per user')
+        ranked: List[List[str]] = []
+        for start, scores in self.score_chunks(users):
+            eligible = scores > self.rules.min_score
+            for i in range(len(scores)):
+                keep = eligible[i]
+                if candidates is not None and candidates[start + i] is not None:
+                    keep = keep & self._candidate_mask(candidates[start + i])
+                rows = self._order(scores[i], np.flatnonzero(keep), top_k)
+                ranked.append(self.names[rows].tolist())
+        return ranked
+
+    @tracing.traced('batch_scoring.sparse_scores')
+    def sparse_scores(self, users: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Scores above the rule set's `min_score` in coordinate form.
+
+        Returns:
+            tuple: `(user positions, program rows, scores)` arrays of equal length.
+        """
+        user_idx, program_idx, values = [], [], []
+        for start, scores in self.score_chunks(users):
+            u, p = np.nonzero(scores > self.rules.min_score)
+            user_idx.append(u + start)
+            program_idx.append(p)
+            values.append(scores[u, p])
+        if not values:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        return np.concatenate(user_idx), np.concatenate(program_idx), np.concatenate(values)
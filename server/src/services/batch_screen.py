@@ -0,0 +1,243 @@
+"""Offline batch screening of client profiles (no Flask app involved).
+
+Streams a JSONL or CSV file of profiles in chunks. Each chunk is validated
+into `User` records and ranked against the program catalog
+(`BatchScorer`) in a process pool. Worker processes load the catalog once,
+at start-up. Chunks are written to the output as JSONL as soon as they are
+done, in input order, and at most a few chunks per worker are in flight, so
+memory stays flat for inputs of any size.
+
+Each output line is either
+    {"id": ..., "programs": ["...", ...]}
+or, for a profile that fails validation,
+    {"id": ..., "error": "..."}
+
+A profile's `id` comes from `--id-field` (default "id") or is its 0-based
+position in the input. An optional `--candidates-field` holds the program
+names to restrict that profile's ranking to: a list of strings in JSONL,
+or a JSON list in a CSV cell. An empty value means the whole catalog. A
+malformed value, or a chunk that fails to rank, produces error lines for
+the profiles concerned; the rest of the run continues.
+
+Usage (from `server/src`):
+    python -m services.batch_screen profiles.jsonl -o results.jsonl --workers 8 --top-k 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pydantic import ValidationError
+
+from models.user import User
+from services.batch_scoring import USER_FIELDS, BatchScorer
+from services.catalog import DATA_DIR, Catalog
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def input_format(path: Path, fmt: Optional[str] = None) -> str:
+    return fmt or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+
+
+def read_profiles(path: Path, chunk_size: int, fmt: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of up to `chunk_size` raw profile dicts from a JSONL or CSV file."""
+    if input_format(path, fmt) == 'csv':
+        for frame in pd.read_csv(path, chunksize=chunk_size):
+            yield frame.to_dict('records')
+        return
+
+    chunk: List[Dict[str, Any]] = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {'__error__': f'invalid JSON: {e}'}
+            chunk.append(record if isinstance(record, dict) else {'__error__': 'profile is not a JSON object'})
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(value):
+    # CSV gaps arrive as NaN; treat them like absent fields
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def parse_candidates(value, fmt: str = 'jsonl') -> Optional[List[str]]:
+    """
+    A profile's candidate program names, or None to rank within the whole catalog.
+
+    Args:
+        value: The raw `--candidates-field` value.
+        fmt: Input format; CSV cells hold the list as JSON text.
+
+    Raises:
+        ValueError: The value is not a list of program names.
+    """
+    value = _clean(value)
+    if fmt == 'csv' and isinstance(value, str):
+        if not value.strip():
+            return None
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError('candidates must be a JSON list of program names') from None
+    if value is None or value == []:
+        return None
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError('candidates must be a list of program names')
+    return value
+
+
+def _profile_id(record: Dict[str, Any], position: int, id_field: str):
+    return _clean(record.get(id_field)) if id_field in record else position
+
+
+def _error_line(profile_id, error: str) -> str:
+    return json.dumps({'id': profile_id, 'error': error})
+
+
+_scorer: Optional[BatchScorer] = None
+_options: Dict[str, Any] = {}
+
+
+def _init_worker(data_dir: str, options: Dict[str, Any]) -> None:
+    """Process pool initializer: load the catalog once per worker."""
+    global _scorer, _options
+    _scorer = BatchScorer(Catalog(data_dir).programs_df)
+    _options = options
+
+
+def screen_chunk(start: int, records: List[Dict[str, Any]]) -> List[str]:
+    """Validate and rank one chunk; returns its output JSONL lines in input order."""
+    id_field = _options.get('id_field', 'id')
+    candidates_field = _options.get('candidates_field')
+
+    lines: List[Optional[str]] = [None] * len(records)
+    users, positions, candidates = [], [], []
+    for i, record in enumerate(records):
+        profile_id = _profile_id(record, start + i, id_field)
+        if '__error__' in record:
+            lines[i] = _error_line(profile_id, record['__error__'])
+            continue
+        try:
+            user = User.model_validate({k: _clean(v) for k, v in record.items() if k in USER_FIELDS})
+        except ValidationError as e:
+            errors = '; '.join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            lines[i] = _error_line(profile_id, errors)
+            continue
+        if candidates_field:
+            try:
+                candidates.append(parse_candidates(record.get(candidates_field), _options.get('format', 'jsonl')))
+            except ValueError as e:
+                lines[i] = _error_line(profile_id, f'{candidates_field}: {e}')
+                continue
+        users.append(user.model_dump())
+        positions.append((i, profile_id))
+
+    if users:
+        try:
+            ranked = _scorer.rank(pd.DataFrame(users, columns=USER_FIELDS), top_k=_options.get('top_k'),
+                                  candidates=candidates if candidates_field else None)
+        except Exception as e:
+            ranked = None
+            error = f'ranking failed: {type(e).__name__}: {e}'
+        for n, (i, profile_id) in enumerate(positions):
+            lines[i] = _error_line(profile_id, error) if ranked is None else \
+                json.dumps({'id': profile_id, 'programs': ranked[n]})
+    return lines
+
+
+def screen_file(input_path: Path, output, *, workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                data_dir: Path = DATA_DIR, fmt: Optional[str] = None, **options) -> int:
+    """
+    Screen every profile in `input_path`, writing JSONL results to `output`.
+
+    Args:
+        input_path: JSONL or CSV file of profiles.
+        output: Writable text stream.
+        workers: Number of worker processes.
+        chunk_size: Profiles per task.
+        data_dir: Catalog directory loaded by each worker.
+        fmt: "jsonl" or "csv"; inferred from the extension if None.
+        options: id_field, candidates_field, top_k (see `screen_chunk`).
+
+    Returns:
+        int: Number of profiles processed.
+    """
+    fmt = input_format(input_path, fmt)
+    options = {**options, 'format': fmt}
+    id_field = options.get('id_field') or 'id'
+    max_in_flight = max(2, 2 * workers)
+    pending: Deque[Tuple[int, List[Dict[str, Any]], Future]] = deque()
+    processed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(data_dir), options)) as pool:
+        def drain_one():
+            start, chunk, future = pending.popleft()
+            try:
+                lines = future.result()
+            except Exception as e:
+                # e.g. a worker process died: report the chunk's profiles and keep going
+                error = f'screening failed: {type(e).__name__}: {e}'
+                lines = [_error_line(_profile_id(record, start + i, id_field), error) for i, record in enumerate(chunk)]
+            output.write('\n'.join(lines) + '\n')
+            return len(lines)
+
+        start = 0
+        for chunk in read_profiles(input_path, chunk_size, fmt):
+            if len(pending) >= max_in_flight:
+                processed += drain_one()
+            pending.append((start, chunk, pool.submit(screen_chunk, start, chunk)))
+            start += len(chunk)
+        while pending:
+            processed += drain_one()
+    output.flush()
+    return processed
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Rank program eligibility for a file of client profiles.')
+    parser.add_argument('input', type=Path, help='JSONL or CSV file of profiles (User fields as keys/columns)')
+    parser.add_argument('-o', '--output', type=Path, help='JSONL results file (default: stdout)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='input format (default: from the extension)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--top-k', type=int, default=None, help='keep only the best K programs per profile')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--candidates-field', default=None, help='field holding a list of program names to rank within')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='catalog directory')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count = screen_file(args.input, output, workers=args.workers, chunk_size=args.chunk_size,
+                            data_dir=args.data_dir, fmt=args.format, id_field=args.id_field,
+                            candidates_field=args.candidates_field, top_k=args.top_k)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f'screened {count} profiles in {elapsed:.1f}s ({count / elapsed:.0f}/s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
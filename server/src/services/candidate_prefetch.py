@@ -0,0 +1,134 @@
+"""Background prefetch of the stage-A candidate program list.
+
+The stage switch is the slowest turn of a conversation: it makes the
+"list all matching programs" model call inline. The history that call uses
+is already final once the last stage-A answer has been sent, so the server
+starts the call in a background thread at that point. The transition turn
+then only collects the result.
+
+Predictions are kept per session together with a digest of the history
+they were computed from. If the history has changed by the time the
+transition turn arrives, the prediction is discarded and the list is
+fetched inline. The same happens if the prediction failed or lives in
+another worker process.
+
+Prefetches wait for model quota as BACKGROUND work. A transition turn
+that finds its prefetch not yet started fetches inline at once; one that
+finds it waiting for quota raises it to COMPLETING (the priority of the
+inline call) before waiting for it, so the user never waits behind other
+sessions' speculative work.
+
+Usage:
+    prefetcher = CandidatePrefetcher(list_candidates)
+    prefetcher.start(session_id, history)         # after the final stage-A answer
+    candidates = prefetcher.get(session_id, history)  # on the transition turn
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from services import rate_limiter
+logger = logging.getLogger(__name__)
+
+
+def history_digest(history: Sequence[str]) -> str:
+    return hashlib.blake2b('\x1e'.join(history).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CandidatePrefetcher:
+    """Per-session speculative results of `fetch(history)`."""
+
+    def __init__(self, fetch: Callable[[List[str]], List[str]], *, background_fetch: Optional[Callable[[List[str]], List[str]]] = None,
+                 max_workers: int = 4, max_entries: int = 1000, enabled: bool = True):
+        """
+        Args:
+            fetch: Computes the candidate list for a stage-A history.
+            background_fetch: Used instead of `fetch` for prefetches; called as
+                `background_fetch(history, priority=ticket)` with a `rate_limiter.Ticket`
+                that starts at BACKGROUND.
+            max_workers: Background threads making prefetch calls.
+            max_entries: Sessions with a pending or finished prediction; the oldest is dropped beyond this.
+            enabled: If False, `start` does nothing and `get` always fetches inline.
+        """
+        self.fetch = fetch
+        self.background_fetch = background_fetch or (lambda history, priority: fetch(history))
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[str, Future, rate_limiter.Ticket]] = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None  # created on first use, i.e. after any fork
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, session_id: str, history: Sequence[str]) -> None:
+        """Begin computing the candidates for `history` in the background."""
+        if not self.enabled:
+            return
+        history = list(history)
+        digest = history_digest(history)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[0] == digest:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='candidate-prefetch')
+            if entry is not None:
+                entry[1].cancel()
+            ticket = rate_limiter.Ticket(rate_limiter.BACKGROUND)
+            self._entries[session_id] = (digest, self._executor.submit(self.background_fetch, history, priority=ticket), ticket)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                _, (_, stale, _) = self._entries.popitem(last=False)
+                stale.cancel()
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def get(self, session_id: str, history: Sequence[str], timeout: Optional[float] = None) -> Tuple[List[str], bool]:
+        """
+        The candidates for `history`, from the prefetch if it matches.
+
+        Args:
+            session_id: The conversation.
+            history: The stage-A history the transition turn is using.
+            timeout: Seconds to wait for a started prefetch before fetching inline.
+
+        Returns:
+            tuple: (candidate list, whether it came from the prefetch).
+        """
+        history = list(history)
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            digest, future, ticket = entry
+            if digest != history_digest(history):
+                future.cancel()
+            elif future.cancel():
+                pass  # not started yet (all prefetch threads busy): fetch inline rather than queue behind them
+            else:
+                ticket.raise_to(rate_limiter.COMPLETING)
+                try:
+                    result = future.result(timeout=timeout)
+                    with self._lock:
+                        self.hits += 1
+                    return list(result), True
+                except Exception:
+                    logger.warning('candidate prefetch failed; fetching inline', exc_info=True,
+                                   extra={'session_id': session_id})
+        with self._lock:
+            self.misses += 1
+        return self.fetch(history), False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
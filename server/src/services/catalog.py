@@ -0,0 +1,72 @@
+"""Read-only program catalog and the lookups derived from it.
+
+The catalog (eligibility CSV, description JSON, link JSON) and everything
+derived from it are built once per process by `get_catalog()`. The
+production server calls it in the master process before forking, so
+workers share these pages copy-on-write instead of each loading its own
+copy. Treat every attribute as immutable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from services import tracing
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+CSV_NAME = 'All_Programs_Data.csv'
+DESCRIPTIONS_NAME = 'social_welfare_programs.json'
+LINKS_NAME = 'social_links.json'
+
+
+def content_hash(paths: List[Path]) -> str:
+    """Hash of the source files' bytes; changes whenever the catalog does."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.name.encode('utf-8'))
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+class Catalog:
+    """The program catalog plus derived, read-only lookups."""
+
+    @tracing.traced('catalog.load')
+    def __init__(self, data_dir: str | Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.source_paths = [self.data_dir / CSV_NAME, self.data_dir / DESCRIPTIONS_NAME, self.data_dir / LINKS_NAME]
+        self.version = content_hash(self.source_paths)
+
+        self.programs_df: pd.DataFrame = pd.read_csv(self.source_paths[0])
+        with open(self.source_paths[1], 'r', encoding='utf-8') as f:
+            self.descriptions: Dict[str, str] = json.load(f)
+        with open(self.source_paths[2], 'r', encoding='utf-8') as f:
+            self.links: Dict[str, str] = json.load(f)
+
+        # Derived lookups
+        self.reference_json: str = json.dumps(self.descriptions)
+        self.program_names: List[str] = self.programs_df.iloc[:, 0].astype(str).tolist()
+        self.program_index: Dict[str, int] = {name: i for i, name in enumerate(self.program_names)}
+
+    def __len__(self) -> int:
+        return len(self.program_names)
+
+
+_catalog: Optional[Catalog] = None
+_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Return the process-wide catalog, loading it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                _catalog = Catalog()
+    return _catalog
@@ -1,6 +1,11 @@
 import os
+import logging
 from google import genai
 
+from services.session_cache import BoundedSessionCache
+
+logger = logging.getLogger(__name__)
+
 # --- 1. API Key Configuration ---
 # Load the API key from an environment variable for security.
 api_key = os.getenv("GOOGLE_API_KEY")
@@ -13,22 +18,41 @@ class Chatbot:
     """
     A class to encapsulate the Gemini model and manage chat sessions.
     """
-    def __init__(self, model_name='gemini-1.5-flash'):
-        """Initializes the chatbot model and session storage."""
+    def __init__(self, model_name='gemini-1.5-flash', *, max_sessions=1000, idle_ttl=1800.0, max_history=40, spill_dir=None):
+        """Initializes the chatbot model and session storage.
+
+        Args:
+            model_name: Gemini model to chat with.
+            max_sessions: Maximum number of chat sessions kept in memory.
+            idle_ttl: Seconds of inactivity after which a session is evicted.
+            max_history: Messages of history kept per session (older ones are dropped).
+            spill_dir: Directory evicted sessions are written to; they are restored
+                on the next message. If None, evicted sessions start over.
+        """
         # Initialize the generative model with a system instruction
         self.model = genai.GenerativeModel(
             model_name=model_name,
             system_instruction='You are a helpful and friendly chatbot. Provide clear and concise answers.'
         )
-        # In-memory storage for active chat sessions {session_id: chat_object}
-        # Note: This is for demonstration. For production, you'd use a database
-        # or a more persistent cache like Redis.
-        self.sessions = {}
-
-    def start_new_session(self):
-        """Starts a new chat session with the model."""
+        self.max_history = max_history
+        # Bounded storage for active chat sessions {session_id: chat_object};
+        # evicted sessions are spilled as (role, text) pairs and rebuilt on demand.
+        self.sessions = BoundedSessionCache(max_resident=max_sessions, idle_ttl=idle_ttl, spill_dir=spill_dir,
+                                            dump=self._dump_history, load=self.start_new_session)
+
+    def start_new_session(self, history=None):
+        """Starts a new chat session with the model, optionally from (role, text) pairs."""
         # The history is managed by the chat object itself after starting.
-        return self.model.start_chat(history=[])
+        history = [{'role': role, 'parts': [text]} for role, text in (history or [])]
+        return self.model.start_chat(history=history)
+
+    def _dump_history(self, chat_session):
+        """Compact (role, text) pairs for the most recent `max_history` messages."""
+        pairs = []
+        for content in chat_session.history[-self.max_history:]:
+            text = ''.join(getattr(part, 'text', '') or '' for part in content.parts)
+            pairs.append((content.role, text))
+        return pairs
 
     def chat(self, session_id: str, prompt: str) -> str:
         """
@@ -41,16 +65,19 @@ class Chatbot:
         Returns:
             The model's text response.
         """
-        # Get the chat session for the given ID, or create a new one if it doesn't exist.
-        if session_id not in self.sessions:
-            print(f"Starting new session for ID: {session_id}")
-            self.sessions[session_id] = self.start_new_session()
-        
-        # Get the specific chat session
-        chat_session = self.sessions[session_id]
+        # Get the chat session for the given ID (reloading it if it was spilled),
+        # or create a new one if it doesn't exist.
+        chat_session = self.sessions.get(session_id)
+        if chat_session is None:
+            logger.info("Starting new session for ID: %s", session_id)
+            chat_session = self.sessions.put(session_id, self.start_new_session())
         
         # Send the user's prompt to the model
         response = chat_session.send_message(prompt)
+
+        # Keep per-session memory bounded: restart long chats from their recent history
+        if len(chat_session.history) > 2 * self.max_history:
+            self.sessions.put(session_id, self.start_new_session(self._dump_history(chat_session)))
         
         return response.text
 
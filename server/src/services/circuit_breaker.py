@@ -0,0 +1,157 @@
+"""Circuit breaker for model provider calls.
+
+The breaker watches the outcome of the last `window` calls. A call counts
+as bad if it raised or took longer than `slow_call_seconds`. Once at least
+`min_calls` outcomes are recorded and the bad fraction reaches
+`failure_threshold`, the circuit opens. While it is open, `call` raises
+`CircuitOpen` at once instead of waiting on the provider, and the app
+serves the local degraded pipeline (`services.degraded`).
+
+After `open_seconds` the circuit is half-open. It lets up to
+`half_open_probes` calls through; the first good probe closes it and a bad
+one re-opens it for another `open_seconds`.
+
+Usage:
+    breaker = CircuitBreaker('model')
+    try:
+        response = breaker.call(client.models.generate_content, model=..., contents=...)
+    except Exception:
+        ...  # CircuitOpen or the provider's own error: use the local fallback
+
+A caller that must do more work between admission and the call (such as
+waiting for quota) uses `allow()`, then `run(fn, ...)`. If it gives up
+before calling, it uses `release()`, so that it does not hold a half-open
+probe slot.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling the provider while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Error-rate and latency based circuit breaker; safe to share between threads."""
+
+    def __init__(self, name: str, *, window: int = 20, min_calls: int = 5, failure_threshold: float = 0.5,
+                 slow_call_seconds: float = 10.0, open_seconds: float = 30.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name: Used in log messages.
+            window: Number of recent call outcomes considered.
+            min_calls: Outcomes needed before the circuit can open.
+            failure_threshold: Fraction of bad outcomes in the window that opens the circuit.
+            slow_call_seconds: Successful calls slower than this count as bad.
+            open_seconds: Time the circuit stays open before probing.
+            half_open_probes: Concurrent probe calls allowed while half-open.
+            clock: Monotonic time source.
+        """
+        if not 0 < failure_threshold <= 1:
+            raise ValueError('failure_threshold must be in (0, 1]')
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = bad
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _open(self) -> None:
+        if self._state != OPEN:
+            logger.warning('circuit %s opened', self.name)
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now (reserves a probe slot when half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, elapsed: float = 0.0) -> None:
+        """Record the outcome of a call admitted by `allow`."""
+        bad = not ok or elapsed > self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if bad:
+                    self._open()
+                else:
+                    logger.info('circuit %s closed', self.name)
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if state == OPEN:
+                return  # a call admitted before the circuit opened
+            self._outcomes.append(bad)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) >= self.failure_threshold * len(self._outcomes):
+                self._open()
+
+    def release(self) -> None:
+        """Give back a slot reserved by `allow` when no call is made after all (e.g. no quota)."""
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Call `fn` through the breaker; raises `CircuitOpen` without calling it while open."""
+        if not self.allow():
+            raise CircuitOpen(f'circuit {self.name} is open')
+        return self.run(fn, *args, **kwargs)
+
+    def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Call `fn`, already admitted by `allow`, and record its outcome."""
+        started = self.clock()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self.record(False, self.clock() - started)
+            raise
+        self.record(True, self.clock() - started)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'state': self._current_state(), 'recent_calls': len(self._outcomes),
+                    'recent_bad': sum(self._outcomes), 'rejected': self.rejected}
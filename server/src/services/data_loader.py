@@ -25,6 +25,8 @@ import logging
 
 import pandas as pd
 
+from services import tracing
+
 logger = logging.getLogger(__name__)
 
 
@@ -108,6 +110,7 @@ class DataFrameDB:
         self._df = df
         return df
 
+    @tracing.traced("data_loader.get_df")
     def get_df(self, *, prefer_cache: bool = True, dtype_map: Optional[Dict[str, str]] = None, parse_dates: Optional[list[str]] = None, copy: bool = True) -> pd.DataFrame:
         """Return the loaded DataFrame. If not loaded, try parquet cache then CSV.
 
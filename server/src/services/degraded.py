@@ -0,0 +1,89 @@
+"""Local stand-ins for the model calls, served while the model circuit is open.
+
+Each stage of a conversation has a local equivalent that needs no provider:
+
+- stage-A turns ask from a fixed list of broad questions (`stage_a_question`);
+- stage-A candidates are the keyword matches of the user's messages
+  (`program_matcher`), i.e. the programs already shown during stage A;
+- stage-B questions already come from the `stochastic_query` bank;
+- stage-B field extraction reads yes/no and numeric answers out of the
+  transcript, using the question bank to tell which field each question asked
+  (`extract_fields`);
+- ranking is the same vectorized rule scoring as always.
+
+Answers are rougher than the model's, but they are computed in microseconds,
+so response times stay bounded while the provider is down.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from services.question_bank import QuestionBank, get_question_bank
+
+STAGE_A_QUESTIONS = [
+    "Can you tell me a bit more about your living situation?",
+    "How are you currently covering your basic expenses like food and rent?",
+    "Is anyone else in your household depending on you?",
+    "Are you dealing with any health concerns right now?",
+    "Are you working at the moment, or looking for work?",
+    "What would help you most in the coming months?",
+]
+
+DEFAULT_CANDIDATES = 8
+NUMERIC_FIELDS = ('age', 'monthly_income')
+
+
+def stage_a_question(turn: int) -> str:
+    return STAGE_A_QUESTIONS[turn % len(STAGE_A_QUESTIONS)]
+
+
+_YES = re.compile(r"\b(yes|yeah|yep|yup|sure|correct|true|i do|i am|i have|i did|i was)\b")
+_NO = re.compile(r"\b(no|nope|not|never|none|false|don'?t|doesn'?t|didn'?t|haven'?t|hasn'?t|am not|aren'?t|isn'?t|wasn'?t)\b")
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_TURN = re.compile(r"(Question|model|User): ")
+
+
+def parse_answer(answer: str, numeric: bool):
+    """A yes/no answer as a bool, or the first number in a numeric answer; None if unclear."""
+    answer = answer.lower()
+    if numeric:
+        m = _NUMBER.search(answer)
+        return int(float(m.group(0).replace(',', ''))) if m else None
+    if _NO.search(answer):
+        return False  # "yes, but not anymore" is more often a no
+    if _YES.search(answer):
+        return True
+    return None
+
+
+def extract_fields(transcript: str, bank: Optional[QuestionBank] = None) -> dict:
+    """
+    Rule-based version of the stage-B extraction prompt.
+
+    Args:
+        transcript: `query_user` responses ("Question: ...User: ...; model: ...; User: ...; ").
+        bank: Maps each asked question back to its field.
+
+    Returns:
+        dict: Field name -> bool/int, for the questions whose answers could be read.
+    """
+    bank = bank or get_question_bank()
+    asked = bank.question_fields()
+    parts = _TURN.split(transcript)
+    fields = {}
+    question = None
+    # parts = [prefix, speaker, text, speaker, text, ...]
+    for speaker, text in zip(parts[1::2], parts[2::2]):
+        text = text.strip().rstrip(';').strip()
+        if speaker == 'User':
+            field = asked.get(question) if question else None
+            if field is not None:
+                value = parse_answer(text, numeric=field in NUMERIC_FIELDS)
+                if value is not None:
+                    fields[field] = value
+            question = None
+        else:
+            question = text
+    return fields
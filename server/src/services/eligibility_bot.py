@@ -1,10 +1,13 @@
-import eligibility_optimizer
+from services import eligibility_optimizer
+from services import question_bank
+from services import structured_output
+from services import tracing
 import pandas as pd
 import numpy as np
 import os
 from google import genai
 from dotenv import load_dotenv
-from src.models.user import User
+from models.user import User
 
 class WelfareProgramEligibilityBot:
     """
@@ -28,6 +31,8 @@ class WelfareProgramEligibilityBot:
         self.program_blacklist = []
         self.field_blacklist = []
         self.user = User()
+        self.questions = question_bank.get_question_bank()
+        self.last_question_field = None
 
         # If optimizer not provided, construct it with the provided df/path
         if optimizer is not None:
@@ -103,6 +108,23 @@ class WelfareProgramEligibilityBot:
 
         return None
 
+    def rule_out_by_ranges(self, user: User = None) -> list:
+        """
+        Add programs the user is out of age or income range for to `program_blacklist`.
+
+        Args:
+            user (User): The user to check; defaults to the bot's own user.
+
+        Returns:
+            list: The programs newly added to the blacklist.
+        """
+        user = self.user if user is None else user
+        excluded = self.optimizer.programs_outside_ranges(age=user.age, monthly_income=user.monthly_income)
+        known = set(self.program_blacklist)
+        added = [name for name in excluded if name not in known]
+        self.program_blacklist.extend(added)
+        return added
+
     def parse_user_from_transcript(self, transcript: str) -> None:
         """
         Parse an aggregated transcript string using Gemma and populate the instance's User object.
@@ -146,17 +168,10 @@ class WelfareProgramEligibilityBot:
         client = genai.Client(api_key=GEMINI_API_KEY)
 
         try:
-            resp = client.models.generate_content(model="gemma-3-27b-it", contents=prompt)
-            text = getattr(resp, "text", str(resp)).strip()
-
-            # Extract first JSON object
-            import json, re
-
-            m = re.search(r"\{[\s\S]*\}", text)
-            if not m:
-                return
-
-            parsed = json.loads(m.group(0))
+            resp = client.models.generate_content(model="gemma-3-27b-it", contents=prompt,
+                                                  config=structured_output.schema_config("gemma-3-27b-it", User))
+            # Known fields with a usable value, already coerced to their types
+            parsed = structured_output.parse_user_fields(resp)
 
             # Populate User fields using set_field and collect populated keys
             populated_keys = []
@@ -187,6 +202,7 @@ class WelfareProgramEligibilityBot:
             # On any error, return without modification
             return
 
+    @tracing.traced("eligibility_bot.get_next_field")
     def get_next_field(self, field_blacklist=None, program_blacklist=None):
         """
         Determines the next best field to ask about based on current blacklists.
@@ -222,10 +238,12 @@ class WelfareProgramEligibilityBot:
 
     def ask_next_field_with_gemma(self, field_blacklist=None, program_blacklist=None):
         """
-        Use the Gemma model to produce a concise, user-facing question that asks
-        for the value of the next-most-informative field.
+        Produce a concise, user-facing question that asks for the value of the
+        next-most-informative field.
 
-        This reuses the project's Gemma/GenAI call pattern (same as in `app.py`).
+        The question is taken from the pre-built phrasing bank
+        (`services.question_bank`), so no model call is made. The field it asks
+        about is kept in `self.last_question_field`.
 
         Returns:
             str | None: A short question string suitable for presenting to the user,
@@ -236,6 +254,11 @@ class WelfareProgramEligibilityBot:
         if program_blacklist is None:
             program_blacklist = []
 
+        # Programs the known age/income already rule out need no questions to tell them apart
+        ruled_out = self.optimizer.programs_outside_ranges(age=self.user.age, monthly_income=self.user.monthly_income)
+        if ruled_out:
+            program_blacklist = list(dict.fromkeys([*program_blacklist, *ruled_out]))
+
         # Prefer using the optimizer's top field(s) if available
         try:
             top_fields = self.optimizer.get_next_fields(field_blacklist, program_blacklist, top_n=1)
@@ -245,34 +268,15 @@ class WelfareProgramEligibilityBot:
             top_fields = [next_field] if next_field else []
 
         if not top_fields:
+            self.last_question_field = None
             return None
 
         field = top_fields[0]
+        self.last_question_field = field
 
-        # Craft a short prompt asking for that field
-        prompt = (
-            f"Please write a concise, user-facing question to collect the user's '{field}' value. "
-            "Keep the question short and easy to answer (one sentence)."
-        )
-
-        # Load environment and call Gemma (same pattern as app.py)
-        load_dotenv()
-        GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-        if not GEMINI_API_KEY:
-            # If API key is not available, return the raw prompt as a fallback question
-            return f"What is your {field}?"
-        client = genai.Client(api_key=GEMINI_API_KEY)
-
-        try:
-            response = client.models.generate_content(
-                model="gemma-3-27b-it",
-                contents=prompt,
-            )
-            # response.text is used elsewhere in the project
-            return getattr(response, "text", str(response)).strip()
-        except Exception:
-            # On any error, return a simple fallback question
-            return f"What is your {field}?"
+        # Numeric fields are asked as a threshold question chosen by the optimizer
+        threshold = self.optimizer.splits.get(field) if field in self.optimizer.numeric_fields else None
+        return self.questions.question(field, threshold)
 
     def ask_questions(self, field_blacklist=None, program_blacklist=None, num_questions: int = 4):
         """
@@ -338,15 +342,18 @@ class WelfareProgramEligibilityBot:
 
             running_answers += f"Q: {question}\nA: {user_answer}\n"
 
-            # Attempt to infer the field name from the question text
-            inferred_field = None
-            if "'" in question:
-                start = question.find("'")
-                end = question.find("'", start+1)
-                if start != -1 and end != -1:
-                    inferred_field = question[start+1:end]
-            elif question.lower().startswith("what is your "):
-                inferred_field = question[len("what is your "):].strip(' ?')
+            # The field just asked, or else try to infer it from the question text
+            inferred_field = self.last_question_field
+            if not inferred_field:
+                if "'" in question:
+                    start = question.find("'")
+                    end = question.find("'", start+1)
+                    if start != -1 and end != -1:
+                        inferred_field = question[start+1:end]
+                elif question.lower().startswith("what is your "):
+                    inferred_field = question[len("what is your "):].strip(' ?')
+                elif question.lower().startswith("is your ") and " at most " in question:
+                    inferred_field = question[len("is your "):].split(" at most ")[0].strip()
 
             if inferred_field:
                 field_blacklist.append(inferred_field)
@@ -389,23 +396,14 @@ class WelfareProgramEligibilityBot:
 
         client = genai.Client(api_key=GEMINI_API_KEY)
         try:
-            resp = client.models.generate_content(model="gemma-3-27b-it", contents=populate_prompt)
-            text = getattr(resp, "text", str(resp)).strip()
-
-            # Attempt to parse a JSON substring from the response
-            import json, re
+            resp = client.models.generate_content(model="gemma-3-27b-it", contents=populate_prompt,
+                                                  config=structured_output.schema_config("gemma-3-27b-it", User))
+            parsed = structured_output.parse_user_fields(resp)
 
-            json_text = None
-            # Find the first { ... } block
-            m = re.search(r"\{[\s\S]*\}", text)
-            if m:
-                json_text = m.group(0)
-
-            if json_text:
-                parsed = json.loads(json_text)
+            if parsed:
                 # Normalize keys and map to only the expected keys
                 for k, v in parsed.items():
-                    if k in target_fields and v is not None and v != "":
+                    if k in target_fields:
                         populated[k] = v
                         # Update instance User object using set_field where possible
                         try:
@@ -416,4 +414,7 @@ class WelfareProgramEligibilityBot:
                             pass
         except Exception:
             # On error, return without modification
-            return
\ No newline at end of file
+            return
+
+        # The new age/income may rule programs out for the next round of questions
+        self.rule_out_by_ranges()
\ No newline at end of file
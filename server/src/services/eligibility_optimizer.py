@@ -1,6 +1,55 @@
 import pandas as pd
 import numpy as np
 
+from services import index_snapshot
+from services import tracing
+from services.catalog import get_catalog
+from services.range_index import IntervalIndex, ThresholdIndex
+
+
+class FieldStatistics:
+    """
+    Known values of each numeric (non-boolean) catalog column, pre-sorted.
+
+    Depends only on the catalog, so it is kept in the index snapshot and
+    shared by every optimizer built over the catalog (see `get_field_statistics`).
+    """
+
+    SNAPSHOT_NAME = 'optimizer_fields'
+    SNAPSHOT_FORMAT = 1
+
+    def __init__(self, df: pd.DataFrame):
+        self.numeric_fields = {
+            field for field in df.columns
+            if pd.api.types.is_numeric_dtype(df[field]) and not pd.api.types.is_bool_dtype(df[field])
+        }
+        self.sorted_values = {}  # field -> (row positions, values), ascending by value
+        for field in self.numeric_fields:
+            values = df[field].to_numpy(dtype=float)
+            order = np.flatnonzero(~np.isnan(values))
+            order = order[np.argsort(values[order], kind='stable')]
+            self.sorted_values[field] = (order, values[order])
+
+    def to_snapshot(self):
+        fields = sorted(self.numeric_fields)
+        arrays = {}
+        for i, field in enumerate(fields):
+            arrays[f'order_{i}'], arrays[f'values_{i}'] = self.sorted_values[field]
+        return {'fields': fields}, arrays
+
+    @classmethod
+    def from_snapshot(cls, catalog, meta: dict, arrays: dict) -> 'FieldStatistics':
+        stats = cls.__new__(cls)
+        stats.numeric_fields = set(meta['fields'])
+        stats.sorted_values = {field: (arrays[f'order_{i}'], arrays[f'values_{i}']) for i, field in enumerate(meta['fields'])}
+        return stats
+
+
+def get_field_statistics(catalog=None) -> FieldStatistics:
+    """Field statistics of the catalog's programs, from the index snapshot when it is current."""
+    catalog = catalog or get_catalog()
+    return index_snapshot.load(catalog, FieldStatistics, lambda: FieldStatistics(catalog.programs_df))
+
 
 class WelfareProgramEligibilityOptimizer:
     """
@@ -8,7 +57,8 @@ class WelfareProgramEligibilityOptimizer:
     for social welfare programs.
     """
 
-    def __init__(self, eligibility_data_path: str = None, field_weights=None, df: pd.DataFrame = None):
+    def __init__(self, eligibility_data_path: str = None, field_weights=None, df: pd.DataFrame = None,
+                 field_statistics: FieldStatistics = None):
         """
         Initializes the optimizer with eligibility data and optional field weights.
 
@@ -18,6 +68,8 @@ class WelfareProgramEligibilityOptimizer:
             df (pd.DataFrame): Optional DataFrame to use directly instead of reading CSV.
             field_weights (dict): A dictionary mapping field names to weights (float).
             If None, all fields have a weight of 1.0.
+            field_statistics (FieldStatistics): Precomputed statistics for the same rows
+                (e.g. `get_field_statistics()` for the catalog); computed from the data if None.
         """
         if df is not None:
             self.df = df.copy()
@@ -33,6 +85,20 @@ class WelfareProgramEligibilityOptimizer:
         # Store all fields (columns)
         self.all_fields = set(self.df.columns)
 
+        # Sorted indexes over the numeric range columns, built on first use
+        self._age_index = None
+        self._income_index = None
+
+        # Numeric fields (ages, income caps) are asked as threshold questions
+        # ("is it at most t?"); keep each one's known values pre-sorted so the
+        # best threshold is one pass over prefix counts
+        if field_statistics is None:
+            field_statistics = FieldStatistics(self.df)
+        self.numeric_fields = field_statistics.numeric_fields
+        self._sorted_values = field_statistics.sorted_values
+        self.splits = {}  # field -> best threshold from the latest information gain calculation
+        self._remaining = (None, None)  # (filtered_df, mask over self.df rows) for the latest call
+
         # Set default weights if none provided
         if field_weights is None:
             self.field_weights = {
@@ -81,6 +147,74 @@ class WelfareProgramEligibilityOptimizer:
 
         return filtered_df
 
+    def programs_outside_ranges(self, age=None, monthly_income=None):
+        """
+        Finds the programs a user cannot qualify for because of their age or income.
+
+        Uses sorted indexes over `min_age`/`max_age` and `max_monthly_income`, so
+        the lookup costs O(log n + k) for k excluded programs. Programs with a
+        missing bound are never excluded.
+
+        Args:
+            age (int): The user's age, or None if unknown.
+            monthly_income (int): The user's monthly income, or None if unknown.
+
+        Returns:
+            list: Program names (index values) that are out of range.
+        """
+        rows = []
+        if age is not None and {'min_age', 'max_age'} <= self.all_fields:
+            if self._age_index is None:
+                self._age_index = IntervalIndex(self.df['min_age'], self.df['max_age'])
+            rows.append(self._age_index.excluding(age))
+        if monthly_income is not None and 'max_monthly_income' in self.all_fields:
+            if self._income_index is None:
+                self._income_index = ThresholdIndex(self.df['max_monthly_income'])
+            rows.append(self._income_index.less(monthly_income))
+        if not rows:
+            return []
+        return self.df.index[np.unique(np.concatenate(rows))].tolist()
+
+    def _remaining_mask(self, filtered_df):
+        """Boolean mask over `self.df` rows of the programs still in `filtered_df`."""
+        cached_df, mask = self._remaining
+        if cached_df is not filtered_df:
+            mask = self.df.index.isin(filtered_df.index)
+            self._remaining = (filtered_df, mask)
+        return mask
+
+    def _numeric_split(self, filtered_df, field):
+        """
+        Finds the threshold question `field <= t` that best divides the remaining programs.
+
+        Args:
+            filtered_df (pd.DataFrame): The current dataframe after applying blacklists.
+            field (str): A numeric field.
+
+        Returns:
+            tuple: (threshold, largest answer group) or (None, 0) if no threshold separates them.
+        """
+        order, values = self._sorted_values[field]
+        if len(values) == 0:
+            return None, 0
+        if len(filtered_df) == len(self.df):
+            in_play = np.ones(len(order), dtype=np.int64)
+        else:
+            in_play = self._remaining_mask(filtered_df)[order].astype(np.int64)
+
+        # remaining programs with a value <= values[i]
+        prefix = np.cumsum(in_play)
+        known = int(prefix[-1])
+        # candidate thresholds are the distinct values; use the last position of each
+        last = np.flatnonzero(np.append(values[1:] != values[:-1], True))
+        at_most = prefix[last]
+        largest = np.maximum(at_most, known - at_most)
+        valid = (at_most > 0) & (at_most < known)
+        if not valid.any():
+            return None, 0
+        best = np.flatnonzero(valid)[np.argmin(largest[valid])]
+        return float(values[last[best]]), int(largest[best])
+
     def _calculate_information_gain(self, filtered_df, candidate_field):
         """
         Calculates a score representing the information gain for a candidate field.
@@ -96,6 +230,9 @@ class WelfareProgramEligibilityOptimizer:
         if candidate_field not in filtered_df.columns:
             return 0
 
+        if candidate_field in self.numeric_fields:
+            return self._calculate_split_gain(filtered_df, candidate_field)
+
         # Get unique, non-null values in this field for the remaining programs
         unique_values = filtered_df[candidate_field].dropna().unique()
 
@@ -128,6 +265,34 @@ class WelfareProgramEligibilityOptimizer:
 
         return final_score
 
+    def _calculate_split_gain(self, filtered_df, candidate_field):
+        """
+        Information gain of the best threshold question on a numeric field.
+
+        Scored like a yes/no field whose answer groups are the programs at or
+        below the threshold, those above it, and those with no value.
+
+        Args:
+            filtered_df (pd.DataFrame): The current dataframe after applying blacklists.
+            candidate_field (str): The numeric field to evaluate.
+
+        Returns:
+            float: The information gain score.
+        """
+        total_programs = len(filtered_df)
+        threshold, largest = self._numeric_split(filtered_df, candidate_field)
+        if threshold is None or total_programs == 0:
+            return 0
+        self.splits[candidate_field] = threshold
+
+        missing = int(filtered_df[candidate_field].isna().sum())
+        max_in_single_group = max(largest, missing)
+        normalized_score = (total_programs - max_in_single_group) / total_programs
+
+        # a threshold question always has two answers, like a boolean field
+        return normalized_score * (1 + 0.1 * 1.0)
+
+    @tracing.traced("eligibility_optimizer.get_next_fields")
     def get_next_fields(self, field_blacklist, program_blacklist, top_n=3):
         """
         Determines the top N fields to ask next to narrow down the search.
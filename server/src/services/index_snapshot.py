@@ -0,0 +1,184 @@
+"""On-disk snapshot of the indexes derived from the catalog.
+
+Each process used to rebuild its derived state (rendered program cards,
+the keyword index, optimizer field statistics) from the raw data files.
+The snapshot stores each of these as a section of `.npy` arrays plus a
+JSON manifest, in a directory named after the catalog's content hash
+(`Catalog.version`, a hash of the source files' bytes):
+
+    data/snapshots/<version>/<section>/manifest.json
+    data/snapshots/<version>/<section>/<array>.npy
+
+`load` memory-maps a section when its manifest matches the current hash
+and formats. Otherwise it builds the index and writes the section for the
+next process, so only the first process after a data change pays for
+construction. Arrays are mapped read-only and shared through the page
+cache, so workers started later (or on autoscaled machines with the
+snapshot baked into the image) skip index construction.
+
+A section class provides `SNAPSHOT_NAME`, `SNAPSHOT_FORMAT`,
+`to_snapshot() -> (meta, arrays)` and
+`from_snapshot(catalog, meta, arrays)`.
+
+Settings: INDEX_SNAPSHOT_DIR (default data/snapshots); INDEX_SNAPSHOT=0
+disables reading and writing snapshots.
+
+Build every section ahead of time (e.g. in a deploy step), from `server/src`:
+    python -m services.index_snapshot
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+import numpy as np
+
+from services import tracing
+from services.catalog import DATA_DIR, Catalog
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+SNAPSHOT_DIR = Path(os.getenv('INDEX_SNAPSHOT_DIR', DATA_DIR / 'snapshots'))
+MANIFEST = 'manifest.json'
+
+T = TypeVar('T')
+
+
+def enabled() -> bool:
+    return os.getenv('INDEX_SNAPSHOT', '1') != '0'
+
+
+def section_dir(catalog: Catalog, cls: type, directory: Optional[Path] = None) -> Path:
+    return Path(directory or SNAPSHOT_DIR) / catalog.version / cls.SNAPSHOT_NAME
+
+
+def _manifest(path: Path) -> Optional[dict]:
+    try:
+        with open(path / MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):  # missing, or cut short: treated as stale
+        return None
+
+
+def _is_current(manifest: Optional[dict], catalog: Catalog, cls: type) -> bool:
+    return manifest is not None and (manifest.get('format'), manifest.get('section_format'), manifest.get('version')) == \
+        (FORMAT, cls.SNAPSHOT_FORMAT, catalog.version)
+
+
+def read(catalog: Catalog, cls: type[T], directory: Optional[Path] = None) -> Optional[T]:
+    """The section for `cls`, memory-mapped, or None if it is missing or stale."""
+    path = section_dir(catalog, cls, directory)
+    manifest = _manifest(path)
+    if not _is_current(manifest, catalog, cls):
+        return None
+    arrays = {name: np.load(path / f'{name}.npy', mmap_mode='r', allow_pickle=False) for name in manifest['arrays']}
+    return cls.from_snapshot(catalog, manifest['meta'], arrays)
+
+
+def write(catalog: Catalog, index, directory: Optional[Path] = None) -> Path:
+    """Save `index` as its section for `catalog`; returns the section directory."""
+    path = section_dir(catalog, type(index), directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta, arrays = index.to_snapshot()
+    # write into a private directory and rename it into place, so readers never see a partial section
+    tmp = Path(tempfile.mkdtemp(prefix=f'.{path.name}-', dir=path.parent))
+    try:
+        for name, array in arrays.items():
+            np.save(tmp / f'{name}.npy', np.ascontiguousarray(array), allow_pickle=False)
+        manifest = {'format': FORMAT, 'section_format': type(index).SNAPSHOT_FORMAT, 'version': catalog.version,
+                    'arrays': sorted(arrays), 'meta': meta}
+        with open(tmp / MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # `path` exists: either another process just wrote this section, or it is stale
+            # (an older SNAPSHOT_FORMAT); a non-empty directory cannot be replaced, so move it aside
+            if _is_current(_manifest(path), catalog, type(index)):
+                return path
+            aside = Path(tempfile.mkdtemp(prefix=f'.{path.name}-stale-', dir=path.parent))
+            try:
+                os.replace(path, aside / path.name)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            shutil.rmtree(aside, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+def prune(catalog: Catalog, directory: Optional[Path] = None) -> None:
+    """Remove snapshots of other catalog versions."""
+    root = Path(directory or SNAPSHOT_DIR)
+    for path in root.iterdir() if root.is_dir() else ():
+        if path.is_dir() and path.name != catalog.version:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load(catalog: Catalog, cls: type[T], build: Callable[[], T], directory: Optional[Path] = None) -> T:
+    """
+    The `cls` index for `catalog`: memory-mapped from its snapshot section when
+    that matches the catalog's content hash, otherwise built and saved.
+
+    Args:
+        catalog: The catalog the index is derived from.
+        cls: The index class (a snapshot section).
+        build: Builds the index from the catalog.
+        directory: Snapshot root; defaults to INDEX_SNAPSHOT_DIR.
+    """
+    if not enabled():
+        return build()
+    with tracing.span('index_snapshot.load', section=cls.SNAPSHOT_NAME) as load_span:
+        try:
+            index = read(catalog, cls, directory)
+        except Exception:
+            logger.warning('Unreadable %s snapshot; rebuilding', cls.SNAPSHOT_NAME, exc_info=True)
+            shutil.rmtree(section_dir(catalog, cls, directory), ignore_errors=True)
+            index = None
+        if load_span is not None:
+            load_span['hit'] = index is not None
+        if index is not None:
+            return index
+
+        index = build()
+        try:
+            write(catalog, index, directory)
+            prune(catalog, directory)
+        except OSError:
+            logger.warning('Failed to write %s snapshot', cls.SNAPSHOT_NAME, exc_info=True)
+        return index
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+
+    from services.eligibility_optimizer import FieldStatistics
+    from services.program_cards import ProgramCards
+    from services.program_matcher import LexicalMatcher
+
+    parser = argparse.ArgumentParser(description='Build the index snapshot for the current catalog.')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help='catalog directory')
+    parser.add_argument('--output', type=Path, default=None, help='snapshot root (default: INDEX_SNAPSHOT_DIR)')
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.data_dir)
+    sections = [
+        ProgramCards(catalog),
+        LexicalMatcher(catalog.descriptions, version=catalog.version),
+        FieldStatistics(catalog.programs_df),
+    ]
+    for index in sections:
+        print(write(catalog, index, args.output))
+    prune(catalog, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Structured, non-blocking logging setup.
+
+`setup_logging()` routes every log record through a bounded in-memory
+queue; a background listener thread formats records (JSON lines by default)
+and writes them to stderr. Request threads only enqueue, so they never block
+on terminal or pipe I/O; if the queue is full the record is dropped and
+counted instead.
+
+Verbose payloads (program lists, extracted user fields, ...) are attached as
+`extra={'payload': ...}` and sampled: every record is still emitted, but
+below WARNING only a fraction keeps its payload (the rest carry
+`PAYLOAD_OMITTED`). Payloads are serialized on the listener thread.
+
+Environment:
+    LOG_LEVEL                 root level (default INFO)
+    LOG_LEVELS                per-logger levels, e.g. "app=DEBUG,services.session_store=WARNING"
+    LOG_FORMAT                "json" (default) or "text"
+    LOG_PAYLOAD_SAMPLE_RATE   fraction of sub-WARNING payloads kept (default 0.1)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+from services import tracing
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+_MAX_PAYLOAD_CHARS = 4000
+PAYLOAD_OMITTED = '<sampled out>'
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when full."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # capture request context on the calling thread; formatting happens later
+        record.trace_id = tracing.current_trace_id()
+        return super().prepare(record)
+
+
+class PayloadSamplingFilter(logging.Filter):
+    """Keep the `payload` attribute of only `rate` of the records below WARNING.
+
+    The records themselves always pass; a payload that is not sampled is
+    replaced with `PAYLOAD_OMITTED`. WARNING and above keep their payload.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'payload', None) is None or record.levelno >= logging.WARNING:
+            return True
+        if self.rate < 1.0 and random.random() >= self.rate:
+            record.payload = PAYLOAD_OMITTED
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with level, logger, message, trace id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if 'payload' in entry:
+            text = json.dumps(entry['payload'], default=str)
+            if len(text) > _MAX_PAYLOAD_CHARS:
+                entry['payload'] = text[:_MAX_PAYLOAD_CHARS] + '...'
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "name=LEVEL,name=LEVEL" into a dict."""
+    levels = {}
+    for item in spec.split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def setup_logging(level: Optional[str] = None, *, levels: Optional[Dict[str, str]] = None, fmt: Optional[str] = None,
+                  payload_sample_rate: Optional[float] = None, queue_size: int = 10_000) -> None:
+    """Install the queue handler on the root logger (idempotent)."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    levels = levels if levels is not None else parse_levels(os.getenv('LOG_LEVELS', ''))
+    fmt = fmt or os.getenv('LOG_FORMAT', 'json')
+    if payload_sample_rate is None:
+        payload_sample_rate = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.1'))
+
+    output = logging.StreamHandler(sys.stderr)
+    if fmt == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s'))
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _queue_handler.addFilter(PayloadSamplingFilter(payload_sample_rate))
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=False)
+
+    root = logging.getLogger()
+    root.handlers[:] = [_queue_handler]
+    root.setLevel(level.upper())
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+    # a preloading master forks workers after this; each needs its own queue and listener thread
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _restart_listener() -> None:
+    # the parent's listener thread does not exist in the child; replace the listener
+    global _listener
+    if _listener is not None and _queue_handler is not None:
+        _queue_handler.queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *_listener.handlers,
+                                                   respect_handler_level=_listener.respect_handler_level)
+        _listener.start()
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,120 @@
+"""Model client factory with a local fake backend.
+
+`make_client` returns a `google.genai.Client` normally. With
+`MODEL_BACKEND=fake` it returns `FakeClient`, which answers the app's
+prompts (stage-A conversation, stage-A candidate listing, stage-B field
+extraction) locally and instantly, so load tests measure the server rather
+than provider latency. Calls with a `response_schema` config get random
+JSON matching the schema, like the SDK's JSON mode. `FAKE_MODEL_LATENCY_MS` adds an artificial
+delay to every fake call and `FAKE_MODEL_ERROR_RATE` makes that fraction of
+fake calls fail, to exercise the circuit breaker.
+
+`MODEL_TIMEOUT_MS` bounds each real provider request (default 20000).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import time
+import typing
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+
+def backend() -> str:
+    return os.getenv('MODEL_BACKEND', 'google').lower()
+
+
+def is_fake() -> bool:
+    return backend() == 'fake'
+
+
+def make_client(api_key: Optional[str] = None):
+    """Return the configured model client (google.genai.Client or FakeClient)."""
+    if is_fake():
+        return FakeClient(latency_ms=float(os.getenv('FAKE_MODEL_LATENCY_MS', '0')),
+                          error_rate=float(os.getenv('FAKE_MODEL_ERROR_RATE', '0')))
+    from google import genai
+    return genai.Client(api_key=api_key, http_options={'timeout': int(os.getenv('MODEL_TIMEOUT_MS', '20000'))})
+
+
+class _FakeModels:
+    """Mimics `client.models.generate_content` closely enough for the app."""
+
+    _QUESTIONS = [
+        "Can you tell me a bit more about your living situation?",
+        "How are you currently covering your basic expenses?",
+        "Is anyone else in your household depending on you?",
+        "Are you dealing with any health concerns right now?",
+        "What would help you most in the coming months?",
+    ]
+
+    def __init__(self, program_names: List[str], latency_ms: float, error_rate: float = 0.0):
+        self.program_names = program_names
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError('fake model error (FAKE_MODEL_ERROR_RATE)')
+        prompt = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+        # Seed from the prompt so identical conversations get identical answers
+        rng = random.Random(hashlib.blake2b(prompt.encode('utf-8'), digest_size=8).digest())
+
+        schema = _config_value(config, 'response_schema')
+        if isinstance(schema, type) and hasattr(schema, 'model_fields'):
+            data = {name: self._fake_value(name, field.annotation, rng) for name, field in schema.model_fields.items()}
+            return SimpleNamespace(text=json.dumps(data), parsed=schema.model_validate(data))
+        if 'comma separated python list' in prompt:
+            picks = rng.sample(self.program_names, k=min(8, len(self.program_names)))
+            return SimpleNamespace(text=str(picks))
+        if 'Task: create a JSON' in prompt or 'JSON object' in prompt:
+            fields = {
+                'age': str(rng.randint(18, 80)),
+                'monthly_income': str(rng.randrange(0, 5000, 50)),
+                'citizen_or_lawful_resident': str(rng.random() < 0.9),
+                'has_permanent_address': str(rng.random() < 0.8),
+                'employed': str(rng.random() < 0.5),
+                'has_children': str(rng.random() < 0.4),
+            }
+            return SimpleNamespace(text=json.dumps(fields))
+        return SimpleNamespace(text=rng.choice(self._QUESTIONS))
+
+
+    def _fake_value(self, name: str, annotation: Any, rng: random.Random) -> Any:
+        # Optional[X] -> X
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if args and typing.get_origin(annotation) is not list:
+            annotation = args[0]
+        if typing.get_origin(annotation) is list:
+            # lists of ids (e.g. program ids)
+            return rng.sample(range(len(self.program_names)), k=min(8, len(self.program_names)))
+        if annotation is bool:
+            return rng.random() < 0.5
+        if annotation is int:
+            return rng.randrange(0, 5000, 50) if 'income' in name else rng.randint(18, 80)
+        return None
+
+
+def _config_value(config: Any, key: str) -> Any:
+    if config is None:
+        return None
+    return config.get(key) if isinstance(config, dict) else getattr(config, key, None)
+
+
+class FakeClient:
+    """Drop-in stand-in for `google.genai.Client` used with MODEL_BACKEND=fake."""
+
+    def __init__(self, latency_ms: float = 0.0, program_names: Optional[List[str]] = None, error_rate: float = 0.0):
+        if program_names is None:
+            with open(DATA_DIR / 'social_welfare_programs.json', 'r', encoding='utf-8') as f:
+                program_names = list(json.load(f))
+        self.models = _FakeModels(program_names, latency_ms, error_rate)
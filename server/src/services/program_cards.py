@@ -0,0 +1,177 @@
+"""Pre-rendered program cards and the cacheable catalog payload.
+
+Every `{id, name, description, link}` card the chat endpoints return is
+serialized to JSON bytes once per catalog version. Chat responses are then
+assembled by concatenating those bytes instead of rebuilding and
+re-serializing the (long) descriptions on every turn.
+
+The full card list is also pre-rendered, plain and gzip-compressed, for the
+`/api/programs` endpoint, together with an ETag (the catalog version) and
+Last-Modified time so clients can cache it and ask chat endpoints for card
+IDs only.
+
+The rendered bytes are kept in the index snapshot (`services.index_snapshot`),
+so a new process loads them instead of re-rendering and re-compressing.
+When loaded from the snapshot, `catalog_body`, `catalog_gzip` and the cards
+are memoryviews over the memory-mapped arrays: they stay in the page cache,
+shared by every worker, and are copied only into each response.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services import index_snapshot
+from services.catalog import Catalog, get_catalog
+
+
+def normalize_name(name: str) -> str:
+    """Program names from the model arrive wrapped in stray quotes and spaces."""
+    return str(name).strip().strip("'\"").strip()
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class _CardSlices(Sequence[bytes]):
+    """Cards as zero-copy slices of the catalog body (when loaded from a snapshot)."""
+
+    def __init__(self, body: bytes, bounds: np.ndarray):
+        self._body = memoryview(body)
+        self._bounds = bounds
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __getitem__(self, i):
+        start, end = self._bounds[i]
+        return self._body[start:end]
+
+
+class ProgramCards:
+    """Serialized program cards for one catalog version."""
+
+    SNAPSHOT_NAME = 'program_cards'
+    SNAPSHOT_FORMAT = 1
+
+    def __init__(self, catalog: Catalog):
+        self._bind(catalog)
+        self.cards: Sequence[bytes] = [self._render(i, name) for i, name in enumerate(self.names)]
+
+        # the described programs with their card ids, for prompts that ask the model for ids
+        self.reference_json = json.dumps([{"id": self.ids[name], "name": name, "description": description}
+                                          for name, description in catalog.descriptions.items()], ensure_ascii=False)
+
+        self.catalog_body = self._body_prefix() + b','.join(self.cards) + b']}'
+        self.catalog_gzip = gzip.compress(self.catalog_body, compresslevel=9, mtime=0)
+
+    def _bind(self, catalog: Catalog) -> None:
+        self.version = catalog.version
+        self._descriptions = catalog.descriptions
+        self._links = catalog.links
+
+        # catalog rows first (their position is the card id), then any
+        # described programs missing from the CSV
+        names = list(catalog.program_names)
+        seen = set(names)
+        for name in list(catalog.descriptions) + list(catalog.links):
+            if name not in seen:
+                names.append(name)
+                seen.add(name)
+        self.names: List[str] = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        mtime = max(p.stat().st_mtime for p in catalog.source_paths)
+        self.last_modified = datetime.fromtimestamp(int(mtime), tz=timezone.utc)
+
+    def _body_prefix(self) -> bytes:
+        return b'{"version":' + _dumps(self.version) + b',"programs":['
+
+    def to_snapshot(self):
+        # card i is catalog_body[bounds[i, 0]:bounds[i, 1]]
+        lengths = np.fromiter((len(card) for card in self.cards), dtype=np.int64, count=len(self.cards))
+        starts = len(self._body_prefix()) + np.concatenate([[0], np.cumsum(lengths + 1)[:-1]]).astype(np.int64)
+        return {'reference_json': self.reference_json}, {
+            'catalog_body': np.frombuffer(self.catalog_body, dtype=np.uint8),
+            'catalog_gzip': np.frombuffer(self.catalog_gzip, dtype=np.uint8),
+            'card_bounds': np.stack([starts, starts + lengths], axis=1),
+        }
+
+    @classmethod
+    def from_snapshot(cls, catalog: Catalog, meta: dict, arrays: Dict[str, np.ndarray]) -> 'ProgramCards':
+        cards = cls.__new__(cls)
+        cards._bind(catalog)
+        cards.reference_json = meta['reference_json']
+        cards.catalog_body = memoryview(arrays['catalog_body'])
+        cards.catalog_gzip = memoryview(arrays['catalog_gzip'])
+        cards.cards = _CardSlices(cards.catalog_body, arrays['card_bounds'])
+        if len(cards.cards) != len(cards.names):
+            raise ValueError('snapshot does not match the catalog')
+        return cards
+
+    def _render(self, card_id: Optional[int], name: str) -> bytes:
+        return _dumps({
+            "id": card_id,
+            "name": name,
+            "description": self._descriptions.get(name, ""),
+            "link": self._links.get(name, ""),
+        })
+
+    def card(self, name: str) -> bytes:
+        """Card bytes for `name`; names outside the catalog are rendered on the fly."""
+        name = normalize_name(name)
+        card_id = self.ids.get(name)
+        return self.cards[card_id] if card_id is not None else self._render(None, name)
+
+    def split_ids(self, names: Iterable[str]) -> Tuple[List[int], List[bytes]]:
+        """Catalog ids for known names, plus rendered cards for unknown ones."""
+        ids, unknown = [], []
+        for name in names:
+            name = normalize_name(name)
+            card_id = self.ids.get(name)
+            if card_id is not None:
+                ids.append(card_id)
+            else:
+                unknown.append(self._render(None, name))
+        return ids, unknown
+
+    def render_response(self, text: str, names: Iterable[str], *, ids_only: bool = False, **extra) -> bytes:
+        """Assemble a chat response body from pre-rendered cards.
+
+        With `ids_only`, known programs are sent as `program_ids` (to be resolved
+        against `/api/programs`) and only unknown ones as full cards.
+        """
+        body = b'{"text":' + _dumps(text)
+        if ids_only:
+            ids, unknown = self.split_ids(names)
+            body += b',"catalog_version":' + _dumps(self.version) + b',"program_ids":' + _dumps(ids)
+            cards = unknown
+        else:
+            cards = [self.card(name) for name in names]
+        body += b',"programs":[' + b','.join(cards) + b']'
+        for key, value in extra.items():
+            body += b',' + _dumps(key) + b':' + _dumps(value)
+        return body + b'}'
+
+
+_cards: Optional[ProgramCards] = None
+_lock = threading.Lock()
+
+
+def get_cards(catalog: Optional[Catalog] = None) -> ProgramCards:
+    """Return the cards for the current catalog, rebuilding when its version changes."""
+    global _cards
+    catalog = catalog or get_catalog()
+    cards = _cards
+    if cards is None or cards.version != catalog.version:
+        with _lock:
+            if _cards is None or _cards.version != catalog.version:
+                _cards = index_snapshot.load(catalog, ProgramCards, lambda: ProgramCards(catalog))
+            cards = _cards
+    return cards
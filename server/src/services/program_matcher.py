@@ -0,0 +1,157 @@
+"""Keyword/phrase matching of free text against the program catalog.
+
+`LexicalMatcher` is an inverted index from terms (words and two-word
+phrases such as "health insurance") to the programs whose name or
+description contains them, with TF-IDF weights normalized per program. It
+is built once per catalog version from `social_welfare_programs.json`, or
+memory-mapped from the index snapshot (`services.index_snapshot`).
+
+Stage A keeps a running score per program for each conversation. After
+every user message, `update` adds that message's match scores, so the
+current best programs can be shown on every turn without a model call:
+
+    scores = matcher.update(conv.candidate_scores, prompt)
+    names = matcher.top(scores, 5)
+
+A running score is the sum of the per-message scores, so
+`matcher.history_scores(history)` reproduces it from a stage-A history.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services import index_snapshot
+from services.catalog import Catalog, get_catalog
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does for from get got had has
+have help i if in into is it its just like me more my need needs no not of on or other our program programs
+provide provides so some such that the their them there these they this those to up us was we were what when
+which who will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def terms(text: str) -> List[str]:
+    """Index terms of `text`: its words plus each pair of adjacent words as a phrase."""
+    words = tokenize(text)
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def user_text(history: Sequence[str]) -> List[str]:
+    """The user's messages in a stage-A history ("user: ..." entries)."""
+    return [entry[len('user: '):] for entry in history if entry.startswith('user: ')]
+
+
+class LexicalMatcher:
+    """TF-IDF inverted index of program names and descriptions.
+
+    Postings are stored CSR-style: term `i`'s programs and weights are
+    `docs[offsets[i]:offsets[i + 1]]` and `weights[...]`, so the index can be
+    saved to and memory-mapped from an index snapshot as three arrays.
+    """
+
+    SNAPSHOT_NAME = 'program_matcher'
+    SNAPSHOT_FORMAT = 1
+
+    def __init__(self, descriptions: Dict[str, str], version: str = ''):
+        """
+        Args:
+            descriptions: Program name -> description (the catalog JSON shown to the model).
+            version: Catalog version this matcher was built from.
+        """
+        self.version = version
+        self.names = list(descriptions)
+        postings: Dict[str, List[tuple]] = defaultdict(list)
+        for doc, (name, description) in enumerate(descriptions.items()):
+            # names are short and specific; count their terms twice
+            counts = Counter(terms(description) + 2 * terms(name))
+            for term, tf in counts.items():
+                postings[term].append((doc, 1.0 + math.log(tf)))
+
+        n = len(self.names)
+        sizes = np.fromiter((len(entries) for entries in postings.values()), dtype=np.int64, count=len(postings))
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.docs = np.fromiter((doc for entries in postings.values() for doc, _ in entries), dtype=np.intp, count=self.offsets[-1])
+        weights = np.fromiter((w for entries in postings.values() for _, w in entries), dtype=float, count=self.offsets[-1])
+        weights *= np.repeat(np.log((1 + n) / (1 + sizes)) + 1.0, sizes)  # idf
+        norms = np.sqrt(np.bincount(self.docs, weights=weights ** 2, minlength=n))
+        norms[norms == 0] = 1.0
+        self.weights = weights / norms[self.docs]
+        self.terms = {term: i for i, term in enumerate(postings)}
+
+    def to_snapshot(self):
+        return {'version': self.version, 'names': self.names, 'terms': list(self.terms)}, \
+            {'offsets': self.offsets, 'docs': self.docs, 'weights': self.weights}
+
+    @classmethod
+    def from_snapshot(cls, catalog: Catalog, meta: dict, arrays: Dict[str, np.ndarray]) -> 'LexicalMatcher':
+        matcher = cls.__new__(cls)
+        matcher.version = meta['version']
+        matcher.names = meta['names']
+        matcher.terms = {term: i for i, term in enumerate(meta['terms'])}
+        matcher.offsets, matcher.docs, matcher.weights = arrays['offsets'], arrays['docs'], arrays['weights']
+        return matcher
+
+    def scores(self, text: str) -> np.ndarray:
+        """Match score of every program (in `self.names` order) for `text`."""
+        scores = np.zeros(len(self.names))
+        for term, qtf in Counter(terms(text)).items():
+            i = self.terms.get(term)
+            if i is not None:
+                start, end = self.offsets[i], self.offsets[i + 1]
+                scores[self.docs[start:end]] += (1.0 + math.log(qtf)) * self.weights[start:end]
+        return scores
+
+    def update(self, running: Dict[str, float], text: str) -> Dict[str, float]:
+        """Add the scores of one more message to `running` (program name -> score) in place."""
+        scores = self.scores(text)
+        for i in np.flatnonzero(scores):
+            name = self.names[i]
+            running[name] = round(running.get(name, 0.0) + float(scores[i]), 6)
+        return running
+
+    def history_scores(self, history: Sequence[str]) -> Dict[str, float]:
+        """The running scores after every user message of a stage-A history."""
+        running: Dict[str, float] = {}
+        for message in user_text(history):
+            self.update(running, message)
+        return running
+
+    @staticmethod
+    def top(running: Dict[str, float], limit: int) -> List[str]:
+        """The `limit` best programs of `running`, best first (ties by name)."""
+        return [name for name, _ in sorted(running.items(), key=lambda item: (-item[1], item[0]))[:limit]]
+
+    def match(self, text: str, limit: int) -> List[str]:
+        """Up to `limit` program names for `text`, best first; only programs sharing a term with it."""
+        return self.top(self.update({}, text), limit)
+
+
+_matcher: Optional[LexicalMatcher] = None
+_lock = threading.Lock()
+
+
+def get_matcher(catalog: Optional[Catalog] = None) -> LexicalMatcher:
+    """Return the matcher for the current catalog, rebuilding it when the catalog version changes."""
+    global _matcher
+    catalog = catalog or get_catalog()
+    matcher = _matcher
+    if matcher is None or matcher.version != catalog.version:
+        with _lock:
+            if _matcher is None or _matcher.version != catalog.version:
+                _matcher = index_snapshot.load(catalog, LexicalMatcher,
+                                               lambda: LexicalMatcher(catalog.descriptions, version=catalog.version))
+            matcher = _matcher
+    return matcher
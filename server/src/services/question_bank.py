@@ -0,0 +1,206 @@
+"""Pre-built question phrasings, keyed by field.
+
+`WelfareProgramEligibilityBot` used to ask the model to phrase every
+question ("collect the user's '{field}' value"). The phrasings are fixed
+text, so they are collected once instead:
+
+- the hand-written groups in `stochastic_query.all_questions`, de-duplicated;
+- optionally, `data/question_bank.json`, generated offline for fields that
+  have no hand-written phrasings (see `main`).
+
+Catalog columns (`min_age`, `is_for_children`, ...) resolve to the `User`
+field they are scored against (via `ranking_rules.json`), so the optimizer's
+field names can be used directly. Numeric fields that the optimizer splits
+at a threshold are asked with a yes/no template.
+
+Usage:
+    question = get_question_bank().question('max_monthly_income', threshold=1800)
+
+Offline generation (from `server/src`, needs a model API key):
+    python -m services.question_bank --generate
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.stochastic_query import all_questions
+from services.ranking_rules import RuleSet, get_rules
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+BANK_PATH = DATA_DIR / 'question_bank.json'
+
+# `User` field asked by each group of `all_questions`, in order
+QUESTION_GROUP_FIELDS = [
+    'age',
+    'citizen_or_lawful_resident',
+    'has_permanent_address',
+    'lives_with_people',
+    'employed',
+    'disabled',
+    'is_veteran',
+    'has_criminal_record',
+    'has_children',
+    'is_refugee',
+]
+
+# Hand-written phrasings for fields without a group in `all_questions`
+EXTRA_QUESTIONS = {
+    'monthly_income': ["What's your monthly income?"],
+}
+
+# Yes/no questions for a threshold split; `{t}` is the threshold
+THRESHOLD_TEMPLATES = {
+    'age': [
+        "Are you {t:g} years old or younger?",
+        "Is your age {t:g} or under?",
+    ],
+    'monthly_income': [
+        "Is your monthly income ${t:,.0f} or less?",
+        "Do you earn ${t:,.0f} a month or less?",
+    ],
+}
+
+
+def _dedupe(questions: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(q.strip() for q in questions if q and q.strip()))
+
+
+class QuestionBank:
+    """Field name -> de-duplicated question phrasings."""
+
+    def __init__(self, phrasings: Dict[str, Sequence[str]], aliases: Optional[Dict[str, str]] = None,
+                 threshold_templates: Optional[Dict[str, Sequence[str]]] = None):
+        """
+        Args:
+            phrasings: Questions per field.
+            aliases: Other names (catalog columns) for those fields.
+            threshold_templates: Yes/no `str.format` templates per field, given `t`.
+        """
+        self.aliases = dict(aliases or {})
+        self._phrasings = {field: _dedupe(questions) for field, questions in phrasings.items()}
+        self._phrasings = {field: questions for field, questions in self._phrasings.items() if questions}
+        self._threshold_templates = {field: tuple(templates) for field, templates in (threshold_templates or {}).items()}
+        self._question_fields: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def build(cls, rules: Optional[RuleSet] = None, path: Path = BANK_PATH) -> 'QuestionBank':
+        """The hand-written phrasings, plus `path` if it exists, with catalog columns as aliases."""
+        rules = get_rules() if rules is None else rules
+        phrasings: Dict[str, List[str]] = {}
+        for field, group in zip(QUESTION_GROUP_FIELDS, all_questions):
+            phrasings.setdefault(field, []).extend(group)
+        for field, questions in EXTRA_QUESTIONS.items():
+            phrasings.setdefault(field, []).extend(questions)
+
+        aliases = {column: rule.user_field for rule in rules.rules for column in rule.columns}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for field, questions in json.load(f).items():
+                    phrasings.setdefault(aliases.get(field, field), []).extend(questions)
+        return cls(phrasings, aliases, THRESHOLD_TEMPLATES)
+
+    def resolve(self, field: str) -> str:
+        return self.aliases.get(field, field)
+
+    def phrasings(self, field: str) -> Tuple[str, ...]:
+        return self._phrasings.get(self.resolve(field), ())
+
+    def question_fields(self) -> Dict[str, str]:
+        """Question text -> the field it asks for (the reverse of `phrasings`)."""
+        if self._question_fields is None:
+            self._question_fields = {q: field for field, questions in self._phrasings.items() for q in questions}
+        return self._question_fields
+
+    def missing(self, fields: Iterable[str]) -> List[str]:
+        """The fields (after resolving aliases) that have no phrasings."""
+        return [field for field in dict.fromkeys(map(self.resolve, fields)) if field not in self._phrasings]
+
+    def question(self, field: str, threshold: Optional[float] = None, rng: random.Random = random) -> str:
+        """
+        A question asking for `field`, or whether it is at most `threshold`.
+
+        Args:
+            field: A `User` field or catalog column.
+            threshold: Ask a yes/no threshold question instead of the value.
+            rng: Picks among the phrasings.
+        """
+        if threshold is not None:
+            templates = self._threshold_templates.get(self.resolve(field))
+            if templates:
+                return rng.choice(templates).format(t=threshold)
+            return f"Is your {field} at most {threshold:g}?"
+        questions = self.phrasings(field)
+        return rng.choice(questions) if questions else f"What is your {field}?"
+
+
+_bank: Optional[QuestionBank] = None
+_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Return the process-wide question bank, building it on first use."""
+    global _bank
+    if _bank is None:
+        with _lock:
+            if _bank is None:
+                _bank = QuestionBank.build()
+    return _bank
+
+
+def generate_phrasings(client, field: str, count: int = 8, model: str = 'gemma-3-27b-it') -> List[str]:
+    """Ask the model for `count` short questions collecting `field`, one per line."""
+    prompt = (
+        f"Write {count} different concise, user-facing questions to collect a person's '{field}' "
+        "for a social welfare eligibility screening. Each question is one short sentence that is easy "
+        "to answer. Put each question on its own line, with no numbering."
+    )
+    response = client.models.generate_content(model=model, contents=prompt)
+    lines = getattr(response, 'text', str(response)).splitlines()
+    # drop list markers ("1.", "-", "*") the model may add anyway
+    questions = [re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).strip() for line in lines]
+    return list(_dedupe(q for q in questions if q.endswith('?')))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Inspect or extend the question phrasing bank.')
+    parser.add_argument('--generate', action='store_true',
+                        help=f'generate phrasings for catalog fields that have none and save them to {BANK_PATH.name}')
+    parser.add_argument('--count', type=int, default=8, help='phrasings to request per field')
+    parser.add_argument('--output', type=Path, default=BANK_PATH)
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank.build(path=args.output)
+    missing = bank.missing(get_rules().columns)
+    if not args.generate:
+        for field in sorted({bank.resolve(column) for column in get_rules().columns}):
+            print(f'{field}: {len(bank.phrasings(field))} phrasings')
+        print(f'missing: {missing or "none"}')
+        return
+
+    from dotenv import load_dotenv
+    from services import model_client
+    load_dotenv()
+    client = model_client.make_client(api_key=os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY'))
+
+    saved: Dict[str, List[str]] = {}
+    if args.output.exists():
+        with open(args.output, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    for field in missing:
+        saved[field] = generate_phrasings(client, field, args.count)
+        print(f'{field}: {len(saved[field])} phrasings')
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(saved, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
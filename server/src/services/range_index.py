@@ -0,0 +1,129 @@
+"""Sorted indexes over the catalog's numeric range columns.
+
+`ThresholdIndex` keeps one column (e.g. `max_monthly_income`) sorted, so
+the rows above or below a value are a slice found with `np.searchsorted`.
+`IntervalIndex` answers "which `[min_age, max_age]` ranges contain x" with
+a centered interval tree over sorted endpoint arrays. Both queries take
+O(log n + k) for k matching rows. Rows with a missing value are never
+returned; they are listed in `unknown`.
+
+Rows are returned as positional indexes (for `df.iloc` / NumPy arrays), in
+no particular order.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+class ThresholdIndex:
+    """One numeric column, sorted for range queries."""
+
+    def __init__(self, values):
+        values = _as_array(values)
+        known = ~np.isnan(values)
+        rows = np.flatnonzero(known)
+        order = np.argsort(values[rows], kind='stable')
+        self.size = len(values)
+        self.unknown = np.flatnonzero(~known)
+        self._rows = rows[order]
+        self._sorted = values[self._rows]
+
+    def greater_equal(self, x: float) -> np.ndarray:
+        return self._rows[np.searchsorted(self._sorted, x, side='left'):]
+
+    def greater(self, x: float) -> np.ndarray:
+        return self._rows[np.searchsorted(self._sorted, x, side='right'):]
+
+    def less_equal(self, x: float) -> np.ndarray:
+        return self._rows[:np.searchsorted(self._sorted, x, side='right')]
+
+    def less(self, x: float) -> np.ndarray:
+        return self._rows[:np.searchsorted(self._sorted, x, side='left')]
+
+
+class _Node:
+    __slots__ = ('center', 'left', 'right', 'by_lo', 'lo', 'by_hi', 'hi')
+
+    def __init__(self, center, by_lo, lo, by_hi, hi):
+        self.center = center
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.by_lo = by_lo  # overlapping rows sorted by lower bound
+        self.lo = lo
+        self.by_hi = by_hi  # overlapping rows sorted by upper bound
+        self.hi = hi
+
+
+class IntervalIndex:
+    """Closed intervals `[lo, hi]` (one per row) indexed for stabbing queries."""
+
+    def __init__(self, lo, hi):
+        lo, hi = _as_array(lo), _as_array(hi)
+        if lo.shape != hi.shape:
+            raise ValueError('lo and hi must have the same length')
+        known = ~(np.isnan(lo) | np.isnan(hi))
+        self.size = len(lo)
+        self.unknown = np.flatnonzero(~known)
+        self._lo_index = ThresholdIndex(np.where(known, lo, np.nan))
+        self._hi_index = ThresholdIndex(np.where(known, hi, np.nan))
+        self._root = self._build(lo, hi, np.flatnonzero(known))
+
+    @staticmethod
+    def _build(lo: np.ndarray, hi: np.ndarray, rows: np.ndarray) -> Optional[_Node]:
+        root = None
+        # (rows, parent, is_left) work items; the tree is built top-down without recursion
+        stack = [(rows, None, False)]
+        while stack:
+            rows, parent, is_left = stack.pop()
+            if len(rows) == 0:
+                continue
+            center = float(np.median(np.concatenate([lo[rows], hi[rows]])))
+            overlap = (lo[rows] <= center) & (center <= hi[rows])
+            here = rows[overlap]
+            by_lo = here[np.argsort(lo[here], kind='stable')]
+            by_hi = here[np.argsort(hi[here], kind='stable')]
+            node = _Node(center, by_lo, lo[by_lo], by_hi, hi[by_hi])
+            if parent is None:
+                root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            rest = rows[~overlap]
+            stack.append((rest[hi[rest] < center], node, True))
+            stack.append((rest[lo[rest] > center], node, False))
+        return root
+
+    def containing(self, x: float) -> np.ndarray:
+        """Rows with `lo <= x <= hi`."""
+        parts: List[np.ndarray] = []
+        node = self._root
+        while node is not None:
+            if x < node.center:
+                # every interval here ends at or after center > x; keep those starting by x
+                parts.append(node.by_lo[:np.searchsorted(node.lo, x, side='right')])
+                node = node.left
+            elif x > node.center:
+                parts.append(node.by_hi[np.searchsorted(node.hi, x, side='left'):])
+                node = node.right
+            else:
+                parts.append(node.by_lo)
+                break
+        return np.concatenate(parts) if parts else _EMPTY
+
+    def containing_upper_bound(self, x: float) -> int:
+        """Cheap O(log n) upper bound on `len(self.containing(x))`."""
+        return min(len(self._lo_index.less_equal(x)), len(self._hi_index.greater_equal(x)))
+
+    def excluding(self, x: float) -> np.ndarray:
+        """Rows whose interval lies entirely below or above `x`."""
+        return np.union1d(self._hi_index.less(x), self._lo_index.greater(x))
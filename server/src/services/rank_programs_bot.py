@@ -1,19 +1,46 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
 import models.user as user_model
+from services import ranking_rules
+from services import tracing
+
+class RankedPage(NamedTuple):
+    names: List[str]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(score, row):
+    """Opaque keyset cursor: the (score, row) of the last program on a page."""
+    return f"{score}.{row}"
+
+
+def decode_cursor(cursor):
+    """Inverse of `encode_cursor`; raises ValueError for malformed cursors."""
+    score, sep, row = str(cursor).partition(".")
+    if not sep:
+        raise ValueError(f"invalid ranking cursor: {cursor!r}")
+    return int(score), int(row)
+
 
 class RankProgramsBot:
     """
     A bot that ranks welfare programs based on user eligibility and preferences.
     """
-    def __init__(self, df=None, program_whitelist=None, user=None):
+    @tracing.traced("rank_programs_bot.init")
+    def __init__(self, df=None, program_whitelist=None, user=None, rules=None):
         """
         Initialize the RankProgramsBot.
 
         Args:
             df (pd.DataFrame): DataFrame of welfare programs (rows = programs).
             program_whitelist (list[str]): List of program names to include.
+            rules (RuleSet): Scoring rules; defaults to data/ranking_rules.json.
         """
 
         self.user = user_model.User() if user is None else user
+        self.rules = ranking_rules.get_rules() if rules is None else rules
         self.programs_ranking = {}
         # Lazy import to avoid circular imports at module load time
         import pandas as pd
@@ -47,75 +74,99 @@ class RankProgramsBot:
         # Ensure filtered_df is a DataFrame object
         if not isinstance(self.filtered_df, pd.DataFrame):
             self.filtered_df = pd.DataFrame(self.filtered_df)
+
+        # Bind the rules to the filtered programs' columns once
+        self.compiled_rules = self.rules.compile(self.filtered_df) if len(self.filtered_df) else None
             
             
+    def _scores(self):
+        # score of every filtered program (row-aligned with filtered_df)
+        return self.compiled_rules.score(self.user)
+
+    def ranked_entries(self):
+        """
+        Programs above the rule set's `min_score` with their scores, best first.
+
+        Ties are broken by position in the filtered DataFrame (catalog order).
+
+        Returns:
+            list[tuple[str, int, int]]: (program name, score, row) tuples.
+        """
+        if self.compiled_rules is None:
+            return []
+
+        scores = self._scores()
+        rows = np.flatnonzero(scores > self.rules.min_score)
+        rows = rows[np.argsort(-scores[rows], kind='stable')]
+        program_names = self.filtered_df.iloc[:, 0].to_numpy()  # Assuming the first column contains program names
+        self.programs_ranking = {}
+        entries = []
+        for row in rows.tolist():
+            program_name = program_names[row]
+            if program_name not in self.programs_ranking:
+                self.programs_ranking[program_name] = int(scores[row])
+                entries.append((program_name, int(scores[row]), row))
+        return entries
+
+    @tracing.traced("rank_programs_bot.rank_programs")
     def rank_programs(self):
         """
         Rank welfare programs based on user eligibility and preferences.
 
+        Every rule in `self.rules` is evaluated over all filtered programs at
+        once; programs scoring above the rule set's `min_score` are kept.
+
+        Returns:
+            list[str]: Program names, highest score first.
+        """
+        return [program_name for program_name, _, _ in self.ranked_entries()]
+
+    def top_entries(self, k, cursor=None):
+        """
+        The next `k` programs in ranking order, without sorting the rest.
+
+        Selection uses `np.argpartition` over a (score desc, row asc) key, so a
+        page costs O(n + k log k). Catalog program names are assumed unique.
+
         Args:
-            programs_ranking (dict): A dictionary containing program names as keys and their
-            corresponding eligibility scores as values.
+            k (int): Page size.
+            cursor (str): `next_cursor` of the previous page, or None for the first page.
 
         Returns:
-            pd.DataFrame: A DataFrame of ranked programs.
+            tuple: ((program name, score, row) tuples as in `ranked_entries`, whether more programs follow).
         """
+        if self.compiled_rules is None or k <= 0:
+            return [], False
+
+        scores = self._scores()
+        n = len(scores)
+        keys = -scores * n + np.arange(n)  # unique, so ties never depend on partition order
+        eligible = scores > self.rules.min_score
+        if cursor is not None:
+            after_score, after_row = decode_cursor(cursor)
+            eligible &= keys > -after_score * n + after_row
 
-        # Sort programs by their eligibility scores
-        programs_count = len(self.filtered_df)
-        for i in range(programs_count):
-            program_name = self.filtered_df.iloc[i, 0]  # Assuming the first column contains program names
-            score = 5000 # initialize score to 0
-            # Initialize fields for each program
-            age_range = (self.filtered_df.iloc[i, 1], self.filtered_df.iloc[i, 2])
-            is_only_for_citizens_and_lawful_residents = self.filtered_df.iloc[i, 3]
-            needs_permanent_address = self.filtered_df.iloc[i, 4]
-            household_size_considered = self.filtered_df.iloc[i, 5]
-            max_monthly_income = self.filtered_df.iloc[i, 6]
-            employment_required = self.filtered_df.iloc[i, 7]
-            disability_status_considered = self.filtered_df.iloc[i, 8]
-            is_veteran = self.filtered_df.iloc[i, 9]
-            criminal_record_disqualifying = self.filtered_df.iloc[i, 10]
-            is_for_children = self.filtered_df.iloc[i, 11]
-            is_for_refugees = self.filtered_df.iloc[i, 12]
-            if self.user.age is not None and age_range[0] is not None and age_range[1] is not None:
-                if age_range[0] <= self.user.age <= age_range[1]:
-                    score += 2
-            if self.user.citizen_or_lawful_resident is not None and is_only_for_citizens_and_lawful_residents is not None:
-                if self.user.citizen_or_lawful_resident != is_only_for_citizens_and_lawful_residents:
-                    score -= 100
-            if self.user.has_permanent_address is not None and needs_permanent_address is not None:
-                if self.user.has_permanent_address != needs_permanent_address:
-                    score -= 50
-            if self.user.lives_with_people is not None and household_size_considered is not None:
-                if self.user.lives_with_people == household_size_considered:
-                    score += 1
-            if self.user.monthly_income is not None and max_monthly_income is not None:
-                if self.user.monthly_income <= max_monthly_income:
-                    score += 3
-                else:
-                    score -= 9
-            if self.user.employed is not None and employment_required is not None:
-                if self.user.employed == employment_required:
-                    score += 1
-                else:
-                    score -= 3
-            if self.user.disabled is not None and disability_status_considered is not None:
-                if self.user.disabled == disability_status_considered:
-                    score += 4
-            if self.user.is_veteran is not None and is_veteran is not None:
-                if self.user.is_veteran != is_veteran:
-                    score -= 100
-            if self.user.has_criminal_record is not None and criminal_record_disqualifying is not None:
-                if self.user.has_criminal_record == criminal_record_disqualifying:
-                    score -= 100
-            if self.user.has_children is not None and is_for_children is not None:
-                if self.user.has_children == is_for_children:
-                    score += 3
-            if self.user.is_refugee is not None and is_for_refugees is not None:
-                if self.user.is_refugee != is_for_refugees:
-                    score += 100
-            if score > 0:
-                
-                self.programs_ranking[program_name] = score
-        return [k for k, v in sorted(self.programs_ranking.items(), key=lambda x: x[1], reverse=True)]
+        rows = np.flatnonzero(eligible)
+        has_more = len(rows) > k
+        if has_more:
+            rows = rows[np.argpartition(keys[rows], k - 1)[:k]]
+        rows = rows[np.argsort(keys[rows])]
+
+        program_names = self.filtered_df.iloc[:, 0].to_numpy()
+        return [(program_names[row], int(scores[row]), row) for row in rows.tolist()], has_more
+
+    @tracing.traced("rank_programs_bot.top_k")
+    def top_k(self, k, cursor=None):
+        """
+        The next `k` programs in ranking order (see `top_entries`).
+
+        Args:
+            k (int): Page size.
+            cursor (str): `next_cursor` of the previous page, or None for the first page.
+
+        Returns:
+            RankedPage: The page's program names and the cursor of the following page.
+        """
+        entries, has_more = self.top_entries(k, cursor)
+        next_cursor = encode_cursor(entries[-1][1], entries[-1][2]) if has_more else None
+        return RankedPage([name for name, _, _ in entries], next_cursor)
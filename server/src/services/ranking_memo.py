@@ -0,0 +1,169 @@
+"""Memoized program ranking.
+
+A ranking depends only on the candidate set and, per rule, on which side of
+the candidates' thresholds the user's value falls (see
+`CompiledRules.profile_key`). With 9 booleans and age/income bucketed at the
+candidates' actual `min_age`/`max_age`/`max_monthly_income` values, there
+are few distinct outcomes and they repeat across users, so final stage-B
+turns are served from an LRU cache keyed by
+`(candidate-set fingerprint, quantized profile)`.
+
+A first page (`rank_page` without a cursor) that misses the cache is
+computed with `RankProgramsBot.top_entries` (partial selection) and cached
+as a partial ranking. The full ranking is computed only when a later
+page or `rank` needs it.
+
+A memo belongs to one catalog version; `get_memo()` replaces it when the
+catalog changes, which drops every cached ranking.
+
+Usage:
+    ranked = get_memo().rank(conv.stage_b_potentials, conv.user)
+    page = get_memo().rank_page(conv.stage_b_potentials, conv.user, limit=20, cursor=None)
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from models.user import User
+from services import tracing
+from services.catalog import Catalog, get_catalog
+from services.rank_programs_bot import RankedPage, RankProgramsBot, decode_cursor, encode_cursor
+from services.ranking_rules import CompiledRules, RuleSet, get_rules
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('RANKING_MEMO_SIZE', '4096'))
+
+
+def candidates_fingerprint(program_whitelist: Iterable[str]) -> str:
+    """Order-independent digest of a candidate set (names normalized like RankProgramsBot does)."""
+    names = sorted({str(x).strip() for x in program_whitelist})
+    return hashlib.blake2b('\x1f'.join(names).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RankingMemo:
+    """LRU cache of `RankProgramsBot` rankings for one catalog and rule set."""
+
+    def __init__(self, df: pd.DataFrame, rules: Optional[RuleSet] = None, *, version: str = '',
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            df: The full program catalog.
+            rules: Scoring rules; defaults to data/ranking_rules.json.
+            version: Catalog version this memo is valid for.
+            max_entries: Rankings kept before the least recently used is evicted.
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self.df = df
+        self.rules = get_rules() if rules is None else rules
+        self.version = version
+        self.max_entries = max_entries
+        name_column = df['program'] if 'program' in df.columns else df.iloc[:, 0]
+        self._rows: Dict[str, List[int]] = {}
+        for row, name in enumerate(name_column.astype(str)):
+            self._rows.setdefault(name, []).append(row)
+        self._lock = threading.Lock()
+        # key -> (ranked names, matching (-score, row) sort keys, whether that is the whole ranking)
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        # fingerprint -> rules compiled over just those candidates' rows (their thresholds)
+        self._quantizers: OrderedDict[str, CompiledRules] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _quantizer(self, fingerprint: str, program_whitelist: Iterable[str]) -> CompiledRules:
+        with self._lock:
+            quantizer = self._quantizers.get(fingerprint)
+            if quantizer is not None:
+                self._quantizers.move_to_end(fingerprint)
+                return quantizer
+        rows = sorted(row for name in {str(x).strip() for x in program_whitelist} for row in self._rows.get(name, ()))
+        quantizer = self.rules.compile(self.df.iloc[rows])
+        with self._lock:
+            self._quantizers[fingerprint] = quantizer
+            while len(self._quantizers) > self.max_entries:
+                self._quantizers.popitem(last=False)
+        return quantizer
+
+    def key(self, program_whitelist: Iterable[str], user: User) -> tuple:
+        fingerprint = candidates_fingerprint(program_whitelist)
+        return fingerprint, self._quantizer(fingerprint, program_whitelist).profile_key(user)
+
+    def _ranking(self, program_whitelist: Optional[List[str]], user: User, first: Optional[int] = None) -> tuple:
+        # `first`: only the first `first` programs are needed (a partial ranking will do)
+        program_whitelist = program_whitelist or []
+        key = self.key(program_whitelist, user)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[2] or (first is not None and first <= len(entry[0]))):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        with tracing.span('ranking_memo.miss', candidates=len(program_whitelist), partial=first is not None):
+            bot = RankProgramsBot(self.df, program_whitelist, user, self.rules)
+            if first is None:
+                entries, complete = bot.ranked_entries(), True
+            else:
+                entries, has_more = bot.top_entries(first)
+                complete = not has_more
+        entry = (tuple(name for name, _, _ in entries), tuple((-score, row) for _, score, row in entries), complete)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or not current[2] or complete:
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def rank(self, program_whitelist: Optional[List[str]], user: User) -> List[str]:
+        """Ranked program names, computed by `RankProgramsBot` on a cache miss."""
+        return list(self._ranking(program_whitelist, user)[0])
+
+    def rank_page(self, program_whitelist: Optional[List[str]], user: User, limit: int,
+                  cursor: Optional[str] = None) -> RankedPage:
+        """One page of the ranking; cursors are interchangeable with `RankProgramsBot.top_k`'s."""
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        if cursor is None:
+            names, keys, complete = self._ranking(program_whitelist, user, first=limit)
+            start = 0
+        else:
+            names, keys, complete = self._ranking(program_whitelist, user)
+            score, row = decode_cursor(cursor)
+            start = bisect.bisect_right(keys, (-score, row))
+        end = start + limit
+        has_more = end < len(names) or (not complete and end == len(names))
+        next_cursor = encode_cursor(-keys[end - 1][0], keys[end - 1][1]) if has_more else None
+        return RankedPage(list(names[start:end]), next_cursor)
+
+    def stats(self) -> dict:
+        return {'version': self.version, 'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_memo: Optional[RankingMemo] = None
+_lock = threading.Lock()
+
+
+def get_memo(catalog: Optional[Catalog] = None) -> RankingMemo:
+    """Return the memo for the current catalog, replacing it when the catalog version changes."""
+    global _memo
+    catalog = catalog or get_catalog()
+    memo = _memo
+    if memo is None or memo.version != catalog.version:
+        with _lock:
+            if _memo is None or _memo.version != catalog.version:
+                _memo = RankingMemo(catalog.programs_df, version=catalog.version)
+            memo = _memo
+    return memo
@@ -0,0 +1,233 @@
+"""Declarative eligibility scoring rules.
+
+The weights `RankProgramsBot` uses live in `data/ranking_rules.json`. Each
+rule compares one `User` field with one catalog column (two for ranges) and
+adds its `match` or `mismatch` points to the program's score. A rule is
+skipped for a program when either the user's value or the program's value
+is unknown.
+
+`RuleSet.compile(df)` converts the columns the rules read into float arrays
+once. Scoring a user is then one vectorized expression per rule over the
+whole catalog, so adding a criterion adds no per-program Python work.
+(Range lookups that only need the matching programs, such as ruling out
+candidates by age or income, use the sorted indexes in
+`services.range_index` instead; see
+`WelfareProgramEligibilityOptimizer.programs_outside_ranges`.)
+
+Ops (`u` = user value, `c` = column value):
+    eq       u == c
+    le       u <= c
+    ge       u >= c
+    between  c[0] <= u <= c[1]
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Dict, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, model_validator
+
+from models.user import User
+
+RULES_PATH = Path(__file__).resolve().parents[1] / 'data' / 'ranking_rules.json'
+
+_ARITY = {'eq': 1, 'le': 1, 'ge': 1, 'between': 2}
+_TRUE_STRINGS = {'true', 'yes', '1'}
+_FALSE_STRINGS = {'false', 'no', '0'}
+
+
+def as_number(value) -> Optional[float]:
+    """Coerce a user or catalog value (bool, number, "TRUE"/"False", ...) to a float; None if unknown."""
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE_STRINGS:
+            return 1.0
+        if text in _FALSE_STRINGS:
+            return 0.0
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _column_array(column: pd.Series) -> np.ndarray:
+    if column.dtype == object:
+        column = column.map(as_number)
+    return column.astype(float).to_numpy()
+
+
+class Rule(BaseModel):
+    name: str
+    user_field: str
+    op: Literal['eq', 'le', 'ge', 'between']
+    columns: List[str]
+    match: int = 0
+    mismatch: int = 0
+
+    @model_validator(mode='after')
+    def _check(self):
+        if self.user_field not in User.model_fields:
+            raise ValueError(f"rule {self.name!r}: unknown user field {self.user_field!r}")
+        if len(self.columns) != _ARITY[self.op]:
+            raise ValueError(f"rule {self.name!r}: op {self.op!r} takes {_ARITY[self.op]} column(s), got {len(self.columns)}")
+        return self
+
+
+class RuleSet(BaseModel):
+    base_score: int = 0
+    min_score: int = 0  # programs must score strictly above this to be ranked
+    rules: List[Rule]
+
+    @classmethod
+    def load(cls, path: str | Path = RULES_PATH) -> 'RuleSet':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.model_validate(json.load(f))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(column for rule in self.rules for column in rule.columns))
+
+    def compile(self, df: pd.DataFrame) -> 'CompiledRules':
+        return CompiledRules(self, df)
+
+
+class CompiledRules:
+    """A rule set bound to the columns of one catalog DataFrame."""
+
+    def __init__(self, rule_set: RuleSet, df: pd.DataFrame):
+        """
+        Args:
+            rule_set: The rules to evaluate.
+            df: Catalog rows (programs) to score; must contain every column the rules read.
+        """
+        missing = [column for column in rule_set.columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"catalog is missing ranking rule columns: {missing}")
+        self.rule_set = rule_set
+        self.size = len(df)
+        self._columns: Dict[str, np.ndarray] = {column: _column_array(df[column]) for column in rule_set.columns}
+
+        # rows where every column a rule reads is known; None when that is all rows
+        self._known: List[Optional[np.ndarray]] = []
+        for rule in rule_set.rules:
+            known = np.logical_and.reduce([~np.isnan(self._columns[column]) for column in rule.columns])
+            self._known.append(None if known.all() else known)
+        self._thresholds: Optional[List[np.ndarray]] = None
+
+    def _rule_thresholds(self) -> List[np.ndarray]:
+        # distinct known values per rule column, sorted; built on first use
+        if self._thresholds is None:
+            self._thresholds = [np.unique(column[~np.isnan(column)]) for column in self._columns.values()]
+        return self._thresholds
+
+    def profile_key(self, user: User) -> tuple:
+        """Quantize `user` so that users with equal keys get identical scores.
+
+        Each rule maps the user's value to the bucket between the catalog's
+        distinct thresholds for that rule (e.g. the `max_monthly_income` caps),
+        so any two incomes between the same pair of caps share a key.
+        """
+        thresholds = dict(zip(self._columns, self._rule_thresholds()))
+        key = []
+        for rule in self.rule_set.rules:
+            value = as_number(getattr(user, rule.user_field, None))
+            if value is None:
+                key.append(None)
+                continue
+            values = thresholds[rule.columns[0]]
+            if rule.op == 'eq':
+                position = int(np.searchsorted(values, value))
+                key.append(value if position < len(values) and values[position] == value else 'other')
+            elif rule.op == 'le':
+                key.append(int(np.searchsorted(values, value, side='left')))
+            elif rule.op == 'ge':
+                key.append(int(np.searchsorted(values, value, side='right')))
+            else:
+                upper = thresholds[rule.columns[1]]
+                key.append((int(np.searchsorted(values, value, side='right')),
+                            int(np.searchsorted(upper, value, side='left'))))
+        return tuple(key)
+
+    def score(self, user: User) -> np.ndarray:
+        """Score of every row for `user` (int64 array aligned with the DataFrame)."""
+        scores = np.full(self.size, self.rule_set.base_score, dtype=np.int64)
+        for rule, known in zip(self.rule_set.rules, self._known):
+            value = as_number(getattr(user, rule.user_field, None))
+            if value is None:
+                continue
+            column = self._columns[rule.columns[0]]
+            if rule.op == 'eq':
+                hit = column == value
+            elif rule.op == 'le':
+                hit = value <= column
+            elif rule.op == 'ge':
+                hit = value >= column
+            else:
+                hit = (column <= value) & (value <= self._columns[rule.columns[1]])
+            points = np.where(hit, rule.match, rule.mismatch)
+            scores += points if known is None else np.where(known, points, 0)
+        return scores
+
+
+    def score_matrix(self, users: pd.DataFrame) -> np.ndarray:
+        """Scores of every row for many users at once (users x rows int32 matrix).
+
+        Args:
+            users: One row per user, columns named after `User` fields; a missing
+                column or NaN means the value is unknown.
+        """
+        scores = np.full((len(users), self.size), self.rule_set.base_score, dtype=np.int32)
+        for rule, known in zip(self.rule_set.rules, self._known):
+            if rule.user_field not in users.columns:
+                continue
+            values = _column_array(users[rule.user_field])
+            user_known = ~np.isnan(values)
+            if not user_known.any():
+                continue
+            values = values[:, None]
+            column = self._columns[rule.columns[0]][None, :]
+            # comparisons with NaN are False, so `hit` already excludes unknown values
+            if rule.op == 'eq':
+                hit = column == values
+            elif rule.op == 'le':
+                hit = values <= column
+            elif rule.op == 'ge':
+                hit = values >= column
+            else:
+                hit = (column <= values) & (values <= self._columns[rule.columns[1]][None, :])
+            # bool * int32 scalar stays int32; much faster than np.add(..., where=mask)
+            if rule.mismatch:
+                applies = user_known[:, None] if known is None else user_known[:, None] & known[None, :]
+                scores += applies * np.int32(rule.mismatch)
+            if rule.match != rule.mismatch:
+                scores += hit * np.int32(rule.match - rule.mismatch)
+        return scores
+
+
+_rules: Optional[RuleSet] = None
+_lock = threading.Lock()
+
+
+def get_rules() -> RuleSet:
+    """Return the process-wide rule set, loading `RULES_PATH` on first use."""
+    global _rules
+    if _rules is None:
+        with _lock:
+            if _rules is None:
+                _rules = RuleSet.load()
+    return _rules
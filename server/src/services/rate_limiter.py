@@ -0,0 +1,241 @@
+"""Client-side model quota: a token bucket per model with a priority queue in front.
+
+Provider quotas are requests per minute per model. Without a limiter every
+burst above the quota fails at the provider and is retried by every
+conversation at once. `PriorityLimiter` makes callers wait for a token
+instead. The token goes to the most important waiter first, and callers
+with the same priority are served in arrival order:
+
+    COMPLETING   calls that finish a conversation step the user is waiting on
+                 (stage-B field extraction, inline stage-A candidate listing)
+    INTERACTIVE  conversational turns (stage-A chat)
+    BACKGROUND   speculative work (candidate prefetch)
+
+A caller can pass a `Ticket` instead of a priority and raise its priority
+while it waits, e.g. when a user turn starts waiting on a prefetch that is
+still queued as BACKGROUND.
+
+Backpressure: once `max_queue` callers are waiting, `acquire` raises
+`QueueFull` immediately. A caller that cannot get a token within its
+timeout gets `QueueTimeout`. Either way the app serves the local fallback
+instead of piling more work onto the quota.
+
+Limits are opt-in: only models listed in MODEL_RPM are limited, e.g. the
+free-tier quotas "gemma-3-27b-it=30,gemini-2.5-flash-lite=15". The limits
+in effect are logged when the limiter is built.
+
+The buckets are per process. `ModelLimiter.from_env` therefore divides
+each model's quota by the number of server workers (WEB_CONCURRENCY,
+which `server.py` sets for its gunicorn workers). The combined rate of
+all workers then stays within the provider quota. A worker cannot borrow
+the unused share of an idle worker. By default the queue holds one caller
+fewer than the worker has request threads (THREADS). So when every other
+thread is already waiting for quota, the next model call fails fast
+instead of tying up the last thread as well.
+
+Usage:
+    limiter = ModelLimiter.from_env()
+    limiter.acquire('gemma-3-27b-it', INTERACTIVE)   # blocks until a request may be sent
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+COMPLETING = 0
+INTERACTIVE = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {COMPLETING: 'completing', INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(RuntimeError):
+    """Raised instead of queueing when too many callers are already waiting."""
+
+
+class QueueTimeout(RuntimeError):
+    """Raised when no token became available within the caller's timeout."""
+
+
+class Ticket:
+    """A caller's priority in the queue; `raise_to` moves it up while the caller waits."""
+
+    def __init__(self, priority: int = INTERACTIVE):
+        self.priority = priority
+        self._lock = threading.Lock()
+        self._limiter: Optional['PriorityLimiter'] = None  # the limiter it is queued in
+
+    def raise_to(self, priority: int) -> None:
+        with self._lock:
+            self.priority = min(self.priority, priority)
+            limiter = self._limiter
+        if limiter is not None:
+            limiter._reorder()
+
+    def _enqueue(self, limiter: Optional['PriorityLimiter']) -> None:
+        with self._lock:
+            self._limiter = limiter
+
+
+def priority_name(priority) -> str:
+    """Name of an int priority or of a `Ticket`'s current priority."""
+    priority = priority.priority if isinstance(priority, Ticket) else priority
+    return PRIORITY_NAMES.get(priority, str(priority))
+
+
+class PriorityLimiter:
+    """Token bucket (`rate_per_minute`, `burst`) served to waiters in priority order."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None, *, max_queue: int = 64,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate_per_minute: Sustained request rate (the provider quota).
+            burst: Bucket capacity; defaults to a quarter of a minute's quota.
+            max_queue: Waiting callers beyond which `acquire` fails fast.
+            clock: Monotonic time source.
+        """
+        if rate_per_minute <= 0:
+            raise ValueError('rate_per_minute must be positive')
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.burst = max(1, int(rate_per_minute // 4) if burst is None else burst)
+        self.max_queue = max_queue
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._waiters: List[tuple] = []  # heap of (priority, arrival, ticket)
+        self._arrivals = itertools.count()
+        self._stats: Dict[int, List[float]] = {p: [0, 0.0, 0.0] for p in PRIORITY_NAMES}  # granted, total wait, max wait
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reorder(self) -> None:
+        """Re-sort the queue after a waiter's ticket was raised."""
+        with self._cond:
+            self._waiters = [(ticket.priority, arrival, ticket) for _, arrival, ticket in self._waiters]
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, priority=INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """
+        Take one token, waiting behind higher-priority and earlier callers.
+
+        Args:
+            priority: `COMPLETING`, `INTERACTIVE` or `BACKGROUND`, or a `Ticket` holding one.
+            timeout: Seconds to wait at most (None waits indefinitely).
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        ticket = priority if isinstance(priority, Ticket) else Ticket(priority)
+        started = self.clock()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f'{len(self._waiters)} callers already waiting for model quota')
+            arrival = next(self._arrivals)
+            ticket._enqueue(self)
+            heapq.heappush(self._waiters, (ticket.priority, arrival, ticket))
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+                    head = self._waiters[0][1] == arrival
+                    if head and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    if deadline is not None and now >= deadline:
+                        self.timed_out += 1
+                        raise QueueTimeout(f'no model quota within {timeout:g}s')
+                    # the head waits for the next token; everyone else until notified
+                    wait = (1 - self._tokens) / self.rate if head else None
+                    if deadline is not None:
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                ticket._enqueue(None)
+                self._waiters = [waiter for waiter in self._waiters if waiter[1] != arrival]
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            waited = self.clock() - started
+            stats = self._stats.setdefault(ticket.priority, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += waited
+            stats[2] = max(stats[2], waited)
+            return waited
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(self.clock())
+            return {
+                'rate_per_minute': self.rate * 60.0,
+                'tokens': round(self._tokens, 2),
+                'queued': len(self._waiters),
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'wait': {PRIORITY_NAMES.get(p, str(p)): {'granted': int(n), 'mean_ms': round(1000 * total / n, 1) if n else 0.0,
+                                                         'max_ms': round(1000 * worst, 1)}
+                         for p, (n, total, worst) in self._stats.items()},
+            }
+
+
+class ModelLimiter:
+    """One `PriorityLimiter` per model; models without a quota are not limited."""
+
+    def __init__(self, rpm: Dict[str, float], *, max_queue: int = 64, timeout: Optional[float] = None):
+        """
+        Args:
+            rpm: Requests per minute per model name.
+            max_queue: Waiting callers per model beyond which calls fail fast.
+            timeout: Default seconds a caller waits for a token.
+        """
+        self.timeout = timeout
+        self.limiters = {model: PriorityLimiter(rate, max_queue=max_queue) for model, rate in rpm.items() if rate > 0}
+
+    @classmethod
+    def from_env(cls) -> 'ModelLimiter':
+        """
+        Build from MODEL_RPM ("model=rpm,model=rpm" for the whole deployment;
+        unset or empty limits nothing), split evenly over WEB_CONCURRENCY
+        worker processes (default 1), plus MODEL_QUEUE_MAX (default
+        THREADS - 1) and MODEL_QUEUE_TIMEOUT.
+        """
+        rpm = {}
+        for item in filter(None, (part.strip() for part in os.getenv('MODEL_RPM', '').split(','))):
+            model, _, rate = item.partition('=')
+            rpm[model.strip()] = float(rate)
+        workers = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+        threads = max(1, int(os.getenv('THREADS', '4')))
+        limiter = cls({model: rate / workers for model, rate in rpm.items()},
+                      max_queue=int(os.getenv('MODEL_QUEUE_MAX', str(max(1, threads - 1)))),
+                      timeout=float(os.getenv('MODEL_QUEUE_TIMEOUT', '15')))
+        if limiter.limiters:
+            logger.info('Model quota per worker (MODEL_RPM split over %d workers): %s', workers,
+                        ', '.join(f'{model}={bucket.rate * 60:g} rpm' for model, bucket in limiter.limiters.items()))
+        else:
+            logger.info('Model quota: not limited (MODEL_RPM is not set)')
+        return limiter
+
+    def acquire(self, model: str, priority=INTERACTIVE, timeout: Optional[float] = None) -> float:
+        """Wait for quota for one request to `model`; returns the seconds waited."""
+        limiter = self.limiters.get(model)
+        if limiter is None:
+            return 0.0
+        return limiter.acquire(priority, self.timeout if timeout is None else timeout)
+
+    def stats(self) -> dict:
+        return {model: limiter.stats() for model, limiter in self.limiters.items()}
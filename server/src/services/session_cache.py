@@ -0,0 +1,150 @@
+"""Bounded in-memory session container with LRU + idle-TTL eviction.
+
+At most `max_resident` sessions are kept in memory. Entries are ordered by
+last access, so the least recently used entries are also the most idle:
+evicting from the front handles both the size bound and the idle TTL in
+O(evicted). Evicted sessions are passed through `dump` and spilled to a
+JSON file in `spill_dir`; a later `get` for the same ID transparently loads
+(and removes) the spilled copy.
+
+Usage:
+    cache = BoundedSessionCache(max_resident=500, idle_ttl=1800, spill_dir='data/spill',
+                                dump=lambda chat: chat.history, load=rebuild_chat)
+    chat = cache.get(session_id) or cache.put(session_id, new_chat())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedSessionCache:
+    """LRU + idle-TTL session map that spills evicted sessions to disk."""
+
+    def __init__(self, *, max_resident: int = 1000, idle_ttl: Optional[float] = 1800.0,
+                 spill_dir: Optional[str | Path] = None, dump: Optional[Callable[[Any], Any]] = None,
+                 load: Optional[Callable[[Any], Any]] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_resident: Maximum number of sessions held in memory.
+            idle_ttl: Seconds without access after which a session is evicted (None = never).
+            spill_dir: Directory for evicted sessions; if None, evicted sessions are dropped.
+            dump: Converts a session into JSON-serializable data for spilling.
+            load: Rebuilds a session from spilled data.
+            clock: Time source (monotonic seconds).
+        """
+        if max_resident < 1:
+            raise ValueError('max_resident must be at least 1')
+        self.max_resident = max_resident
+        self.idle_ttl = idle_ttl
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            if dump is None or load is None:
+                raise ValueError('dump and load are required when spill_dir is set')
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._dump = dump
+        self._load = load
+        self._clock = clock
+        self._lock = threading.RLock()
+        # session_id -> (value, last_access)
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        if session_id in self._entries:
+            return True
+        path = self._spill_path(session_id)
+        return path is not None and path.exists()
+
+    def _spill_path(self, session_id: str) -> Optional[Path]:
+        if self.spill_dir is None:
+            return None
+        digest = hashlib.sha1(session_id.encode('utf-8')).hexdigest()
+        return self.spill_dir / f'{digest}.json'
+
+    def get(self, session_id: str) -> Optional[Any]:
+        """Return the session, reloading it from disk if it was spilled, or None."""
+        with self._lock:
+            self.evict_idle()
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries[session_id] = (entry[0], self._clock())
+                self._entries.move_to_end(session_id)
+                return entry[0]
+
+            path = self._spill_path(session_id)
+            if path is None or not path.exists():
+                return None
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = self._load(json.load(f))
+                path.unlink()
+            except (OSError, ValueError):
+                logger.exception('Failed to reload spilled session %s', session_id)
+                return None
+            self._insert(session_id, value)
+            return value
+
+    def put(self, session_id: str, value: Any) -> Any:
+        """Store (or replace) a session; returns `value`."""
+        with self._lock:
+            self.evict_idle()
+            self._insert(session_id, value)
+            return value
+
+    def pop(self, session_id: str) -> Optional[Any]:
+        """Remove a session from memory and disk, returning the resident value if any."""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            path = self._spill_path(session_id)
+            if path is not None and path.exists():
+                path.unlink()
+            return entry[0] if entry is not None else None
+
+    def _insert(self, session_id: str, value: Any) -> None:
+        self._entries[session_id] = (value, self._clock())
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_resident:
+            self._evict_oldest()
+
+    def evict_idle(self) -> int:
+        """Evict sessions idle for longer than `idle_ttl`; returns how many."""
+        if self.idle_ttl is None:
+            return 0
+        cutoff = self._clock() - self.idle_ttl
+        evicted = 0
+        with self._lock:
+            while self._entries:
+                _, last_access = next(iter(self._entries.values()))
+                if last_access > cutoff:
+                    break
+                self._evict_oldest()
+                evicted += 1
+        return evicted
+
+    def _evict_oldest(self) -> None:
+        session_id, (value, _) = self._entries.popitem(last=False)
+        self.evictions += 1
+        path = self._spill_path(session_id)
+        if path is None:
+            return
+        try:
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._dump(value), f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            logger.exception('Failed to spill session %s', session_id)
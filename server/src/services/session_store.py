@@ -0,0 +1,194 @@
+"""SQLite-backed conversation store shared by all server workers.
+
+Conversation state (stage, histories, asked questions, the partially filled
+`User`) is serialized compactly (JSON without defaults, zlib-compressed
+once it is large enough to benefit) and kept in a single SQLite table in
+WAL mode, so readers never block the writer and any worker process can
+serve any turn of any conversation without sticky load balancing.
+
+Every row carries a version. `load` records the version it read on the
+returned Conversation (`store_version`), and `save` commits the new state
+before returning, with a compare-and-swap on that version. If another turn
+of the same session (on any worker) saved in between, `save` raises
+`SessionConflict` instead of overwriting it or being silently lost.
+Decoded-ready blobs are cached in memory. A cached entry is used only after a
+cheap primary-key check shows that its version is still the current one.
+
+Usage:
+    store = SessionStore('data/sessions.db')
+    conv = store.load(session_id)
+    ...mutate conv...
+    store.save(conv)   # raises SessionConflict if conv is no longer the latest state
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+from models.conversation import Conversation
+
+logger = logging.getLogger(__name__)
+
+_RAW = b'j'
+_ZLIB = b'z'
+_COMPRESS_MIN_BYTES = 512
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    state BLOB NOT NULL
+) WITHOUT ROWID
+'''
+
+_INSERT = '''
+INSERT INTO sessions (session_id, version, updated_at, state) VALUES (?, ?, ?, ?)
+ON CONFLICT(session_id) DO NOTHING
+'''
+
+_UPDATE = '''
+UPDATE sessions SET version = ?, updated_at = ?, state = ?
+WHERE session_id = ? AND version = ?
+'''
+
+
+class SessionConflict(RuntimeError):
+    """Raised by `save` when the session was saved by another turn after `conv` was loaded."""
+
+
+def encode(conv: Conversation) -> bytes:
+    raw = conv.model_dump_json(exclude_defaults=True).encode('utf-8')
+    if len(raw) >= _COMPRESS_MIN_BYTES:
+        return _ZLIB + zlib.compress(raw, 6)
+    return _RAW + raw
+
+
+def decode(blob: bytes, version: int = 0) -> Conversation:
+    kind, body = blob[:1], blob[1:]
+    if kind == _ZLIB:
+        body = zlib.decompress(body)
+    elif kind != _RAW:
+        raise ValueError(f'Unknown session encoding {kind!r}')
+    conv = Conversation.model_validate_json(body)
+    conv.store_version = version
+    return conv
+
+
+class _Entry:
+    __slots__ = ('version', 'blob')
+
+    def __init__(self, version: int, blob: bytes):
+        self.version = version
+        self.blob = blob
+
+
+class SessionStore:
+    """Write-through, version-checked conversation store on SQLite (WAL) with a read cache."""
+
+    def __init__(self, db_path: str | Path, *, cache_size: int = 10_000):
+        """
+        Args:
+            db_path: SQLite database file (created if missing).
+            cache_size: Maximum number of sessions kept decoded-ready in memory.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(_SCHEMA)
+        conn.commit()
+
+        # the store may be created in a preloading master process; a forked
+        # worker must not reuse its SQLite connection or lock
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per-thread; each request thread gets its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Conversation:
+        """Return the latest state for `session_id`, or a fresh Conversation."""
+        with self._lock:
+            entry = self._cache.get(session_id)
+            if entry is not None:
+                self._cache.move_to_end(session_id)
+
+        conn = self._conn()
+        if entry is not None:
+            row = conn.execute('SELECT version FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            if row is not None and row[0] == entry.version:
+                return decode(entry.blob, entry.version)
+
+        row = conn.execute('SELECT version, state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        if row is None:
+            self._drop(session_id)
+            return Conversation(session_id=session_id)
+        version, blob = row
+        self._put(session_id, _Entry(version, bytes(blob)))
+        return decode(blob, version)
+
+    def _put(self, session_id: str, entry: _Entry) -> None:
+        with self._lock:
+            current = self._cache.get(session_id)
+            if current is not None and current.version > entry.version:
+                return
+            self._cache[session_id] = entry
+            self._cache.move_to_end(session_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _drop(self, session_id: str) -> None:
+        with self._lock:
+            self._cache.pop(session_id, None)
+
+    def save(self, conv: Conversation) -> None:
+        """
+        Commit `conv` as the next version of its session.
+
+        Raises:
+            SessionConflict: The session changed since `conv` was loaded
+                (`conv.store_version`); nothing was written.
+        """
+        blob = encode(conv)
+        sid = conv.session_id
+        expected = conv.store_version
+        version = expected + 1
+        conn = self._conn()
+        if expected == 0:
+            cursor = conn.execute(_INSERT, (sid, version, time.time(), blob))
+        else:
+            cursor = conn.execute(_UPDATE, (version, time.time(), blob, sid, expected))
+        if cursor.rowcount != 1:
+            self._drop(sid)
+            raise SessionConflict(f'session {sid} was saved by another request since version {expected}')
+        conv.store_version = version
+        self._put(sid, _Entry(version, blob))
+
+    def delete(self, session_id: str) -> None:
+        self._drop(session_id)
+        conn = self._conn()
+        conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
@@ -157,19 +157,36 @@ all_questions = [
     ]]
 
 
+# Read-only view of the bank shared by every session; sessions never modify it
+QUESTION_GROUPS = tuple(tuple(group) for group in all_questions)
+ALL_GROUPS = (1 << len(QUESTION_GROUPS)) - 1  # bitmask with every group remaining
+
+
+def remaining_groups(remaining):
+    """Indices of the groups whose bit is set in the `remaining` bitmask."""
+    return [i for i in range(len(QUESTION_GROUPS)) if remaining >> i & 1]
+
+
 class query_user:
-    def __init__(self):
-        self.questions = all_questions
-        self.all_responses = "Question: What's your monthly income?"
+    def __init__(self, remaining=None, all_responses=None, rng=random):
+        # bitmask of the question groups not yet asked in this session (bit i = QUESTION_GROUPS[i])
+        self.remaining = ALL_GROUPS if remaining is None else remaining
+        self.all_responses = "Question: What's your monthly income?" if all_responses is None else all_responses
+        self.rng = rng
 
     def next_question(self):
-        cache = self.questions.pop(random.randint(0, len(self.questions) - 1))
+        """Ask a random phrasing from a random group not yet asked; starts over once every group has been asked."""
+        if not self.remaining & ALL_GROUPS:
+            self.remaining = ALL_GROUPS
+        groups = remaining_groups(self.remaining)
+        group = groups[self.rng.randrange(len(groups))]
+        self.remaining &= ~(1 << group)
 
-        return cache[random.randint(0, len(cache) - 1)]
+        cache = QUESTION_GROUPS[group]
+        return cache[self.rng.randrange(len(cache))]
 
     def update_responses(self, input_str): 
         self.all_responses += str(input_str)
 
     def get_all_responses(self):
         return self.all_responses
-
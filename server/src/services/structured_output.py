@@ -0,0 +1,93 @@
+"""Typed model outputs: response schemas plus a local validator.
+
+The candidate listing and the stage-B field extraction ask the model for
+JSON constrained by a response schema (the SDK's JSON mode):
+
+- `CandidatePrograms`: the catalog ids (program card ids) of the matching programs;
+- `User`: the profile fields, typed and nullable.
+
+The validator (`parse_candidates`, `parse_user_fields`) still checks every
+response locally before it is used. Ids outside the catalog are dropped
+and values are coerced with the `User` field coercers. Text that is not
+plain JSON (code fences, prose around the object) is tolerated, which
+covers models without JSON mode (`gemma-*`), where the schema only goes
+into the prompt. Output that cannot be used raises `ValueError`, so the
+caller can fall back to the local pipeline.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from models.user import User, coerce_fields
+from services.program_cards import ProgramCards
+
+
+class CandidatePrograms(BaseModel):
+    program_ids: List[int]
+
+
+def supports_schema(model: str) -> bool:
+    """Whether `model` accepts `response_schema` (Gemini does; Gemma on the same API does not)."""
+    return model.startswith('gemini-')
+
+
+def schema_config(model: str, schema: type[BaseModel]) -> Optional[dict]:
+    """`generate_content` config for JSON output matching `schema`, or None if `model` has no JSON mode."""
+    if not supports_schema(model):
+        return None
+    return {'response_mime_type': 'application/json', 'response_schema': schema}
+
+
+_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+_BLOCK = re.compile(r'\{[\s\S]*\}|\[[\s\S]*\]')
+
+
+def load_json(text: str) -> Any:
+    """Parse JSON model output, tolerating code fences and text around a single object or list."""
+    text = _FENCE.sub('', text or '')
+    try:
+        return json.loads(text)
+    except ValueError:
+        m = _BLOCK.search(text)
+        if m is None:
+            raise ValueError('no JSON in model output') from None
+        return json.loads(m.group(0))
+
+
+def parse_candidates(response, cards: ProgramCards) -> List[str]:
+    """
+    Program names from a `CandidatePrograms` response.
+
+    Args:
+        response: The `generate_content` response.
+        cards: Resolves card ids to names; unknown ids are dropped.
+
+    Returns:
+        list[str]: Catalog names, in the model's order, without duplicates.
+    """
+    result = getattr(response, 'parsed', None)
+    if not isinstance(result, CandidatePrograms):
+        data = load_json(getattr(response, 'text', ''))
+        try:
+            # a bare list of ids is accepted too
+            result = CandidatePrograms.model_validate({'program_ids': data} if isinstance(data, list) else data)
+        except ValidationError as e:
+            raise ValueError(f'model output does not match CandidatePrograms: {e.error_count()} errors') from None
+    return [cards.names[i] for i in dict.fromkeys(result.program_ids) if 0 <= i < len(cards.names)]
+
+
+def parse_user_fields(response) -> dict:
+    """The known `User` fields with a value, coerced to their types, from a `User` response."""
+    parsed = getattr(response, 'parsed', None)
+    if isinstance(parsed, User):
+        data = parsed.model_dump()
+    else:
+        data = load_json(getattr(response, 'text', ''))
+        if not isinstance(data, dict):
+            raise ValueError('model output is not a JSON object')
+    return {name: value for name, value in coerce_fields(data).items() if value is not None}
@@ -0,0 +1,221 @@
+"""Synthetic program catalogs and user profiles for scale testing.
+
+The shipped `All_Programs_Data.csv` only has a few dozen rows. This module
+generates arbitrarily large catalogs with the same 13-column schema, plus
+matching description/link JSON and populations of `User` profiles.
+
+Catalog rows are drawn from the real rows as archetypes and then perturbed
+(age bounds jittered, income caps rescaled log-normally, boolean
+requirements flipped with a small probability), so the joint structure of
+the real data (e.g. children's programs having low `max_age`) carries over.
+Generation is vectorized and seeded: the same seed and size always produce
+the same output, independent of what else was generated first.
+
+CLI (run from `server/src`):
+    python -m services.synthetic_data --programs 1000000 --users 50000 --seed 7 --out data/synthetic
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFERENCE_CSV = Path(__file__).resolve().parents[1] / 'data' / 'All_Programs_Data.csv'
+
+CATALOG_COLUMNS = [
+    'program',
+    'min_age',
+    'max_age',
+    'is_only_for_citizens_and_lawful_residents',
+    'needs_permanent_address',
+    'household_size_considered',
+    'max_monthly_income',
+    'employment_required',
+    'disability_status_considered',
+    'is_veteran',
+    'criminal_record_disqualifying',
+    'is_for_children',
+    'is_for_refugees',
+]
+BOOL_COLUMNS = [c for c in CATALOG_COLUMNS if c not in ('program', 'min_age', 'max_age', 'max_monthly_income')]
+
+# Base rates for generated users, roughly matching US population figures
+USER_BOOL_RATES: Dict[str, float] = {
+    'citizen_or_lawful_resident': 0.92,
+    'has_permanent_address': 0.86,
+    'lives_with_people': 0.72,
+    'employed': 0.58,
+    'disabled': 0.14,
+    'is_veteran': 0.06,
+    'has_criminal_record': 0.08,
+    'has_children': 0.38,
+    'is_refugee': 0.02,
+}
+
+_NAME_PREFIXES = np.array(['Community', 'State', 'Federal', 'County', 'Regional', 'Family', 'Senior', 'Youth', 'Neighborhood', 'Emergency'])
+_NAME_KINDS = np.array(['Food Assistance', 'Housing Support', 'Health Coverage', 'Childcare Subsidy', 'Energy Assistance',
+                        'Job Training', 'Legal Aid', 'Transportation Voucher', 'Disability Services', 'Veterans Benefit'])
+
+# Independent RNG streams so each artifact is reproducible on its own
+_STREAM_CATALOG = 1
+_STREAM_USERS = 2
+
+
+class SyntheticDataGenerator:
+    """Seeded generator for catalogs, catalog JSON and user populations.
+
+    Usage:
+        gen = SyntheticDataGenerator(seed=7)
+        programs = gen.catalog(1_000_000)
+        descriptions, links = gen.descriptions(programs), gen.links(programs)
+        users = gen.users(10_000)
+    """
+
+    def __init__(self, reference: Optional[pd.DataFrame | str | Path] = None, *, seed: int = 0, flip_rate: float = 0.05):
+        """
+        Args:
+            reference: DataFrame or CSV path of real programs to use as archetypes
+                (defaults to the shipped All_Programs_Data.csv).
+            seed: Seed for all generated artifacts.
+            flip_rate: Probability of flipping each boolean requirement of an archetype.
+        """
+        if reference is None:
+            reference = DEFAULT_REFERENCE_CSV
+        if not isinstance(reference, pd.DataFrame):
+            reference = pd.read_csv(reference)
+        missing = set(CATALOG_COLUMNS) - set(reference.columns)
+        if missing:
+            raise ValueError(f'Reference catalog is missing columns: {sorted(missing)}')
+        self.reference = reference[CATALOG_COLUMNS].reset_index(drop=True)
+        self.seed = seed
+        self.flip_rate = flip_rate
+
+    def _rng(self, stream: int, n: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, stream, n])
+
+    def catalog(self, n: int) -> pd.DataFrame:
+        """Return an n-row program catalog with the real 13-column schema."""
+        rng = self._rng(_STREAM_CATALOG, n)
+        ref = self.reference
+        picks = rng.integers(0, len(ref), size=n)
+
+        # Unique, readable program names
+        ids = np.arange(n)
+        names = (pd.Series(_NAME_PREFIXES[rng.integers(0, len(_NAME_PREFIXES), n)])
+                 + ' ' + pd.Series(_NAME_KINDS[rng.integers(0, len(_NAME_KINDS), n)])
+                 + ' Program ' + pd.Series(ids).astype(str))
+
+        min_age = ref['min_age'].to_numpy()[picks].astype('int64')
+        max_age = ref['max_age'].to_numpy()[picks].astype('int64')
+        # Jitter age bounds, keeping open-ended bounds (0 / 150) where they are
+        min_age = np.where(min_age > 0, np.clip(min_age + rng.integers(-3, 4, n), 0, 120), 0)
+        max_age = np.where(max_age < 150, np.clip(max_age + rng.integers(-3, 4, n), 1, 149), 150)
+        max_age = np.maximum(max_age, min_age)
+
+        income = ref['max_monthly_income'].to_numpy()[picks].astype('float64')
+        income = np.round(income * rng.lognormal(mean=0.0, sigma=0.25, size=n), -1).astype('int64')
+
+        out = pd.DataFrame({'program': names, 'min_age': min_age, 'max_age': max_age, 'max_monthly_income': income})
+        flips = rng.random((n, len(BOOL_COLUMNS))) < self.flip_rate
+        for j, col in enumerate(BOOL_COLUMNS):
+            values = ref[col].to_numpy(dtype=bool)[picks]
+            out[col] = values ^ flips[:, j]
+        return out[CATALOG_COLUMNS]
+
+    def descriptions(self, catalog: pd.DataFrame) -> Dict[str, str]:
+        """Return a {program: description} mapping in the style of social_welfare_programs.json."""
+        text = (catalog['program'] + ' helps eligible residents aged ' + catalog['min_age'].astype(str)
+                + ' to ' + catalog['max_age'].astype(str) + ' with a monthly income of up to $'
+                + catalog['max_monthly_income'].astype(str) + '.')
+        text = text.where(~catalog['is_for_children'], text + ' Families with children are prioritized.')
+        text = text.where(~catalog['is_veteran'], text + ' Open to veterans of the U.S. armed forces.')
+        text = text.where(~catalog['disability_status_considered'], text + ' Supports people living with disabilities.')
+        return dict(zip(catalog['program'], text))
+
+    def links(self, catalog: pd.DataFrame) -> Dict[str, str]:
+        """Return a {program: link} mapping in the style of social_links.json."""
+        slugs = catalog['program'].str.lower().str.replace(r'[^a-z0-9]+', '-', regex=True)
+        return dict(zip(catalog['program'], 'https://benefits.example.gov/programs/' + slugs))
+
+    def users(self, n: int, *, missing_rate: float = 0.0) -> pd.DataFrame:
+        """Return n user profiles with the `User` model's fields as columns.
+
+        Args:
+            n: Number of profiles.
+            missing_rate: Probability that any single field is unknown (None),
+                mimicking partially extracted conversations.
+        """
+        rng = self._rng(_STREAM_USERS, n)
+        # Adults dominate; a minority of profiles are filled in for minors or seniors
+        age = np.where(rng.random(n) < 0.12, rng.integers(65, 95, n),
+                       np.where(rng.random(n) < 0.08, rng.integers(0, 18, n), rng.integers(18, 65, n)))
+        income = np.round(rng.lognormal(mean=7.6, sigma=0.7, size=n), -1).astype('int64')
+        users = {'age': age}
+        for field, rate in USER_BOOL_RATES.items():
+            users[field] = rng.random(n) < rate
+        # Unemployed users mostly report little or no income
+        income = np.where(users['employed'] | (rng.random(n) < 0.3), income, 0)
+        users['monthly_income'] = income
+
+        df = pd.DataFrame(users)[['age', 'citizen_or_lawful_resident', 'has_permanent_address', 'lives_with_people',
+                                  'monthly_income', 'employed', 'disabled', 'is_veteran', 'has_criminal_record',
+                                  'has_children', 'is_refugee']]
+        if missing_rate > 0:
+            mask = rng.random(df.shape) < missing_rate
+            df = df.astype(object).mask(mask, None)
+        return df
+
+    def write(self, out_dir: str | Path, *, programs: int, users: int = 0, missing_rate: float = 0.0, with_json: bool = True) -> Dict[str, Path]:
+        """Write a catalog CSV, its description/link JSON and a users JSONL to `out_dir`."""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths: Dict[str, Path] = {}
+
+        catalog = self.catalog(programs)
+        paths['catalog'] = out_dir / 'All_Programs_Data.csv'
+        # match the real CSV's TRUE/FALSE spelling
+        catalog.assign(**{c: catalog[c].map({True: 'TRUE', False: 'FALSE'}) for c in BOOL_COLUMNS}).to_csv(paths['catalog'], index=False)
+        if with_json:
+            paths['descriptions'] = out_dir / 'social_welfare_programs.json'
+            paths['links'] = out_dir / 'social_links.json'
+            with open(paths['descriptions'], 'w', encoding='utf-8') as f:
+                json.dump(self.descriptions(catalog), f)
+            with open(paths['links'], 'w', encoding='utf-8') as f:
+                json.dump(self.links(catalog), f)
+        if users:
+            paths['users'] = out_dir / 'users.jsonl'
+            self.users(users, missing_rate=missing_rate).to_json(paths['users'], orient='records', lines=True)
+
+        logger.info('Wrote synthetic data to %s', out_dir)
+        return paths
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Generate a synthetic program catalog and user profiles.')
+    parser.add_argument('--programs', type=int, required=True, help='number of catalog rows')
+    parser.add_argument('--users', type=int, default=0, help='number of user profiles (JSONL)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--flip-rate', type=float, default=0.05)
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='fraction of unknown user fields')
+    parser.add_argument('--reference', type=Path, default=DEFAULT_REFERENCE_CSV, help='real catalog CSV to use as archetypes')
+    parser.add_argument('--no-json', action='store_true', help='skip description/link JSON')
+    parser.add_argument('--out', type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    gen = SyntheticDataGenerator(args.reference, seed=args.seed, flip_rate=args.flip_rate)
+    paths = gen.write(args.out, programs=args.programs, users=args.users,
+                      missing_rate=args.missing_rate, with_json=not args.no_json)
+    for kind, path in paths.items():
+        print(f'{kind}: {path}')
+
+
+if __name__ == '__main__':
+    main()
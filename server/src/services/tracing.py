@@ -0,0 +1,310 @@
+"""Lightweight per-request tracing spans and an on-demand profiling hook.
+
+Spans are cheap timing records (name, start, duration, parent) collected per
+request and exported as one JSON object per line to a local trace file. A
+request's spans are buffered in memory and written in a single append when
+its root span ends, so the hot path never touches the file.
+
+Tracing is enabled by setting the ``TRACE_FILE`` environment variable (or by
+calling ``configure``). When disabled, ``span`` is a near no-op.
+
+The profiling hook lets an operator arm cProfile or a sampling profiler for
+the next N requests; each profiled request dumps its stats into a directory:
+
+    profiler.arm(5, mode='cprofile', out_dir='profiles')
+    with profiler.maybe_profile(label='stage_b'):
+        handle_request()
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _SpanRecord:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'duration_ms', 'attrs')
+
+    def __init__(self, trace_id: str, span_id: str, parent_id: Optional[str], name: str, attrs: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration_ms = 0.0
+        self.attrs = attrs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms, 3),
+            'attrs': self.attrs,
+        }
+
+
+class _TraceState:
+    __slots__ = ('trace_id', 'spans', 'stack')
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[_SpanRecord] = []
+        self.stack: List[str] = []
+
+
+class JsonlSpanExporter:
+    """Append finished traces to a JSONL file, one span per line."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[_SpanRecord]) -> None:
+        if not spans:
+            return
+        payload = ''.join(json.dumps(s.to_dict(), default=str) + '\n' for s in spans)
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+        except OSError:
+            logger.exception('Failed to write spans to %s', self.path)
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+_current: contextvars.ContextVar[Optional[_TraceState]] = contextvars.ContextVar('trace_state', default=None)
+
+
+def configure(path: Optional[str | Path] = None) -> None:
+    """Enable tracing to `path`, or disable it when `path` is None."""
+    global _exporter
+    _exporter = JsonlSpanExporter(path) if path else None
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def current_trace_id() -> Optional[str]:
+    state = _current.get()
+    return state.trace_id if state is not None else None
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Time a block of code as a child of the current span.
+
+    If no trace is active this opens a root span, so service code can be
+    traced on its own (e.g. from a script). Yields the span's attribute dict
+    so callers can attach results (``s['rows'] = len(df)``), or None when
+    tracing is disabled.
+    """
+    if _exporter is None:
+        yield None
+        return
+
+    state = _current.get()
+    token = None
+    if state is None:
+        state = _TraceState(uuid.uuid4().hex)
+        token = _current.set(state)
+
+    record = _SpanRecord(state.trace_id, uuid.uuid4().hex[:16], state.stack[-1] if state.stack else None, name, attrs)
+    state.stack.append(record.span_id)
+    t0 = time.perf_counter()
+    try:
+        yield record.attrs
+    except BaseException as exc:
+        record.attrs['error'] = type(exc).__name__
+        raise
+    finally:
+        record.duration_ms = (time.perf_counter() - t0) * 1000.0
+        state.stack.pop()
+        state.spans.append(record)
+        if token is not None:
+            _current.reset(token)
+            exporter = _exporter
+            if exporter is not None:
+                exporter.export(state.spans)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `span`; defaults the span name to the function's qualname."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """Periodically sample one thread's stack and count collapsed stacks.
+
+    Output is in the "folded" format understood by flamegraph tools:
+    ``module:func;module:func count``.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{Path(code.co_filename).stem}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class ProfilerController:
+    """Profile the next N requests on demand.
+
+    `arm` is called from an admin endpoint; request handlers wrap their work
+    in `maybe_profile`, which is free when nothing is armed.
+    """
+
+    MODES = ('cprofile', 'sample')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._mode = 'cprofile'
+        self._out_dir = Path('profiles')
+        self._written: List[str] = []
+        self._cprofile_active = threading.Lock()
+
+    def arm(self, requests: int, *, mode: str = 'cprofile', out_dir: str | Path = 'profiles') -> None:
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown profiling mode {mode!r}; expected one of {self.MODES}')
+        if requests < 0:
+            raise ValueError('requests must be non-negative')
+        with self._lock:
+            self._remaining = requests
+            self._mode = mode
+            self._out_dir = Path(out_dir)
+            self._written = []
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'remaining': self._remaining, 'mode': self._mode,
+                    'out_dir': str(self._out_dir), 'written': list(self._written)}
+
+    def _claim(self) -> Optional[tuple[str, Path]]:
+        if self._remaining <= 0:  # unlocked fast path
+            return None
+        with self._lock:
+            if self._remaining <= 0:
+                return None
+            self._remaining -= 1
+            return self._mode, self._out_dir
+
+    def _unclaim(self) -> None:
+        with self._lock:
+            self._remaining += 1
+
+    def _start(self, mode: str):
+        """Start a profiler for the current thread; None if this request cannot be profiled."""
+        if mode == 'cprofile':
+            # only one cProfile can be active per interpreter (3.12 raises otherwise);
+            # a request that overlaps a profiled one is simply not profiled
+            if not self._cprofile_active.acquire(blocking=False):
+                self._unclaim()
+                return None
+            try:
+                profile = cProfile.Profile()
+                profile.enable()
+                return profile
+            except Exception:
+                self._cprofile_active.release()
+                logger.warning('Could not start cProfile; request not profiled', exc_info=True)
+                return None
+        try:
+            sampler = SamplingProfiler(threading.get_ident())
+            sampler.start()
+            return sampler
+        except Exception:
+            logger.warning('Could not start the sampling profiler; request not profiled', exc_info=True)
+            return None
+
+    def _finish(self, mode: str, running, out_dir: Path, label: str) -> None:
+        try:
+            running.disable() if mode == 'cprofile' else running.stop()
+            out_dir.mkdir(parents=True, exist_ok=True)
+            stem = f'{time.strftime("%Y%m%d-%H%M%S")}-{label}-{current_trace_id() or uuid.uuid4().hex[:8]}'
+            if mode == 'cprofile':
+                path = out_dir / f'{stem}.prof'
+                running.dump_stats(str(path))
+            else:
+                path = out_dir / f'{stem}.folded'
+                running.dump(path)
+        except Exception:
+            logger.warning('Could not write %s profile', mode, exc_info=True)
+            return
+        finally:
+            if mode == 'cprofile':
+                self._cprofile_active.release()
+        with self._lock:
+            self._written.append(str(path))
+        logger.info('Wrote %s profile to %s', mode, path)
+
+    @contextmanager
+    def maybe_profile(self, label: str = 'request') -> Iterator[None]:
+        """Profile the wrapped block if a profile is armed; profiling errors never reach the caller."""
+        claim = self._claim()
+        running = None if claim is None else self._start(claim[0])
+        if running is None:
+            yield
+            return
+        mode, out_dir = claim
+        try:
+            yield
+        finally:
+            self._finish(mode, running, out_dir, label)
+
+
+profiler = ProfilerController()
+
+if os.getenv('TRACE_FILE'):
+    configure(os.getenv('TRACE_FILE'))
@@ -5,7 +5,8 @@ from pathlib import Path
 import logging
 import pandas as pd
 
-from src.models.welfare_program import WelfareProgram
+from models.welfare_program import WelfareProgram
+from services import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -170,6 +171,7 @@ class WelfareService:
         # Ensure required types align with Pydantic model expectations
         return WelfareProgram(**kwargs)
 
+    @tracing.traced("welfare_service.get_programs_by_name")
     def get_programs_by_name(self, names: List[str], *, include_missing: bool = False) -> List[WelfareProgram]:
         """Return list of WelfareProgram instances matching any of the provided names.
 
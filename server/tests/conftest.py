@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the app imports modules relative to server/src (`from services import ...`)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
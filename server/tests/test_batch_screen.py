@@ -0,0 +1,74 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from services.batch_screen import parse_candidates, screen_file
+from services.catalog import get_catalog
+
+
+@pytest.fixture(scope='module')
+def names():
+    return get_catalog().programs_df.iloc[:, 0].astype(str).tolist()
+
+
+@pytest.mark.parametrize('value, fmt, expected', [
+    (None, 'jsonl', None),
+    ([], 'jsonl', None),
+    (['SNAP', 'WIC'], 'jsonl', ['SNAP', 'WIC']),
+    (float('nan'), 'csv', None),
+    ('', 'csv', None),
+    ('["SNAP", "WIC"]', 'csv', ['SNAP', 'WIC']),
+])
+def test_parse_candidates(value, fmt, expected):
+    assert parse_candidates(value, fmt) == expected
+
+
+@pytest.mark.parametrize('value, fmt', [
+    ('SNAP', 'jsonl'),
+    ('SNAP', 'csv'),
+    ('{"a": 1}', 'csv'),
+    ([1, 2], 'jsonl'),
+    ({'SNAP': True}, 'jsonl'),
+])
+def test_parse_candidates_rejects(value, fmt):
+    with pytest.raises(ValueError):
+        parse_candidates(value, fmt)
+
+
+def _screen(path, **options):
+    output = io.StringIO()
+    count = screen_file(path, output, workers=1, chunk_size=2, candidates_field='candidates', **options)
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert count == len(lines)
+    return {line['id']: line for line in lines}
+
+
+def test_csv_candidates(tmp_path, names):
+    path = tmp_path / 'profiles.csv'
+    pd.DataFrame({
+        'id': ['empty', 'listed', 'bare', 'bad_age'],
+        'age': [34, 34, 34, 'old'],
+        'candidates': [None, json.dumps(names[:3]), names[0], None],
+    }).to_csv(path, index=False)
+    results = _screen(path)
+    assert 'programs' in results['empty']
+    assert set(results['listed']['programs']) <= set(names[:3])
+    assert 'candidates' in results['bare']['error']
+    assert 'age' in results['bad_age']['error']
+
+
+def test_jsonl_candidates(tmp_path, names):
+    path = tmp_path / 'profiles.jsonl'
+    profiles = [
+        {'id': 'listed', 'age': 34, 'candidates': names[:2]},
+        {'id': 'string', 'age': 34, 'candidates': names[0]},
+        {'id': 'none', 'age': 34},
+    ]
+    path.write_text('\n'.join(map(json.dumps, profiles)) + '\nnot json\n')
+    results = _screen(path)
+    assert set(results['listed']['programs']) <= set(names[:2])
+    assert 'error' in results['string']
+    assert 'programs' in results['none']
+    assert 'invalid JSON' in results[3]['error']
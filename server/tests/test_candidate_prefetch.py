@@ -0,0 +1,62 @@
+import threading
+
+from services.candidate_prefetch import CandidatePrefetcher
+from services.rate_limiter import COMPLETING, QueueTimeout
+
+HISTORY = ['user: I lost my job', 'model: Sorry to hear that']
+
+
+def test_prefetch_hit():
+    prefetcher = CandidatePrefetcher(lambda history: ['inline'], background_fetch=lambda history, priority: ['prefetched'])
+    prefetcher.start('s1', HISTORY)
+    assert prefetcher.get('s1', HISTORY, timeout=5) == (['prefetched'], True)
+
+
+def test_failed_prefetch_is_fetched_inline():
+    def background(history, priority):
+        raise QueueTimeout('no model quota within 15s')
+
+    prefetcher = CandidatePrefetcher(lambda history: ['inline'], background_fetch=background)
+    prefetcher.start('s1', HISTORY)
+    assert prefetcher.get('s1', HISTORY, timeout=5) == (['inline'], False)
+    assert prefetcher.stats()['hits'] == 0
+
+
+def test_changed_history_is_fetched_inline():
+    prefetcher = CandidatePrefetcher(lambda history: ['inline'], background_fetch=lambda history, priority: ['prefetched'])
+    prefetcher.start('s1', HISTORY)
+    assert prefetcher.get('s1', HISTORY + ['user: one more thing'], timeout=5) == (['inline'], False)
+
+
+def test_queued_prefetch_is_raised_to_completing():
+    started, release = threading.Event(), threading.Event()
+    priorities = []
+
+    def background(history, priority):
+        started.set()
+        release.wait(5)  # stands in for waiting in the quota queue
+        priorities.append(priority.priority)
+        return ['prefetched']
+
+    prefetcher = CandidatePrefetcher(lambda history: ['inline'], background_fetch=background)
+    prefetcher.start('s1', HISTORY)
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    assert prefetcher.get('s1', HISTORY, timeout=5) == (['prefetched'], True)
+    assert priorities == [COMPLETING]
+
+
+def test_prefetch_not_started_is_fetched_inline_at_once():
+    release = threading.Event()
+
+    def background(history, priority):
+        release.wait(5)
+        return ['prefetched']
+
+    prefetcher = CandidatePrefetcher(lambda history: ['inline'], background_fetch=background, max_workers=1)
+    prefetcher.start('busy', ['user: someone else'])
+    prefetcher.start('s1', HISTORY)
+    try:
+        assert prefetcher.get('s1', HISTORY, timeout=5) == (['inline'], False)
+    finally:
+        release.set()
@@ -0,0 +1,71 @@
+import pytest
+
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail():
+    raise RuntimeError('provider error')
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    breaker = CircuitBreaker('test', min_calls=2, failure_threshold=0.5, open_seconds=30, clock=clock)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+    assert breaker.state == OPEN
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    return breaker
+
+
+def test_open_rejects_without_calling(clock):
+    breaker = CircuitBreaker('test', min_calls=1, clock=clock)
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    calls = []
+    with pytest.raises(CircuitOpen):
+        breaker.call(calls.append, 1)
+    assert calls == [] and breaker.rejected == 1
+
+
+def test_half_open_probe_slot_is_reserved(breaker):
+    assert breaker.allow()
+    assert not breaker.allow()  # the only probe slot is taken
+    assert breaker.run(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+
+def test_released_slot_can_be_reused(breaker):
+    assert breaker.allow()
+    breaker.release()  # e.g. the caller got no quota
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(breaker, clock):
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    clock.now += 29
+    assert breaker.state == OPEN
+
+
+def test_release_while_closed_is_harmless(clock):
+    breaker = CircuitBreaker('test', clock=clock)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CLOSED and breaker.stats()['recent_calls'] == 0
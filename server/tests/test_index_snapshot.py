@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services import index_snapshot
+from services.program_matcher import LexicalMatcher
+
+DESCRIPTIONS = {
+    'SNAP': 'Food assistance for low income households',
+    'Medicaid': 'Health insurance for low income adults and children',
+    'Section 8': 'Housing choice vouchers to help pay rent',
+}
+
+
+@pytest.fixture
+def catalog():
+    return SimpleNamespace(version='v1', descriptions=DESCRIPTIONS)
+
+
+def _loader(catalog, directory):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return LexicalMatcher(catalog.descriptions, version=catalog.version)
+
+    return builds, lambda: index_snapshot.load(catalog, LexicalMatcher, build, directory)
+
+
+def _section_format(catalog, directory):
+    path = index_snapshot.section_dir(catalog, LexicalMatcher, directory) / index_snapshot.MANIFEST
+    return json.loads(path.read_text())['section_format']
+
+
+def test_warm_load_matches_build(catalog, tmp_path):
+    builds, load = _loader(catalog, tmp_path)
+    built, mapped = load(), load()
+    assert len(builds) == 1
+    text = 'help with rent and food'
+    assert np.allclose(built.scores(text), mapped.scores(text))
+    assert built.match(text, 3) == mapped.match(text, 3)
+
+
+def test_format_bump_rewrites_section(catalog, tmp_path, monkeypatch):
+    builds, load = _loader(catalog, tmp_path)
+    load()
+    monkeypatch.setattr(LexicalMatcher, 'SNAPSHOT_FORMAT', LexicalMatcher.SNAPSHOT_FORMAT + 1)
+    load(), load(), load()
+    assert len(builds) == 2
+    assert _section_format(catalog, tmp_path) == LexicalMatcher.SNAPSHOT_FORMAT
+    assert not [p for p in index_snapshot.section_dir(catalog, LexicalMatcher, tmp_path).parent.iterdir()
+                if p.name.startswith('.')]
+
+
+def test_corrupt_manifest_is_rebuilt(catalog, tmp_path):
+    builds, load = _loader(catalog, tmp_path)
+    load()
+    (index_snapshot.section_dir(catalog, LexicalMatcher, tmp_path) / index_snapshot.MANIFEST).write_text('{bad')
+    load(), load()
+    assert len(builds) == 2
+
+
+def test_new_catalog_version_prunes_old(catalog, tmp_path):
+    _, load = _loader(catalog, tmp_path)
+    load()
+    newer = SimpleNamespace(version='v2', descriptions=DESCRIPTIONS)
+    _, load_newer = _loader(newer, tmp_path)
+    load_newer()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['v2']
+
+
+def test_program_cards_are_served_from_the_mapping(tmp_path):
+    from services.catalog import Catalog
+    from services.program_cards import ProgramCards
+
+    real = Catalog()
+    built = ProgramCards(real)
+    index_snapshot.write(real, built, tmp_path)
+    mapped = index_snapshot.read(real, ProgramCards, tmp_path)
+    assert isinstance(mapped.catalog_body, memoryview)
+    assert isinstance(mapped.catalog_body.obj, np.memmap)  # a view of the mapping, not a heap copy
+    assert bytes(mapped.catalog_body) == built.catalog_body
+    assert bytes(mapped.catalog_gzip) == built.catalog_gzip
+    names = built.names[:3] + ['Not in the catalog']
+    assert mapped.render_response('hi', names) == built.render_response('hi', names)
@@ -0,0 +1,46 @@
+import logging
+import queue
+
+from services.log_config import PAYLOAD_OMITTED, DroppingQueueHandler, PayloadSamplingFilter
+
+
+def _logger(rate: float):
+    handler = DroppingQueueHandler(queue.Queue())
+    handler.addFilter(PayloadSamplingFilter(rate))
+    logger = logging.getLogger(f'test_log_config.{rate}')
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, handler.queue
+
+
+def _drain(q: queue.Queue):
+    records = []
+    while not q.empty():
+        records.append(q.get_nowait())
+    return records
+
+
+def test_payload_records_are_never_dropped():
+    logger, q = _logger(0.0)
+    for i in range(20):
+        logger.info('stage B ranking', extra={'payload': {'i': i}})
+    records = _drain(q)
+    assert len(records) == 20
+    assert all(r.payload == PAYLOAD_OMITTED for r in records)
+    assert all(r.getMessage() == 'stage B ranking' for r in records)
+
+
+def test_warnings_keep_their_payload():
+    logger, q = _logger(0.0)
+    for i in range(20):
+        logger.warning('no eligible programs ranked', extra={'payload': [i]})
+    assert [r.payload for r in _drain(q)] == [[i] for i in range(20)]
+
+
+def test_full_rate_keeps_every_payload():
+    logger, q = _logger(1.0)
+    logger.info('stage A candidates', extra={'payload': ['a', 'b']})
+    logger.info('no payload')
+    records = _drain(q)
+    assert [getattr(r, 'payload', None) for r in records] == [['a', 'b'], None]
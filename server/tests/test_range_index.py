@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.eligibility_optimizer import WelfareProgramEligibilityOptimizer
+from services.range_index import IntervalIndex, ThresholdIndex
+
+
+def _column(rng, n, low, high, missing=0.1):
+    values = rng.integers(low, high, n).astype(float)
+    values[rng.random(n) < missing] = np.nan
+    return values
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_threshold_index_matches_scan(rng):
+    values = _column(rng, 5_000, 0, 300)
+    index = ThresholdIndex(values)
+    for x in [-1, 0, 17.5, 150, 299, 300, 1e9]:
+        assert np.array_equal(np.sort(index.greater_equal(x)), np.flatnonzero(values >= x))
+        assert np.array_equal(np.sort(index.greater(x)), np.flatnonzero(values > x))
+        assert np.array_equal(np.sort(index.less_equal(x)), np.flatnonzero(values <= x))
+        assert np.array_equal(np.sort(index.less(x)), np.flatnonzero(values < x))
+    assert np.array_equal(index.unknown, np.flatnonzero(np.isnan(values)))
+
+
+def test_interval_index_matches_scan(rng):
+    lo = _column(rng, 5_000, 0, 70)
+    hi = lo + _column(rng, 5_000, 0, 50)
+    index = IntervalIndex(lo, hi)
+    for x in [-5, 0, 18, 33.5, 64, 119, 500]:
+        containing = np.sort(index.containing(x))
+        assert np.array_equal(containing, np.flatnonzero((lo <= x) & (x <= hi)))
+        assert index.containing_upper_bound(x) >= len(containing)
+        # rows with a missing bound are never excluded
+        assert np.array_equal(index.excluding(x), np.flatnonzero(~np.isnan(lo) & ~np.isnan(hi) & ((hi < x) | (lo > x))))
+
+
+def test_programs_outside_ranges_matches_scan(rng):
+    n = 2_000
+    min_age = _column(rng, n, 0, 60)
+    df = pd.DataFrame({
+        'program': [f'p{i}' for i in range(n)],
+        'min_age': min_age,
+        'max_age': min_age + _column(rng, n, 5, 60),
+        'max_monthly_income': _column(rng, n, 500, 5000),
+    })
+    optimizer = WelfareProgramEligibilityOptimizer(df=df)
+    for age, income in [(34, 1800), (5, None), (None, 4000), (90, 100)]:
+        outside = np.zeros(n, dtype=bool)
+        if age is not None:
+            known = df['min_age'].notna() & df['max_age'].notna()
+            outside |= known & ((df['max_age'] < age) | (df['min_age'] > age))
+        if income is not None:
+            outside |= df['max_monthly_income'] < income
+        expected = df['program'][outside].tolist()
+        assert optimizer.programs_outside_ranges(age=age, monthly_income=income) == expected
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from models.user import User
+from services.catalog import get_catalog
+from services.rank_programs_bot import RankProgramsBot
+from services.ranking_memo import RankingMemo
+
+USERS = [
+    User(),
+    User.from_fields({'age': 34, 'monthly_income': 1800, 'has_children': True, 'employed': False}),
+    User.from_fields({'age': 70, 'is_veteran': True, 'disabled': True}),
+]
+
+
+@pytest.fixture(scope='module')
+def catalog_df():
+    # several copies of the catalog (with unique names), so that many programs tie on score
+    df = get_catalog().programs_df
+    name = df.columns[0]
+    copies = [df.assign(**{name: df[name].astype(str) + f' #{i}'}) for i in range(5)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def _names(df):
+    return df.iloc[:, 0].astype(str).tolist()
+
+
+def _pages(fetch, limit):
+    names, cursor = [], None
+    while True:
+        page = fetch(limit, cursor)
+        names.extend(page.names)
+        if page.next_cursor is None:
+            return names
+        assert len(page.names) == limit
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('user', USERS)
+def test_top_k_matches_full_sort(catalog_df, user):
+    bot = RankProgramsBot(catalog_df, _names(catalog_df), user)
+    full = bot.ranked_entries()
+    scores = [score for _, score, _ in full]
+    assert scores == sorted(scores, reverse=True)
+    for k in (1, 7, 20, len(full), len(full) + 5):
+        entries, has_more = bot.top_entries(k)
+        assert entries == full[:k]
+        assert has_more == (len(full) > k)
+        assert bot.top_k(k).names == [name for name, _, _ in full[:k]]
+
+
+@pytest.mark.parametrize('user', USERS)
+def test_ties_break_by_catalog_row(catalog_df, user):
+    entries = RankProgramsBot(catalog_df, _names(catalog_df), user).top_entries(50)[0]
+    keys = [(-score, row) for _, score, row in entries]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize('user', USERS)
+@pytest.mark.parametrize('limit', [1, 6, 25])
+def test_cursor_pages_match_full_sort(catalog_df, user, limit):
+    bot = RankProgramsBot(catalog_df, _names(catalog_df), user)
+    assert _pages(bot.top_k, limit) == bot.rank_programs()
+
+
+@pytest.mark.parametrize('user', USERS)
+@pytest.mark.parametrize('limit', [1, 6, 25])
+def test_memo_pages_match_full_sort(catalog_df, user, limit):
+    candidates = _names(catalog_df)[::3]
+    expected = RankProgramsBot(catalog_df, candidates, user).rank_programs()
+    memo = RankingMemo(catalog_df)
+    first = memo.rank_page(candidates, user, limit)
+    assert first.names == expected[:limit]
+    assert memo.rank_page(candidates, user, limit).names == first.names  # served from the partial entry
+    assert memo.hits == 1
+    assert _pages(lambda k, cursor: memo.rank_page(candidates, user, k, cursor), limit) == expected
+    assert memo.rank(candidates, user) == expected
+
+
+def test_memo_cursor_interchangeable_with_top_k(catalog_df):
+    user, candidates = USERS[1], _names(catalog_df)
+    cursor = RankProgramsBot(catalog_df, candidates, user).top_k(10).next_cursor
+    page = RankingMemo(catalog_df).rank_page(candidates, user, 10, cursor)
+    assert page.names == RankProgramsBot(catalog_df, candidates, user).rank_programs()[10:20]
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from services.rate_limiter import BACKGROUND, COMPLETING, INTERACTIVE, ModelLimiter, PriorityLimiter, QueueFull, QueueTimeout, Ticket
+
+
+def test_from_env_splits_quota_over_workers(monkeypatch):
+    monkeypatch.setenv('MODEL_RPM', 'a=60,b=15')
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.delenv('MODEL_QUEUE_MAX', raising=False)
+    monkeypatch.setenv('THREADS', '8')
+    limiter = ModelLimiter.from_env()
+    assert limiter.limiters['a'].rate * 60 == pytest.approx(15)
+    assert limiter.limiters['b'].rate * 60 == pytest.approx(3.75)
+    assert limiter.limiters['a'].max_queue == 7
+
+
+def test_from_env_single_process_defaults(monkeypatch):
+    monkeypatch.setenv('MODEL_RPM', 'a=30')
+    for name in ('WEB_CONCURRENCY', 'THREADS', 'MODEL_QUEUE_MAX'):
+        monkeypatch.delenv(name, raising=False)
+    limiter = ModelLimiter.from_env()
+    assert limiter.limiters['a'].rate * 60 == pytest.approx(30)
+    assert limiter.limiters['a'].max_queue == 3
+
+
+def test_from_env_limits_nothing_without_model_rpm(monkeypatch):
+    monkeypatch.delenv('MODEL_RPM', raising=False)
+    limiter = ModelLimiter.from_env()
+    assert limiter.limiters == {}
+    assert limiter.acquire('gemma-3-27b-it') == 0.0
+
+
+def test_queue_full_fails_fast():
+    limiter = PriorityLimiter(60, burst=1, max_queue=1)
+    limiter.acquire()  # empties the bucket
+    waiter = threading.Thread(target=lambda: limiter.acquire(timeout=2))
+    waiter.start()
+    while limiter.stats()['queued'] == 0:
+        time.sleep(0.001)
+    with pytest.raises(QueueFull):
+        limiter.acquire(timeout=2)
+    waiter.join()
+    assert limiter.rejected == 1
+
+
+def test_higher_priority_is_served_first():
+    limiter = PriorityLimiter(600, burst=1)  # one token every 0.1 s
+    limiter.acquire()
+    order = []
+    background = threading.Thread(target=lambda: order.append(limiter.acquire(BACKGROUND, timeout=2) and 'background'))
+    background.start()
+    while limiter.stats()['queued'] == 0:
+        time.sleep(0.001)
+    limiter.acquire(COMPLETING, timeout=2)
+    order.append('completing')
+    background.join()
+    assert order == ['completing', 'background']
+
+
+def test_raised_ticket_overtakes_waiting_callers():
+    limiter = PriorityLimiter(600, burst=1)
+    limiter.acquire()
+    order = []
+    ticket = Ticket(BACKGROUND)
+    threads = [threading.Thread(target=lambda: limiter.acquire(ticket, timeout=2) is not None and order.append('prefetch'))]
+    threads[0].start()
+    while limiter.stats()['queued'] < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=lambda: limiter.acquire(INTERACTIVE, timeout=2) is not None and order.append('interactive')))
+    threads[1].start()
+    while limiter.stats()['queued'] < 2:
+        time.sleep(0.001)
+    ticket.raise_to(COMPLETING)
+    for thread in threads:
+        thread.join()
+    assert order == ['prefetch', 'interactive']
+    assert limiter.stats()['wait']['completing']['granted'] == 1
+
+
+def test_timeout():
+    limiter = PriorityLimiter(1, burst=1)
+    limiter.acquire()
+    with pytest.raises(QueueTimeout):
+        limiter.acquire(timeout=0.01)
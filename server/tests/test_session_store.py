@@ -0,0 +1,67 @@
+import pytest
+
+from models.conversation import Conversation
+from services.session_store import SessionConflict, SessionStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'sessions.db'
+
+
+def test_round_trip(db_path):
+    store = SessionStore(db_path)
+    conv = store.load('s1')
+    conv.chat_a_history.append('user: hi')
+    store.save(conv)
+    conv.chat_a_history.append('model: hello')
+    store.save(conv)
+
+    loaded = SessionStore(db_path).load('s1')
+    assert loaded.chat_a_history == ['user: hi', 'model: hello']
+    assert loaded.store_version == 2
+
+
+def test_concurrent_turns_on_two_stores_conflict(db_path):
+    a, b = SessionStore(db_path), SessionStore(db_path)
+    first = a.load('s1')
+    first.chat_a_history.append('user: hi')
+    a.save(first)
+
+    # both workers load version 1 and save a turn on top of it
+    conv_a, conv_b = a.load('s1'), b.load('s1')
+    conv_a.chat_a_history.append('from A')
+    conv_b.chat_a_history.append('from B')
+    a.save(conv_a)
+    with pytest.raises(SessionConflict):
+        b.save(conv_b)
+
+    # neither store serves the losing state afterwards
+    assert a.load('s1').chat_a_history == ['user: hi', 'from A']
+    assert b.load('s1').chat_a_history == ['user: hi', 'from A']
+    assert b.load('s1').store_version == 2
+
+
+def test_two_new_sessions_conflict(db_path):
+    a, b = SessionStore(db_path), SessionStore(db_path)
+    conv_a, conv_b = a.load('s1'), b.load('s1')
+    a.save(conv_a)
+    with pytest.raises(SessionConflict):
+        b.save(conv_b)
+
+
+def test_cache_picks_up_other_store_writes(db_path):
+    a, b = SessionStore(db_path), SessionStore(db_path)
+    conv = a.load('s1')
+    a.save(conv)
+    a.load('s1')  # cached in a
+
+    conv = b.load('s1')
+    conv.stage = 'b'
+    b.save(conv)
+    assert a.load('s1').stage == 'b'
+
+
+def test_conversation_serialization_excludes_store_version():
+    conv = Conversation(session_id='s1', store_version=3)
+    assert 'store_version' not in conv.model_dump_json()
@@ -0,0 +1,60 @@
+import threading
+
+from services.tracing import ProfilerController
+
+
+def _busy():
+    return sum(i * i for i in range(20_000))
+
+
+def test_overlapping_cprofile_requests_do_not_fail(tmp_path):
+    controller = ProfilerController()
+    controller.arm(3, out_dir=tmp_path)
+    inside, release = threading.Event(), threading.Event()
+    errors = []
+
+    def first():
+        with controller.maybe_profile('first'):
+            inside.set()
+            release.wait(5)
+            _busy()
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    inside.wait(5)
+    try:
+        with controller.maybe_profile('second'):  # overlaps the first: runs unprofiled
+            _busy()
+    except Exception as e:
+        errors.append(e)
+    release.set()
+    thread.join()
+
+    assert errors == []
+    status = controller.status()
+    assert len(status['written']) == 1
+    assert status['remaining'] == 2  # the skipped request did not use up an armed profile
+
+
+def test_profiler_failure_does_not_fail_request(tmp_path):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    controller = ProfilerController()
+    controller.arm(1, out_dir=blocker / 'profiles')
+    with controller.maybe_profile('request'):
+        result = _busy()
+    assert result > 0
+    assert controller.status()['written'] == []
+    # the cProfile slot was released after the failed write
+    controller.arm(1, out_dir=tmp_path)
+    with controller.maybe_profile('request'):
+        _busy()
+    assert len(controller.status()['written']) == 1
+
+
+def test_sampling_profile_is_written(tmp_path):
+    controller = ProfilerController()
+    controller.arm(1, mode='sample', out_dir=tmp_path)
+    with controller.maybe_profile('request'):
+        _busy()
+    assert [p.endswith('.folded') for p in controller.status()['written']] == [True]